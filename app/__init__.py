@@ -7,16 +7,45 @@ Sistema de Comunicação Alternativa com Pictogramas para TEA
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from config import config
+from app.replica import SessaoRoteada
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': SessaoRoteada})
 
 def create_app(config_name='default'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
+    from app.banco import opcoes_engine, configurar_engine
+    from app.replica import init_replica
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opcoes_engine(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+    init_replica(app)
     db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            configurar_engine(engine, app.config)
+    
+    from app.sessoes_login import init_sessoes
+    init_sessoes(app)
+    
+    from app.serializacao import criar_provedor_json
+    app.json = criar_provedor_json(app)
+    
+    # Registrada antes das demais: after_request roda em ordem inversa
+    from app.compressao import init_compressao
+    init_compressao(app)
+    
+    from app.assets import init_assets
+    init_assets(app)
+    
+    from app.metricas import init_metricas
+    init_metricas(app)
     
     from app.routes import main
     app.register_blueprint(main)
     
+    if app.config.get('PREDICAO_CARREGAR_NA_INICIALIZACAO'):
+        from app.predicao import servico_predicao
+        with app.app_context():
+            servico_predicao.reconstruir()
+    
     return app
\ No newline at end of file
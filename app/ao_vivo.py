@@ -0,0 +1,257 @@
+"""
+ao_vivo.py
+Acompanhamento de sessões em tempo real (Server-Sent Events)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+As rotas de seleção publicam no canal do próprio processo, que repassa a
+cada ouvinte da sessão. Seleções gravadas por outros workers chegam por uma
+única thread vigia por processo, que consulta o banco só para as sessões com
+ouvintes. Como em predicao.py, cada leitura volta JANELA_RELEITURA ids antes
+do maior já visto e ignora os já publicados: uma seleção cujo commit terminou
+depois de outra de id maior também é transmitida.
+"""
+
+import json
+import queue
+import threading
+import time
+from sqlalchemy import func
+from app import db
+from app.models import Sessao, HistoricoSelecao, Pictograma, Categoria
+
+EVENTO_FIM = {'tipo': 'fim'}
+JANELA_RELEITURA = 500  # Ids abaixo do maior já visto relidos a cada consulta
+
+
+def consultar_selecoes(*filtros):
+    """Seleções no formato do histórico da sessão (mais o pictograma_id), em ordem de id"""
+    linhas = db.session.query(
+        HistoricoSelecao.id, HistoricoSelecao.sessao_id, HistoricoSelecao.pictograma_id,
+        HistoricoSelecao.timestamp, HistoricoSelecao.tempo_resposta_segundos,
+        Pictograma.nome, Pictograma.imagem_url, Categoria.nome
+    ).join(
+        Pictograma, Pictograma.id == HistoricoSelecao.pictograma_id
+    ).join(
+        Categoria, Categoria.id == Pictograma.categoria_id
+    ).filter(*filtros).order_by(HistoricoSelecao.id)
+
+    return [{
+        'tipo': 'selecao',
+        'id': historico_id,
+        'sessao_id': sessao_id,
+        'pictograma_id': pictograma_id,
+        'pictograma_nome': nome,
+        'pictograma_imagem': imagem_url,
+        'categoria_nome': categoria_nome,
+        'timestamp': timestamp.isoformat(),
+        'tempo_resposta_segundos': tempo
+    } for historico_id, sessao_id, pictograma_id, timestamp, tempo, nome, imagem_url, categoria_nome in linhas]
+
+
+class Assinatura:
+    """
+    Um ouvinte de uma sessão. A fila é limitada: se o cliente não acompanhar,
+    os eventos seguintes são descartados e `atrasada` indica que ele deve
+    reler do banco a partir do último id enviado (nada se perde).
+    """
+
+    def __init__(self, sessao_id, max_pendentes):
+        self.sessao_id = sessao_id
+        self.fila = queue.Queue(maxsize=max_pendentes)
+        self.atrasada = False
+
+    def entregar(self, evento):
+        try:
+            self.fila.put_nowait(evento)
+        except queue.Full:
+            self.atrasada = True
+
+
+class CanalSessoes:
+    """Pub/sub por processo: sessao_id -> ouvintes conectados a este worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._assinaturas = {}   # sessao_id -> set(Assinatura)
+        self._cursores = {}      # sessao_id -> maior id de seleção já publicado
+        self._publicados = {}    # sessao_id -> ids publicados dentro da janela de releitura
+        self._total = 0
+        self._app = None
+        self._vigia = None
+
+    def assinar(self, app, sessao_id):
+        """Registra um ouvinte; retorna None se o limite deste worker foi atingido"""
+        # A vigia parte do que já existe: o anterior a isso vem da releitura em transmitir()
+        maior_id = db.session.query(func.max(HistoricoSelecao.id)).filter(
+            HistoricoSelecao.sessao_id == sessao_id
+        ).scalar() or 0
+        existentes = {i for (i,) in db.session.query(HistoricoSelecao.id).filter(
+            HistoricoSelecao.sessao_id == sessao_id, HistoricoSelecao.id > maior_id - JANELA_RELEITURA
+        )}
+
+        with self._lock:
+            if self._total >= app.config.get('AO_VIVO_MAX_OUVINTES', 50):
+                return None
+            assinatura = Assinatura(sessao_id, app.config.get('AO_VIVO_MAX_PENDENTES', 100))
+            self._assinaturas.setdefault(sessao_id, set()).add(assinatura)
+            if sessao_id not in self._cursores:
+                self._cursores[sessao_id] = maior_id
+                self._publicados[sessao_id] = existentes
+            self._total += 1
+            self._app = app
+            if self._vigia is None or not self._vigia.is_alive():
+                self._vigia = threading.Thread(target=self._vigiar, name='ao-vivo', daemon=True)
+                self._vigia.start()
+        return assinatura
+
+    def cancelar(self, assinatura):
+        with self._lock:
+            ouvintes = self._assinaturas.get(assinatura.sessao_id)
+            if ouvintes is None or assinatura not in ouvintes:
+                return
+            ouvintes.discard(assinatura)
+            self._total -= 1
+            if not ouvintes:
+                del self._assinaturas[assinatura.sessao_id]
+                self._cursores.pop(assinatura.sessao_id, None)
+                self._publicados.pop(assinatura.sessao_id, None)
+
+    def tem_ouvintes(self, sessao_id):
+        return sessao_id in self._assinaturas
+
+    def publicar(self, sessao_id, eventos):
+        """
+        Entrega os eventos aos ouvintes da sessão neste worker (sem ouvintes,
+        não faz nada); seleções já publicadas são ignoradas
+        """
+        with self._lock:
+            ouvintes = list(self._assinaturas.get(sessao_id, ()))
+            if not ouvintes:
+                return
+            publicados = self._publicados.setdefault(sessao_id, set())
+            eventos = [e for e in eventos if not e.get('id') or e['id'] not in publicados]
+            publicados.update(e['id'] for e in eventos if e.get('id'))
+
+            maior_id = max(self._cursores.get(sessao_id, 0), max(publicados, default=0))
+            self._cursores[sessao_id] = maior_id
+            self._publicados[sessao_id] = {i for i in publicados if i > maior_id - JANELA_RELEITURA}
+
+        for assinatura in ouvintes:
+            for evento in eventos:
+                assinatura.entregar(evento)
+
+    def publicar_selecoes(self, sessao_id, *filtros):
+        """Chamado pelas rotas após o commit; só consulta o banco se houver ouvintes"""
+        if self.tem_ouvintes(sessao_id):
+            self.publicar(sessao_id, consultar_selecoes(HistoricoSelecao.sessao_id == sessao_id, *filtros))
+
+    def _vigiar(self):
+        """Thread vigia: uma consulta por intervalo cobre todas as sessões acompanhadas"""
+        while True:
+            app = self._app
+            time.sleep(app.config.get('AO_VIVO_INTERVALO_BANCO', 2))
+
+            with self._lock:
+                if not self._assinaturas:
+                    self._vigia = None
+                    return
+                cursores = dict(self._cursores)
+
+            with app.app_context():
+                try:
+                    novas = consultar_selecoes(
+                        HistoricoSelecao.sessao_id.in_(list(cursores)),
+                        HistoricoSelecao.id > min(cursores.values()) - JANELA_RELEITURA
+                    )
+                    finalizadas = {sid for (sid,) in db.session.query(Sessao.id).filter(
+                        Sessao.id.in_(list(cursores)), Sessao.finalizada == True
+                    )}
+                except Exception:
+                    app.logger.exception('Falha ao consultar seleções ao vivo')
+                    continue
+                finally:
+                    db.session.remove()
+
+            # publicar() descarta o que já foi entregue
+            por_sessao = {}
+            for evento in novas:
+                if evento['id'] > cursores[evento['sessao_id']] - JANELA_RELEITURA:
+                    por_sessao.setdefault(evento['sessao_id'], []).append(evento)
+            for sessao_id in finalizadas:
+                por_sessao.setdefault(sessao_id, []).append(EVENTO_FIM)
+            for sessao_id, eventos in por_sessao.items():
+                self.publicar(sessao_id, eventos)
+
+
+canal_sessoes = CanalSessoes()
+
+
+def _formatar(evento):
+    if evento['tipo'] == 'fim':
+        return 'event: fim\ndata: {}\n\n'
+    return f"id: {evento['id']}\nevent: selecao\ndata: {json.dumps(evento, ensure_ascii=False)}\n\n"
+
+
+def transmitir(app, sessao_id, ultimo_id, assinatura=None):
+    """
+    Gerador do corpo text/event-stream. Primeiro reenvia do banco as seleções
+    com id > ultimo_id - JANELA_RELEITURA (o cliente ignora ids repetidos) e
+    depois segue a fila da assinatura. Termina no evento `fim` ou após
+    AO_VIVO_DURACAO_MAXIMA; o EventSource reconecta sozinho e o cabeçalho
+    Last-Event-ID retoma do ponto em que parou.
+    """
+    heartbeat = app.config.get('AO_VIVO_HEARTBEAT', 10)
+    prazo = time.monotonic() + app.config.get('AO_VIVO_DURACAO_MAXIMA', 25)
+
+    enviados = set()
+
+    def reler():
+        try:
+            eventos = consultar_selecoes(
+                HistoricoSelecao.sessao_id == sessao_id,
+                HistoricoSelecao.id > (ultimo_id - JANELA_RELEITURA if ultimo_id else 0)
+            )
+        finally:
+            db.session.remove()  # devolve a conexão ao pool enquanto o stream espera
+        return [e for e in eventos if e['id'] not in enviados]
+
+    def enviar(evento):
+        nonlocal ultimo_id
+        enviados.add(evento['id'])
+        ultimo_id = max(ultimo_id, evento['id'])
+        return _formatar(evento)
+
+    try:
+        yield f"retry: {app.config.get('AO_VIVO_RECONEXAO_MS', 1000)}\n\n"
+
+        for evento in reler():
+            yield enviar(evento)
+
+        if assinatura is None:
+            # Sessão já finalizada: só o que estava gravado
+            yield _formatar(EVENTO_FIM)
+            return
+
+        while True:
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                return
+            try:
+                evento = assinatura.fila.get(timeout=min(heartbeat, restante))
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+
+            if assinatura.atrasada:
+                assinatura.atrasada = False
+                for atrasado in reler():
+                    yield enviar(atrasado)
+
+            if evento['tipo'] == 'fim':
+                yield _formatar(evento)
+                return
+            if evento['id'] not in enviados:
+                yield enviar(evento)
+    finally:
+        if assinatura is not None:
+            canal_sessoes.cancelar(assinatura)
@@ -0,0 +1,98 @@
+"""
+arquivo.py
+Formato compacto das seleções de sessões arquivadas (ver retencao.py)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+Formato do blob (versão 1), comprimido com zlib:
+    1 byte  versão
+    por seleção, em ordem de timestamp, inteiros varint:
+        id da seleção (delta em relação à anterior, zigzag)
+        pictograma_id
+        delta do timestamp em microssegundos (em relação à anterior; a 1ª usa ArquivoSessao.inicio)
+        tempo de resposta em milissegundos + 1 (0 = não informado)
+
+O evento_id não é guardado: ele só serve para deduplicar reenvios recentes.
+"""
+
+import zlib
+from datetime import timedelta
+from app import db
+from app.models import ArquivoSessao
+
+VERSAO_FORMATO = 1
+
+
+def _escrever_varint(saida, valor):
+    while valor >= 0x80:
+        saida.append((valor & 0x7F) | 0x80)
+        valor >>= 7
+    saida.append(valor)
+
+
+def _ler_varint(dados, posicao):
+    valor = deslocamento = 0
+    while True:
+        byte = dados[posicao]
+        posicao += 1
+        valor |= (byte & 0x7F) << deslocamento
+        if byte < 0x80:
+            return valor, posicao
+        deslocamento += 7
+
+
+def _zigzag(valor):
+    return valor * 2 if valor >= 0 else -valor * 2 - 1
+
+
+def _des_zigzag(valor):
+    return valor // 2 if valor % 2 == 0 else -(valor + 1) // 2
+
+
+def empacotar(selecoes):
+    """
+    selecoes: [(id, pictograma_id, timestamp, tempo_resposta_segundos)] em ordem de timestamp
+    Retorna (inicio, blob)
+    """
+    saida = bytearray([VERSAO_FORMATO])
+    inicio = selecoes[0][2] if selecoes else None
+    id_anterior, momento_anterior = 0, inicio
+
+    for historico_id, pictograma_id, timestamp, tempo_resposta in selecoes:
+        _escrever_varint(saida, _zigzag(historico_id - id_anterior))
+        _escrever_varint(saida, pictograma_id)
+        _escrever_varint(saida, max((timestamp - momento_anterior) // timedelta(microseconds=1), 0))
+        _escrever_varint(saida, 0 if tempo_resposta is None else int(round(tempo_resposta * 1000)) + 1)
+        id_anterior, momento_anterior = historico_id, timestamp
+
+    return inicio, zlib.compress(bytes(saida))
+
+
+def desempacotar(inicio, blob):
+    """Inverso de empacotar: lista de (id, pictograma_id, timestamp, tempo_resposta_segundos)"""
+    dados = zlib.decompress(blob)
+    if dados[0] != VERSAO_FORMATO:
+        raise ValueError(f'Versão de arquivo desconhecida: {dados[0]}')
+
+    selecoes = []
+    posicao = 1
+    historico_id, momento = 0, inicio
+    while posicao < len(dados):
+        delta_id, posicao = _ler_varint(dados, posicao)
+        pictograma_id, posicao = _ler_varint(dados, posicao)
+        delta_tempo, posicao = _ler_varint(dados, posicao)
+        tempo_ms, posicao = _ler_varint(dados, posicao)
+
+        historico_id += _des_zigzag(delta_id)
+        momento += timedelta(microseconds=delta_tempo)
+        selecoes.append((historico_id, pictograma_id, momento, (tempo_ms - 1) / 1000 if tempo_ms else None))
+    return selecoes
+
+
+def selecoes_arquivadas(sessao_id):
+    """Seleções arquivadas da sessão, ou None se ela não foi arquivada"""
+    arquivo = db.session.query(ArquivoSessao.inicio, ArquivoSessao.dados).filter(
+        ArquivoSessao.sessao_id == sessao_id
+    ).first()
+    if arquivo is None:
+        return None
+    return desempacotar(arquivo.inicio, arquivo.dados)
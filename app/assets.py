@@ -0,0 +1,235 @@
+"""
+assets.py
+CSS e JavaScript minificados com hash do conteúdo no nome (static/dist/)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+construir_assets.py gera static/dist/<nome>.<hash>.<ext> e o manifesto
+(caminho de origem -> arquivo gerado). Os templates usam asset('css/style.css'),
+que resolve pelo manifesto; como o nome muda junto com o conteúdo, dist/ é
+servido com Cache-Control immutable e o navegador não revalida mais.
+Sem manifesto (ou com ASSETS_MINIFICADOS desligado, como em desenvolvimento),
+asset() aponta para os arquivos originais.
+"""
+
+import hashlib
+import json
+import os
+import re
+from flask import request, url_for
+
+PASTA_DIST = 'dist'
+MANIFESTO = 'manifesto.json'
+ORIGENS = (('css', '.css'), ('js', '.js'))
+MAX_AGE_IMUTAVEL = 365 * 24 * 3600
+
+CARACTERES_REGEX_ANTES = set('(,=:[!&|?{};+-*%<>~^')
+PALAVRAS_REGEX_ANTES = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw'}
+
+
+def minificar_css(texto):
+    """Remove comentários e espaços desnecessários (o style.css não usa strings com esses sinais)"""
+    texto = re.sub(r'/\*.*?\*/', '', texto, flags=re.S)
+    texto = re.sub(r'\s+', ' ', texto)
+    texto = re.sub(r'\s*([{};,>])\s*', r'\1', texto)
+    texto = re.sub(r':\s+', ':', texto)
+    return texto.replace(';}', '}').strip()
+
+
+def _eh_palavra(caractere):
+    return caractere.isalnum() or caractere in '_$'
+
+
+def _fim_string(codigo, i, aspas):
+    j = i + 1
+    while j < len(codigo) and codigo[j] != aspas:
+        j += 2 if codigo[j] == '\\' else 1
+    return j + 1
+
+
+def _fim_regex(codigo, i):
+    j, em_classe = i + 1, False
+    while j < len(codigo):
+        c = codigo[j]
+        if c == '\\':
+            j += 2
+            continue
+        if c == '[':
+            em_classe = True
+        elif c == ']':
+            em_classe = False
+        elif c == '/' and not em_classe:
+            break
+        j += 1
+    j += 1
+    while j < len(codigo) and _eh_palavra(codigo[j]):
+        j += 1
+    return j
+
+
+def _trecho_template(codigo, j):
+    """Avança no texto de um template literal; devolve (posição, abriu_expressao)"""
+    while j < len(codigo):
+        c = codigo[j]
+        if c == '\\':
+            j += 2
+        elif c == '`':
+            return j + 1, False
+        elif codigo.startswith('${', j):
+            return j + 2, True
+        else:
+            j += 1
+    return j, False
+
+
+def _regex_permitida(saida):
+    """Uma '/' inicia regex (e não divisão) depois de operador, abertura ou palavra-chave"""
+    texto = ''.join(saida[-12:]).rstrip()
+    if not texto:
+        return True
+    if texto[-1] in CARACTERES_REGEX_ANTES:
+        return True
+    palavra = re.search(r'[\w$]+$', texto)
+    return bool(palavra) and palavra.group() in PALAVRAS_REGEX_ANTES
+
+
+def minificar_js(codigo):
+    """
+    Minificação conservadora: tira comentários, indentação, linhas em branco e
+    espaços entre símbolos. Mantém as quebras de linha (a inserção automática
+    de ';' continua igual) e o conteúdo de strings, template literals e regex.
+    """
+    saida = []
+    chaves = []  # Chaves abertas dentro de cada ${...} de template literal
+    i, n = 0, len(codigo)
+
+    while i < n:
+        c = codigo[i]
+
+        if c in '"\'':
+            j = _fim_string(codigo, i, c)
+            saida.append(codigo[i:j])
+            i = j
+        elif c == '`' or (c == '}' and chaves and chaves[-1] == 0):
+            if c == '}':
+                chaves.pop()
+            j, abriu = _trecho_template(codigo, i + 1)
+            if abriu:
+                chaves.append(0)
+            saida.append(codigo[i:j])
+            i = j
+        elif codigo.startswith('//', i):
+            while i < n and codigo[i] != '\n':
+                i += 1
+        elif codigo.startswith('/*', i):
+            fim = codigo.find('*/', i + 2)
+            i = n if fim < 0 else fim + 2
+        elif c == '/' and _regex_permitida(saida):
+            j = _fim_regex(codigo, i)
+            saida.append(codigo[i:j])
+            i = j
+        elif c.isspace():
+            j = i
+            while j < n and codigo[j].isspace():
+                j += 1
+            quebra = '\n' in codigo[i:j]
+            anterior = saida[-1][-1] if saida else ''
+            proximo = codigo[j] if j < n else ''
+            if quebra and anterior and anterior != '\n' and proximo:
+                saida.append('\n')
+            elif not quebra and anterior and proximo and (
+                (_eh_palavra(anterior) and _eh_palavra(proximo)) or
+                (anterior == proximo and anterior in '+-/')
+            ):
+                saida.append(' ')
+            i = j
+        else:
+            if chaves:
+                if c == '{':
+                    chaves[-1] += 1
+                elif c == '}':
+                    chaves[-1] -= 1
+            saida.append(c)
+            i += 1
+
+    return ''.join(saida).strip() + '\n'
+
+
+MINIFICADORES = {'.css': minificar_css, '.js': minificar_js}
+
+
+def construir(pasta_static):
+    """
+    Minifica css/*.css e js/*.js para dist/ com o hash no nome e grava o
+    manifesto. Se dist/ já tiver uma construção anterior na mesma pasta,
+    os arquivos dela ficam (páginas já abertas ainda podem pedi-los) e os
+    mais antigos são removidos. Num deploy com checkout novo (Render) só
+    existem os da construção atual.
+    Devolve [(origem, gerado, bytes_origem, bytes_gerado)].
+    """
+    destino = os.path.join(pasta_static, PASTA_DIST)
+    os.makedirs(destino, exist_ok=True)
+    anterior = carregar_manifesto(pasta_static)
+
+    manifesto, resultados = {}, []
+    for subpasta, extensao in ORIGENS:
+        pasta = os.path.join(pasta_static, subpasta)
+        if not os.path.isdir(pasta):
+            continue
+        for nome in sorted(os.listdir(pasta)):
+            if not nome.endswith(extensao):
+                continue
+            with open(os.path.join(pasta, nome), encoding='utf-8') as f:
+                original = f.read()
+            conteudo = MINIFICADORES[extensao](original).encode('utf-8')
+            digest = hashlib.sha256(conteudo).hexdigest()[:12]
+            gerado = f'{PASTA_DIST}/{nome[:-len(extensao)]}.{digest}{extensao}'
+
+            caminho = os.path.join(pasta_static, gerado)
+            if not os.path.exists(caminho):
+                with open(caminho, 'wb') as f:
+                    f.write(conteudo)
+            origem = f'{subpasta}/{nome}'
+            manifesto[origem] = gerado
+            resultados.append((origem, gerado, len(original.encode('utf-8')), len(conteudo)))
+
+    manter = {os.path.basename(g) for g in list(manifesto.values()) + list(anterior.values())}
+    for nome in os.listdir(destino):
+        if nome != MANIFESTO and nome not in manter:
+            os.remove(os.path.join(destino, nome))
+
+    with open(os.path.join(destino, MANIFESTO), 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2, sort_keys=True)
+    return resultados
+
+
+def carregar_manifesto(pasta_static):
+    try:
+        with open(os.path.join(pasta_static, PASTA_DIST, MANIFESTO), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _cache_imutavel(resposta):
+    if (request.endpoint == 'static' and resposta.status_code in (200, 304)
+            and request.view_args.get('filename', '').startswith(PASTA_DIST + '/')):
+        resposta.cache_control.no_cache = None
+        resposta.cache_control.public = True
+        resposta.cache_control.max_age = MAX_AGE_IMUTAVEL
+        resposta.cache_control.immutable = True
+    return resposta
+
+
+def init_assets(app):
+    """Registra o helper asset() nos templates e o cache longo de static/dist/"""
+    manifesto = {}
+    if app.config.get('ASSETS_MINIFICADOS', True):
+        manifesto = carregar_manifesto(app.static_folder)
+        if not manifesto:
+            app.logger.warning("Sem static/dist/%s: rode construir_assets.py (servindo os arquivos originais)", MANIFESTO)
+
+    def asset(caminho):
+        return url_for('static', filename=manifesto.get(caminho, caminho))
+
+    app.add_template_global(asset)
+    app.after_request(_cache_imutavel)
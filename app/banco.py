@@ -0,0 +1,67 @@
+"""
+banco.py
+Perfis do engine conforme o banco: pragmas do SQLite e pool do PostgreSQL
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+
+# insert() com on_conflict_do_nothing por dialeto (os demais caem no INSERT simples)
+INSERTS_COM_CONFLITO = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def opcoes_engine(uri, config):
+    """
+    Opções de create_engine para a URI. Valores definidos em
+    SQLALCHEMY_ENGINE_OPTIONS na configuração prevalecem sobre o perfil.
+    """
+    backend = make_url(uri).get_backend_name()
+
+    if backend == 'postgresql':
+        opcoes = {
+            'pool_size': config.get('DB_POOL_SIZE', 5),
+            'max_overflow': config.get('DB_POOL_MAX_OVERFLOW', 5),
+            'pool_timeout': config.get('DB_POOL_TIMEOUT', 10),
+            # O Render encerra conexões ociosas: testa antes de usar e renova periodicamente
+            'pool_pre_ping': True,
+            'pool_recycle': config.get('DB_POOL_RECYCLE', 1800)
+        }
+        if config.get('DB_STATEMENT_TIMEOUT_MS'):
+            opcoes['connect_args'] = {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"}
+    else:
+        opcoes = {}
+
+    opcoes.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return opcoes
+
+
+def _aplicar_pragmas(config):
+    pragmas = [
+        # Espera o lock de escrita em vez de falhar com "database is locked"
+        ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT_MS', 15000)),
+        # NORMAL é seguro com WAL: uma queda de energia perde no máximo o último commit
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('cache_size', -config.get('SQLITE_CACHE_KB', 20000)),
+        ('temp_store', 'MEMORY')
+    ]
+
+    def ao_conectar(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        try:
+            # WAL: leituras (exportações, relatórios) não bloqueiam os commits e vice-versa.
+            # Fica gravado no arquivo; bancos em memória continuam em 'memory'.
+            cursor.execute('PRAGMA journal_mode=WAL')
+            for nome, valor in pragmas:
+                cursor.execute(f'PRAGMA {nome}={valor}')
+        finally:
+            cursor.close()
+
+    return ao_conectar
+
+
+def configurar_engine(engine, config):
+    """Registra os pragmas por conexão nos engines SQLite (o PostgreSQL usa só opcoes_engine)"""
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _aplicar_pragmas(config))
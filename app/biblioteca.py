@@ -0,0 +1,383 @@
+"""
+biblioteca.py
+Importação e exportação da biblioteca de pictogramas (arquivo .zip com manifesto e imagens)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+Formato do arquivo:
+    manifesto.json
+        {
+          "versao": 1,
+          "categorias": [{"nome": "Comida", "cor": "#FF6B6B", "icone": "🍎", "ordem": 1}],
+          "pictogramas": [
+            {"nome": "Água", "categoria": "Comida", "audio_texto": "Água", "ordem": 1,
+             "ativo": true, "imagem": "imagens/agua.png"},
+            {"nome": "Pão", "categoria": "Comida", "imagem_url": "https://..."}
+          ]
+        }
+    imagens/...   arquivos referenciados pelo campo "imagem"
+
+O pictograma é identificado pelo par (categoria, nome).
+"""
+
+import hashlib
+import io
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from urllib.request import urlopen
+from app import db
+from app.cache import cache_quadro
+from app.models import Categoria, Pictograma
+from app.uploads import PASTA_IMAGENS, criar_uploader
+
+MANIFESTO = 'manifesto.json'
+VERSAO_FORMATO = 1
+TAMANHO_LOTE = 500
+EXTENSOES_IMAGEM = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+IMAGEM_PADRAO = '/static/images/placeholder.png'
+
+# Exportação com baixar_remotas: limites para não estourar o timeout do worker
+TEMPO_MAX_DOWNLOADS = 20  # segundos somando todos os downloads
+TIMEOUT_DOWNLOAD = 10  # segundos por imagem
+LIMITE_IMAGEM_REMOTA = 5 * 1024 * 1024  # bytes por imagem
+
+CAMPOS_CATEGORIA = ('cor', 'icone', 'ordem')
+CAMPOS_PICTOGRAMA = ('audio_texto', 'ordem', 'ativo')
+
+
+def _extensao(caminho):
+    return caminho.rsplit('.', 1)[1].lower() if '.' in caminho else ''
+
+
+def _ler_manifesto(pacote):
+    """Lê e valida o manifesto inteiro antes de qualquer gravação (ValueError se inválido)"""
+    try:
+        manifesto = json.loads(pacote.read(MANIFESTO))
+    except KeyError:
+        raise ValueError(f'Arquivo sem {MANIFESTO}')
+    except json.JSONDecodeError as e:
+        raise ValueError(f'{MANIFESTO} inválido: {e}')
+
+    if not isinstance(manifesto, dict):
+        raise ValueError(f'{MANIFESTO} deve ser um objeto JSON')
+    if manifesto.get('versao') != VERSAO_FORMATO:
+        raise ValueError(f'Versão do manifesto não suportada: {manifesto.get("versao")}')
+
+    categorias = manifesto.get('categorias') or []
+    pictogramas = manifesto.get('pictogramas') or []
+    if not isinstance(categorias, list) or not isinstance(pictogramas, list):
+        raise ValueError('categorias e pictogramas devem ser listas')
+    nomes_categorias = set()
+    for categoria in categorias:
+        if not isinstance(categoria, dict):
+            raise ValueError('Cada categoria deve ser um objeto')
+        if not categoria.get('nome') or not isinstance(categoria['nome'], str):
+            raise ValueError('Categoria sem nome no manifesto')
+        nomes_categorias.add(categoria['nome'])
+
+    existentes = {nome for (nome,) in db.session.query(Categoria.nome)}
+    arquivos = set(pacote.namelist())
+    for i, pictograma in enumerate(pictogramas, 1):
+        if not isinstance(pictograma, dict):
+            raise ValueError(f'Pictograma {i}: deve ser um objeto')
+        if not pictograma.get('nome') or not isinstance(pictograma.get('categoria'), str):
+            raise ValueError(f'Pictograma {i}: nome e categoria são obrigatórios')
+        if pictograma['categoria'] not in nomes_categorias | existentes:
+            raise ValueError(f'Pictograma {i}: categoria "{pictograma["categoria"]}" não encontrada')
+        imagem = pictograma.get('imagem')
+        if imagem:
+            if not isinstance(imagem, str) or imagem not in arquivos:
+                raise ValueError(f'Pictograma {i}: imagem "{imagem}" não está no arquivo')
+            if _extensao(imagem) not in EXTENSOES_IMAGEM:
+                raise ValueError(f'Pictograma {i}: formato de imagem não permitido')
+
+    return categorias, pictogramas
+
+
+def _importar_categorias(categorias, relatorio):
+    """Poucas linhas: usa o ORM e retorna o mapa nome -> id (incluindo as já existentes)"""
+    existentes = {c.nome: c for c in Categoria.query}
+
+    for dados in categorias:
+        categoria = existentes.get(dados['nome'])
+        if categoria is None:
+            categoria = Categoria(nome=dados['nome'], **{c: dados[c] for c in CAMPOS_CATEGORIA if c in dados})
+            db.session.add(categoria)
+            existentes[categoria.nome] = categoria
+            relatorio['categorias_criadas'] += 1
+            continue
+
+        alterados = {c: dados[c] for c in CAMPOS_CATEGORIA if c in dados and getattr(categoria, c) != dados[c]}
+        if alterados:
+            for campo, valor in alterados.items():
+                setattr(categoria, campo, valor)
+            relatorio['categorias_atualizadas'] += 1
+        else:
+            relatorio['categorias_inalteradas'] += 1
+
+    db.session.flush()
+    return {nome: categoria.id for nome, categoria in existentes.items()}
+
+
+def _pictogramas_existentes(categoria_ids):
+    """Mapa (categoria_id, nome) -> linha atual, em uma única consulta"""
+    linhas = db.session.query(
+        Pictograma.id, Pictograma.categoria_id, Pictograma.nome, Pictograma.imagem_url,
+        Pictograma.audio_texto, Pictograma.ordem, Pictograma.ativo, Pictograma.hash_imagem
+    ).filter(Pictograma.categoria_id.in_(categoria_ids)).order_by(Pictograma.id)
+
+    existentes = {}
+    for linha in linhas:
+        existentes.setdefault((linha.categoria_id, linha.nome), linha)
+    return existentes
+
+
+def _enviar_imagens(pacote, pictogramas, id_existente, existentes, uploader, config,
+                    tamanho_lote, relatorio, ao_progredir):
+    """
+    Envia as imagens novas (hash SHA-256 diferente do hash_imagem gravado), em
+    paralelo e um lote por vez para limitar a memória. Devolve o hash de cada
+    pictograma (None sem imagem) e o mapa hash -> URL.
+    """
+    hashes, url_por_hash = [], {}
+
+    with ThreadPoolExecutor(max_workers=config.get('UPLOAD_MAX_CONCORRENCIA', 2)) as executor:
+        for posicao in range(0, len(pictogramas), tamanho_lote):
+            envios = {}
+            for dados in pictogramas[posicao:posicao + tamanho_lote]:
+                imagem = dados.get('imagem')
+                if not imagem:
+                    hashes.append(None)
+                    continue
+                conteudo = pacote.read(imagem)
+                hash_imagem = hashlib.sha256(conteudo).hexdigest()
+                hashes.append(hash_imagem)
+
+                atual = existentes.get((id_existente.get(dados['categoria']), dados['nome']))
+                if atual is not None and atual.hash_imagem == hash_imagem:
+                    url_por_hash.setdefault(hash_imagem, atual.imagem_url)
+                if hash_imagem not in url_por_hash and hash_imagem not in envios:
+                    envios[hash_imagem] = (imagem, executor.submit(uploader.enviar, conteudo, _extensao(imagem)))
+
+            try:
+                for hash_imagem, (imagem, futuro) in envios.items():
+                    url_por_hash[hash_imagem] = futuro.result()
+            except Exception as e:
+                executor.shutdown(cancel_futures=True)
+                raise RuntimeError(f'Falha ao enviar a imagem "{imagem}": {e}') from e
+            relatorio['imagens_enviadas'] += len(envios)
+
+            if ao_progredir:
+                ao_progredir('imagens', min(posicao + tamanho_lote, len(pictogramas)), len(pictogramas))
+
+    relatorio['imagens_reaproveitadas'] = sum(1 for h in hashes if h) - relatorio['imagens_enviadas']
+    return hashes, url_por_hash
+
+
+def _gravar_pictogramas(pictogramas, hashes, url_por_hash, id_categoria, existentes,
+                        tamanho_lote, relatorio, ao_progredir):
+    """Separa inserções, atualizações e entradas iguais ao banco; grava cada lote em dois comandos"""
+    processados = set()  # (categoria_id, nome) já vistos neste manifesto
+
+    for posicao in range(0, len(pictogramas), tamanho_lote):
+        inserir, atualizar = [], []
+        for dados, hash_imagem in zip(pictogramas[posicao:posicao + tamanho_lote],
+                                      hashes[posicao:posicao + tamanho_lote]):
+            chave = (id_categoria[dados['categoria']], dados['nome'])
+            if chave in processados:
+                relatorio['pictogramas_repetidos'] += 1
+                continue
+            processados.add(chave)
+            atual = existentes.get(chave)
+
+            novo = {'nome': dados['nome'], 'categoria_id': chave[0]}
+            novo.update({c: dados[c] for c in CAMPOS_PICTOGRAMA if c in dados})
+            if hash_imagem:
+                mesma_imagem = atual is not None and atual.hash_imagem == hash_imagem
+                novo['imagem_url'] = atual.imagem_url if mesma_imagem else url_por_hash[hash_imagem]
+                novo['hash_imagem'] = hash_imagem
+            elif dados.get('imagem_url'):
+                novo['imagem_url'] = dados['imagem_url']
+                if atual is None or atual.imagem_url != dados['imagem_url']:
+                    novo['hash_imagem'] = None
+
+            if atual is None:
+                novo.setdefault('imagem_url', IMAGEM_PADRAO)
+                novo.setdefault('audio_texto', dados['nome'])
+                novo.setdefault('ativo', True)
+                inserir.append(novo)
+            elif any(getattr(atual, campo) != valor for campo, valor in novo.items()):
+                novo['id'] = atual.id
+                atualizar.append(novo)
+            else:
+                relatorio['pictogramas_inalterados'] += 1
+
+        db.session.bulk_insert_mappings(Pictograma, inserir)
+        db.session.bulk_update_mappings(Pictograma, atualizar)
+        relatorio['pictogramas_criados'] += len(inserir)
+        relatorio['pictogramas_atualizados'] += len(atualizar)
+
+        if ao_progredir:
+            ao_progredir('pictogramas', min(posicao + tamanho_lote, len(pictogramas)), len(pictogramas))
+
+
+def verificar_biblioteca(arquivo):
+    """Confere o .zip e o manifesto sem gravar nada (ValueError ou BadZipFile se inválido)"""
+    with zipfile.ZipFile(arquivo) as pacote:
+        _, pictogramas = _ler_manifesto(pacote)
+    return len(pictogramas)
+
+
+def importar_biblioteca(arquivo, config, tamanho_lote=TAMANHO_LOTE, ao_progredir=None):
+    """
+    Importa o .zip (caminho ou arquivo aberto) e retorna o relatório com contagens e vazão.
+
+    Primeiro envia as imagens, pelo mesmo uploader do /api/upload, em paralelo e
+    só quando o conteúdo mudou (hash SHA-256 guardado em hash_imagem). Depois
+    grava categorias e pictogramas em uma única transação, um INSERT e um
+    UPDATE em lote a cada `tamanho_lote`: se algo falhar, nada é gravado.
+    ao_progredir(etapa, feitos, total) é chamado a cada lote.
+    """
+    inicio = time.perf_counter()
+    relatorio = dict.fromkeys((
+        'categorias_criadas', 'categorias_atualizadas', 'categorias_inalteradas',
+        'pictogramas_criados', 'pictogramas_atualizados', 'pictogramas_inalterados',
+        'pictogramas_repetidos', 'imagens_enviadas', 'imagens_reaproveitadas'
+    ), 0)
+
+    with zipfile.ZipFile(arquivo) as pacote:
+        categorias, pictogramas = _ler_manifesto(pacote)
+        id_existente = {nome: cid for cid, nome in db.session.query(Categoria.id, Categoria.nome)}
+        existentes = _pictogramas_existentes(list(id_existente.values()))
+
+        hashes, url_por_hash = _enviar_imagens(
+            pacote, pictogramas, id_existente, existentes, criar_uploader(config), config,
+            tamanho_lote, relatorio, ao_progredir
+        )
+
+    try:
+        id_categoria = _importar_categorias(categorias, relatorio)
+        _gravar_pictogramas(
+            pictogramas, hashes, url_por_hash, id_categoria, existentes,
+            tamanho_lote, relatorio, ao_progredir
+        )
+        cache_quadro.invalidar()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    segundos = time.perf_counter() - inicio
+    relatorio['pictogramas_processados'] = len(pictogramas)
+    relatorio['segundos'] = round(segundos, 3)
+    relatorio['pictogramas_por_segundo'] = round(len(pictogramas) / segundos, 1) if segundos else None
+    return relatorio
+
+
+def importar_em_tarefa(conteudo, config):
+    """Corpo da tarefa de /api/biblioteca/importar: campos gravados na TarefaUpload"""
+    try:
+        relatorio = importar_biblioteca(io.BytesIO(conteudo), config)
+    except Exception as e:
+        raise RuntimeError(f'{e} (nenhuma alteração foi gravada)') from e
+    return {'resultado': json.dumps(relatorio, ensure_ascii=False)}
+
+
+def _baixar(url, timeout):
+    """Baixa uma imagem remota; None se passar de LIMITE_IMAGEM_REMOTA bytes"""
+    with urlopen(url, timeout=timeout) as resposta:
+        conteudo = resposta.read(LIMITE_IMAGEM_REMOTA + 1)
+    return conteudo if len(conteudo) <= LIMITE_IMAGEM_REMOTA else None
+
+
+def exportar_biblioteca(destino, baixar_remotas=False, incluir_inativos=False,
+                        tempo_max_downloads=TEMPO_MAX_DOWNLOADS):
+    """
+    Grava o .zip da biblioteca em destino (caminho ou arquivo aberto).
+    Imagens locais vão dentro do arquivo; as remotas ficam como imagem_url,
+    a menos que baixar_remotas seja True. Os downloads param após
+    tempo_max_downloads segundos no total (None = sem limite); o que faltar
+    fica como imagem_url.
+    """
+    inicio = time.perf_counter()
+    prazo_downloads = inicio + tempo_max_downloads if tempo_max_downloads else float('inf')
+    relatorio = {'categorias': 0, 'pictogramas': 0, 'imagens_incluidas': 0, 'imagens_remotas': 0}
+
+    categorias = Categoria.query.order_by(Categoria.ordem, Categoria.id).all()
+    nome_categoria = {c.id: c.nome for c in categorias}
+
+    query = Pictograma.query.order_by(Pictograma.categoria_id, Pictograma.ordem, Pictograma.id)
+    if not incluir_inativos:
+        query = query.filter(Pictograma.ativo == True)
+
+    manifesto = {
+        'versao': VERSAO_FORMATO,
+        'categorias': [
+            {'nome': c.nome, 'cor': c.cor, 'icone': c.icone, 'ordem': c.ordem}
+            for c in categorias
+        ],
+        'pictogramas': []
+    }
+    relatorio['categorias'] = len(categorias)
+
+    with zipfile.ZipFile(destino, 'w') as pacote:
+        incluidas = {}  # url -> caminho dentro do zip (imagens compartilhadas entram uma vez)
+        gravadas = set()
+
+        for pictograma in query.yield_per(1000):
+            dados = {
+                'nome': pictograma.nome,
+                'categoria': nome_categoria[pictograma.categoria_id],
+                'audio_texto': pictograma.audio_texto,
+                'ordem': pictograma.ordem,
+                'ativo': pictograma.ativo
+            }
+            url = pictograma.imagem_url or ''
+
+            if url not in incluidas:
+                conteudo = None
+                if url.startswith('/static/images/'):
+                    caminho = os.path.join(PASTA_IMAGENS, os.path.basename(url))
+                    if os.path.exists(caminho):
+                        with open(caminho, 'rb') as f:
+                            conteudo = f.read()
+                elif baixar_remotas and url.startswith(('http://', 'https://')):
+                    restante = prazo_downloads - time.perf_counter()
+                    if restante > 0:
+                        try:
+                            conteudo = _baixar(url, min(TIMEOUT_DOWNLOAD, restante))
+                        except OSError:
+                            conteudo = None
+
+                if conteudo is None:
+                    incluidas[url] = None
+                else:
+                    extensao = _extensao(urlparse(url).path) or 'png'
+                    nome = f'imagens/{hashlib.sha256(conteudo).hexdigest()[:16]}.{extensao}'
+                    if nome not in gravadas:
+                        gravadas.add(nome)
+                        # Imagens já são comprimidas: guardar sem deflate é mais rápido
+                        pacote.writestr(nome, conteudo, compress_type=zipfile.ZIP_STORED)
+                        relatorio['imagens_incluidas'] += 1
+                    incluidas[url] = nome
+
+            if incluidas[url]:
+                dados['imagem'] = incluidas[url]
+            elif url:
+                dados['imagem_url'] = url
+                relatorio['imagens_remotas'] += 1
+
+            manifesto['pictogramas'].append(dados)
+
+        pacote.writestr(
+            MANIFESTO,
+            json.dumps(manifesto, ensure_ascii=False, indent=2),
+            compress_type=zipfile.ZIP_DEFLATED
+        )
+
+    relatorio['pictogramas'] = len(manifesto['pictogramas'])
+    relatorio['segundos'] = round(time.perf_counter() - inicio, 3)
+    return relatorio
@@ -0,0 +1,150 @@
+"""
+busca.py
+Busca de pictogramas tolerante a acentos e erros de digitação (índice de trigramas)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import re
+import threading
+import unicodedata
+from collections import Counter
+from app import db
+from app.cache import cache_quadro
+from app.models import Categoria, Pictograma
+
+PONTUACAO_MINIMA = 0.3
+PESO_AUDIO = 0.8  # Coincidências no texto falado valem um pouco menos que no nome
+
+_NAO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+
+def normalizar(texto):
+    """'Ação!' -> 'acao': remove acentos, pontuação e maiúsculas"""
+    if not texto:
+        return ''
+    sem_acento = ''.join(
+        c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c)
+    )
+    return _NAO_ALFANUMERICO.sub(' ', sem_acento.lower()).strip()
+
+
+def trigramas(texto_normalizado):
+    """Trigramas de cada palavra, com bordas (como o pg_trgm)"""
+    resultado = set()
+    for palavra in texto_normalizado.split():
+        com_bordas = f'  {palavra} '
+        resultado.update(com_bordas[i:i + 3] for i in range(len(com_bordas) - 2))
+    return resultado
+
+
+class IndiceBusca:
+    """
+    Índice invertido trigrama -> (pictograma_id, campo) dos pictogramas ativos.
+
+    Cada worker mantém o seu índice e o sincroniza pela mesma versão do
+    cache do quadro (incrementada a cada alteração de categoria ou pictograma).
+    Na sincronização só são reindexados os pictogramas cujo conteúdo mudou.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versao = None
+        self._invertido = {}     # trigrama -> set((id, campo))
+        self._tamanhos = {}      # (id, campo) -> quantidade de trigramas
+        self._documentos = {}    # id -> linha do banco (dados exibidos no resultado)
+        self._normalizados = {}  # id -> nome normalizado
+
+    def _remover(self, pictograma_id):
+        for campo in ('nome', 'audio'):
+            chave = (pictograma_id, campo)
+            if self._tamanhos.pop(chave, None) is None:
+                continue
+            texto = self._documentos[pictograma_id][1 if campo == 'nome' else 2]
+            for trigrama in trigramas(normalizar(texto)):
+                chaves = self._invertido.get(trigrama)
+                if chaves:
+                    chaves.discard(chave)
+                    if not chaves:
+                        del self._invertido[trigrama]
+        self._documentos.pop(pictograma_id, None)
+        self._normalizados.pop(pictograma_id, None)
+
+    def _indexar(self, linha):
+        pictograma_id, nome, audio_texto = linha[0], linha[1], linha[2]
+        self._documentos[pictograma_id] = linha
+        self._normalizados[pictograma_id] = normalizar(nome)
+
+        for campo, texto in (('nome', nome), ('audio', audio_texto)):
+            tri = trigramas(normalizar(texto))
+            if not tri:
+                continue
+            chave = (pictograma_id, campo)
+            self._tamanhos[chave] = len(tri)
+            for trigrama in tri:
+                self._invertido.setdefault(trigrama, set()).add(chave)
+
+    def sincronizar(self):
+        """Atualiza o índice se a versão do quadro mudou; retorna quantos pictogramas mudaram"""
+        versao = cache_quadro.versao_atual()
+        if versao == self._versao:
+            return 0
+
+        linhas = db.session.query(
+            Pictograma.id, Pictograma.nome, Pictograma.audio_texto, Pictograma.imagem_url,
+            Pictograma.categoria_id, Categoria.nome, Categoria.cor
+        ).join(Categoria, Categoria.id == Pictograma.categoria_id).filter(
+            Pictograma.ativo == True
+        ).all()
+        atuais = {linha[0]: tuple(linha) for linha in linhas}
+
+        alterados = 0
+        with self._lock:
+            for pictograma_id in list(self._documentos):
+                if pictograma_id not in atuais:
+                    self._remover(pictograma_id)
+                    alterados += 1
+            for pictograma_id, linha in atuais.items():
+                if self._documentos.get(pictograma_id) != linha:
+                    if pictograma_id in self._documentos:
+                        self._remover(pictograma_id)
+                    self._indexar(linha)
+                    alterados += 1
+            self._versao = versao
+        return alterados
+
+    def buscar(self, consulta, limite=20):
+        """Pictogramas ordenados por similaridade (coeficiente de Dice dos trigramas)"""
+        self.sincronizar()
+
+        termo = normalizar(consulta)
+        tri_consulta = trigramas(termo)
+        if not tri_consulta:
+            return []
+
+        with self._lock:
+            comuns = Counter()
+            for trigrama in tri_consulta:
+                comuns.update(self._invertido.get(trigrama, ()))
+
+            pontuacoes = {}
+            for (pictograma_id, campo), qtd in comuns.items():
+                pontuacao = 2.0 * qtd / (len(tri_consulta) + self._tamanhos[(pictograma_id, campo)])
+                if campo == 'audio':
+                    pontuacao *= PESO_AUDIO
+                pontuacoes[pictograma_id] = max(pontuacoes.get(pictograma_id, 0.0), pontuacao)
+
+            resultados = []
+            for pictograma_id, pontuacao in pontuacoes.items():
+                nome = self._normalizados[pictograma_id]
+                if nome.startswith(termo):
+                    pontuacao += 0.5
+                elif termo in nome:
+                    pontuacao += 0.25
+                if pontuacao >= PONTUACAO_MINIMA:
+                    resultados.append((pontuacao, self._documentos[pictograma_id]))
+
+        resultados.sort(key=lambda item: (-item[0], item[1][1]))
+        return resultados[:limite]
+
+
+indice_busca = IndiceBusca()
@@ -0,0 +1,109 @@
+"""
+cache.py
+Cache em memória com versão compartilhada entre workers
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import threading
+from sqlalchemy import Integer, Text, cast
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.banco import INSERTS_COM_CONFLITO
+from app.models import Configuracao
+
+
+class CacheVersionado:
+    """
+    Cache read-through por processo, invalidado por um contador de versão
+    gravado na tabela Configuracao.
+
+    Cada worker guarda os valores junto com a versão em que foram lidos.
+    A cada acesso, lê apenas a linha do contador (consulta pela chave única)
+    e descarta tudo se outro worker tiver incrementado a versão.
+    """
+
+    def __init__(self, chave_versao):
+        self.chave_versao = chave_versao
+        self._versao = None
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def versao_atual(self):
+        """Lê a versão gravada no banco ('0' se nunca foi invalidado)"""
+        valor = db.session.query(Configuracao.valor).filter_by(
+            chave=self.chave_versao
+        ).scalar()
+        return valor or '0'
+
+    def obter(self, chave, carregar):
+        """Retorna o valor em cache ou chama carregar() e guarda o resultado"""
+        versao = self.versao_atual()
+
+        with self._lock:
+            if versao != self._versao:
+                self._valores = {}
+                self._versao = versao
+            if chave in self._valores:
+                return self._valores[chave]
+
+        valor = carregar()
+
+        with self._lock:
+            if versao == self._versao:
+                self._valores[chave] = valor
+        return valor
+
+    def criar_versao(self, conexao=None):
+        """
+        Cria a linha do contador com '0' se ainda não existir (init_db.py e
+        migrar_db.py; invalidar() também recorre a isto). INSERT ... ON
+        CONFLICT DO NOTHING: dois workers criando ao mesmo tempo não falham.
+        """
+        executor = conexao if conexao is not None else db.session
+        dialeto = (conexao if conexao is not None else db.session.get_bind()).dialect.name
+        tabela = Configuracao.__table__
+        valores = {
+            'chave': self.chave_versao,
+            'valor': '0',
+            'descricao': 'Versão do cache (incrementada a cada alteração)'
+        }
+
+        inserir = INSERTS_COM_CONFLITO.get(dialeto)
+        if inserir is not None:
+            executor.execute(inserir(tabela).values(**valores).on_conflict_do_nothing(
+                index_elements=[tabela.c.chave]
+            ))
+            return
+
+        savepoint = executor.begin_nested()
+        try:
+            executor.execute(tabela.insert().values(**valores))
+            savepoint.commit()
+        except IntegrityError:
+            savepoint.rollback()
+
+    def invalidar(self):
+        """
+        Incrementa a versão na transação atual.
+        Deve ser chamado antes do commit da alteração que invalida o cache.
+        """
+        for _ in range(2):
+            atualizados = Configuracao.query.filter_by(chave=self.chave_versao).update(
+                {Configuracao.valor: cast(cast(Configuracao.valor, Integer) + 1, Text)},
+                synchronize_session=False
+            )
+            if atualizados:
+                break
+            self.criar_versao()
+
+        self.limpar()
+
+    def limpar(self):
+        """Descarta os valores deste processo (a versão no banco não muda)"""
+        with self._lock:
+            self._valores = {}
+            self._versao = None
+
+
+# Categorias e pictogramas (listagens e quadro de comunicação)
+cache_quadro = CacheVersionado('versao_quadro')
@@ -0,0 +1,130 @@
+"""
+compressao.py
+Compressão gzip/brotli das respostas (JSON, HTML e arquivos estáticos)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import gzip
+import os
+import threading
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TIPOS_COMPRIMIVEIS = {
+    'application/json', 'application/javascript', 'application/x-ndjson',
+    'text/html', 'text/css', 'text/javascript', 'text/plain', 'text/csv',
+    'image/svg+xml'
+}
+MAX_ESTATICO_BYTES = 2 * 1024 * 1024  # Estáticos maiores seguem sem compressão (e sem cache)
+MAX_ESTATICOS_EM_CACHE = 256
+
+
+def _comprimir(dados, codificacao, nivel_gzip, qualidade_brotli):
+    if codificacao == 'br':
+        return brotli.compress(dados, quality=qualidade_brotli)
+    return gzip.compress(dados, compresslevel=nivel_gzip, mtime=0)
+
+
+def escolher_codificacao(aceitas):
+    """Melhor codificação aceita pelo cliente (br > gzip), respeitando q=0"""
+    if brotli is not None and aceitas['br']:
+        return 'br'
+    if aceitas['gzip']:
+        return 'gzip'
+    return None
+
+
+class CacheEstaticos:
+    """
+    Versões comprimidas dos arquivos de static/, por (caminho, mtime, codificação).
+    São geradas uma vez, no nível máximo, e reaproveitadas até o arquivo mudar.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._itens = {}
+
+    def obter(self, caminho, codificacao):
+        try:
+            estado = os.stat(caminho)
+        except OSError:
+            return None
+        if estado.st_size > MAX_ESTATICO_BYTES:
+            return None
+
+        chave = (caminho, estado.st_mtime_ns, codificacao)
+        with self._lock:
+            if chave in self._itens:
+                return self._itens[chave]
+
+        with open(caminho, 'rb') as f:
+            comprimido = _comprimir(f.read(), codificacao, 9, 11)
+
+        with self._lock:
+            if len(self._itens) >= MAX_ESTATICOS_EM_CACHE:
+                self._itens.clear()
+            self._itens[chave] = comprimido
+        return comprimido
+
+
+cache_estaticos = CacheEstaticos()
+
+
+def _comprimir_resposta(app, resposta):
+    if resposta.status_code != 200 or 'Content-Encoding' in resposta.headers:
+        return resposta
+    if resposta.mimetype not in TIPOS_COMPRIMIVEIS:
+        return resposta
+
+    resposta.vary.add('Accept-Encoding')
+    codificacao = escolher_codificacao(request.accept_encodings)
+    if codificacao is None:
+        return resposta
+
+    minimo = app.config.get('COMPRESSAO_MINIMO_BYTES', 1024)
+
+    if resposta.direct_passthrough and request.endpoint == 'static':
+        # send_file entrega um iterador do arquivo: comprime a partir do disco
+        if (resposta.content_length or 0) < minimo:
+            return resposta
+        caminho = os.path.join(app.static_folder, request.view_args['filename'])
+        dados = cache_estaticos.obter(caminho, codificacao)
+        if dados is None:
+            return resposta
+        resposta.response.close()
+        resposta.direct_passthrough = False
+        resposta.set_data(dados)
+    elif resposta.is_streamed:
+        # Exportações e o stream ao vivo são gerados aos poucos
+        return resposta
+    else:
+        dados = resposta.get_data()
+        if len(dados) < minimo:
+            return resposta
+        resposta.set_data(_comprimir(
+            dados, codificacao,
+            app.config.get('COMPRESSAO_NIVEL_GZIP', 6),
+            app.config.get('COMPRESSAO_QUALIDADE_BROTLI', 4)
+        ))
+
+    resposta.headers['Content-Encoding'] = codificacao
+    # Mesmo conteúdo em outra codificação: ETag fraca mantém o 304 funcionando
+    etag, _ = resposta.get_etag()
+    if etag:
+        resposta.set_etag(etag, weak=True)
+    return resposta
+
+
+def init_compressao(app):
+    """Registra a compressão como último passo das respostas (COMPRESSAO_ATIVA)"""
+    if not app.config.get('COMPRESSAO_ATIVA', True):
+        return
+
+    def comprimir(resposta):
+        return _comprimir_resposta(app, resposta)
+
+    app.after_request(comprimir)
@@ -0,0 +1,225 @@
+"""
+estatisticas.py
+Estatísticas de evolução do paciente (agregações feitas no banco)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+from itertools import groupby
+from sqlalchemy import desc, func, distinct, select, union_all
+from app import db
+from app.arquivo import desempacotar
+from app.models import Categoria, Pictograma, Sessao, HistoricoSelecao, ResumoSessao, UsoDiario, ArquivoSessao
+
+PERCENTIS = (0.5, 0.9, 0.95)
+
+
+def _percentil(valores_ordenados, p):
+    """Percentil com interpolação linear (mesmo resultado de percentile_cont)"""
+    if not valores_ordenados:
+        return None
+    posicao = (len(valores_ordenados) - 1) * p
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(valores_ordenados) - 1)
+    fracao = posicao - inferior
+    return valores_ordenados[inferior] + (valores_ordenados[superior] - valores_ordenados[inferior]) * fracao
+
+
+def _formatar_percentis(valores):
+    return {f'p{int(p * 100)}': (round(v, 3) if v is not None else None) for p, v in zip(PERCENTIS, valores)}
+
+
+def _percentis_tempo_resposta(filtros):
+    """
+    Percentis de tempo_resposta_segundos geral e por sessão, incluindo as
+    seleções de sessões arquivadas (retencao.py).
+    PostgreSQL calcula com percentile_cont quando não há sessão arquivada no
+    período; nos demais casos os valores vêm já ordenados pelo banco (apenas a
+    coluna, sem objetos ORM), os arquivados são somados e o percentil é obtido
+    por índice.
+    """
+    tempo = HistoricoSelecao.tempo_resposta_segundos
+    base = db.session.query().select_from(HistoricoSelecao).join(
+        Sessao, Sessao.id == HistoricoSelecao.sessao_id
+    ).filter(*filtros, tempo.isnot(None))
+
+    arquivadas = db.session.query(
+        ArquivoSessao.sessao_id, ArquivoSessao.inicio, ArquivoSessao.dados
+    ).join(Sessao, Sessao.id == ArquivoSessao.sessao_id).filter(*filtros).all()
+
+    if db.session.get_bind().dialect.name == 'postgresql' and not arquivadas:
+        colunas = [func.percentile_cont(p).within_group(tempo) for p in PERCENTIS]
+        geral = base.add_columns(*colunas).one()
+        por_sessao = {
+            linha[0]: _formatar_percentis(linha[1:])
+            for linha in base.add_columns(HistoricoSelecao.sessao_id, *colunas).group_by(
+                HistoricoSelecao.sessao_id
+            )
+        }
+        return _formatar_percentis(geral), por_sessao
+
+    linhas = base.add_columns(HistoricoSelecao.sessao_id, tempo).order_by(
+        HistoricoSelecao.sessao_id, tempo
+    ).all()
+
+    valores = {
+        sessao_id: [linha[1] for linha in grupo]
+        for sessao_id, grupo in groupby(linhas, key=lambda linha: linha[0])
+    }
+    for sessao_id, inicio, dados in arquivadas:
+        # Seleções que chegaram depois do arquivamento continuam no histórico
+        lista = valores.setdefault(sessao_id, [])
+        lista.extend(t for _, _, _, t in desempacotar(inicio, dados) if t is not None)
+        lista.sort()
+
+    por_sessao = {
+        sessao_id: _formatar_percentis([_percentil(lista, p) for p in PERCENTIS])
+        for sessao_id, lista in valores.items() if lista
+    }
+    todos = sorted(t for lista in valores.values() for t in lista)
+    geral = _formatar_percentis([_percentil(todos, p) for p in PERCENTIS])
+    return geral, por_sessao
+
+
+def _uso_por_pictograma(paciente_id, inicio, fim, filtros):
+    """
+    Subconsulta (pictograma_id, total): uso_diario para as sessões com resumo
+    e contagem direta das demais (abertas ou finalizadas antes dos resumos),
+    a mesma divisão de _totais_sessoes
+    """
+    resumo = select(
+        UsoDiario.pictograma_id.label('pictograma_id'), UsoDiario.total.label('total')
+    ).where(UsoDiario.paciente_id == paciente_id)
+    if inicio:
+        resumo = resumo.where(UsoDiario.dia >= inicio.date())
+    if fim:
+        resumo = resumo.where(UsoDiario.dia < fim.date())
+
+    sem_resumo = select(
+        HistoricoSelecao.pictograma_id, func.count(HistoricoSelecao.id)
+    ).join(
+        Sessao, Sessao.id == HistoricoSelecao.sessao_id
+    ).outerjoin(
+        ResumoSessao, ResumoSessao.sessao_id == Sessao.id
+    ).where(*filtros, ResumoSessao.sessao_id.is_(None)).group_by(HistoricoSelecao.pictograma_id)
+
+    return union_all(resumo, sem_resumo).subquery()
+
+
+def _totais_sessoes(filtros):
+    """
+    Sessões do período com (total, distintos, soma e qtd de tempos) vindos de
+    resumo_sessao; as sessões sem resumo (abertas ou finalizadas antes dos
+    resumos) são contadas no histórico
+    """
+    sessoes = db.session.query(
+        Sessao.id, Sessao.data_inicio, Sessao.duracao_minutos,
+        ResumoSessao.total_selecoes, ResumoSessao.pictogramas_distintos,
+        ResumoSessao.soma_tempo_resposta, ResumoSessao.qtd_tempo_resposta
+    ).outerjoin(
+        ResumoSessao, ResumoSessao.sessao_id == Sessao.id
+    ).filter(*filtros).order_by(Sessao.data_inicio).all()
+
+    sem_resumo = [s.id for s in sessoes if s.total_selecoes is None]
+    contagens = {}
+    if sem_resumo:
+        tempo = HistoricoSelecao.tempo_resposta_segundos
+        contagens = {linha[0]: linha[1:] for linha in db.session.query(
+            HistoricoSelecao.sessao_id, func.count(HistoricoSelecao.id),
+            func.count(distinct(HistoricoSelecao.pictograma_id)),
+            func.coalesce(func.sum(tempo), 0.0), func.count(tempo)
+        ).filter(HistoricoSelecao.sessao_id.in_(sem_resumo)).group_by(HistoricoSelecao.sessao_id)}
+
+    resultado = []
+    for s in sessoes:
+        if s.total_selecoes is None:
+            totais = contagens.get(s.id, (0, 0, 0.0, 0))
+        else:
+            totais = (s.total_selecoes, s.pictogramas_distintos, s.soma_tempo_resposta, s.qtd_tempo_resposta)
+        resultado.append((s.id, s.data_inicio, s.duracao_minutos) + tuple(totais))
+    return resultado
+
+
+def estatisticas_paciente(paciente_id, inicio=None, fim=None, limite_pictogramas=20):
+    """
+    Frequência de pictogramas, distribuição por categoria e tempos de resposta.
+    Contagens vêm das tabelas de resumo (resumos.py); os percentis precisam
+    dos valores individuais e são calculados sobre o histórico e os arquivos.
+    """
+    filtros = [Sessao.paciente_id == paciente_id]
+    if inicio:
+        filtros.append(Sessao.data_inicio >= inicio)
+    if fim:
+        filtros.append(Sessao.data_inicio < fim)
+
+    uso = _uso_por_pictograma(paciente_id, inicio, fim, filtros)
+    total = func.sum(uso.c.total)
+
+    pictogramas = db.session.query(
+        Pictograma.id, Pictograma.nome, Pictograma.imagem_url, Categoria.nome, total
+    ).select_from(uso).join(
+        Pictograma, Pictograma.id == uso.c.pictograma_id
+    ).join(
+        Categoria, Categoria.id == Pictograma.categoria_id
+    ).group_by(
+        Pictograma.id, Pictograma.nome, Pictograma.imagem_url, Categoria.nome
+    ).order_by(desc(total), Pictograma.nome).limit(limite_pictogramas).all()
+
+    categorias = db.session.query(
+        Categoria.id, Categoria.nome, Categoria.cor, total
+    ).select_from(uso).join(
+        Pictograma, Pictograma.id == uso.c.pictograma_id
+    ).join(
+        Categoria, Categoria.id == Pictograma.categoria_id
+    ).group_by(
+        Categoria.id, Categoria.nome, Categoria.cor
+    ).order_by(desc(total)).all()
+
+    sessoes = _totais_sessoes(filtros)
+
+    # Dia de início da sessão, como no uso_diario
+    por_dia = {}
+    for _, data_inicio, _, qtd, _, soma, qtd_tempo in sessoes:
+        dia = por_dia.setdefault(data_inicio.date(), [0, 0, 0.0, 0])
+        dia[0] += 1
+        dia[1] += qtd
+        dia[2] += soma
+        dia[3] += qtd_tempo
+
+    percentis_geral, percentis_sessao = _percentis_tempo_resposta(filtros)
+    total_selecoes = sum(c[3] for c in categorias)
+
+    return {
+        'paciente_id': paciente_id,
+        'total_sessoes': len(sessoes),
+        'total_selecoes': total_selecoes,
+        'tempo_resposta': percentis_geral,
+        'pictogramas': [{
+            'pictograma_id': pid,
+            'nome': nome,
+            'imagem_url': imagem_url,
+            'categoria_nome': categoria_nome,
+            'total': qtd
+        } for pid, nome, imagem_url, categoria_nome, qtd in pictogramas],
+        'categorias': [{
+            'categoria_id': cid,
+            'nome': nome,
+            'cor': cor,
+            'total': qtd,
+            'percentual': round(100.0 * qtd / total_selecoes, 1) if total_selecoes else 0
+        } for cid, nome, cor, qtd in categorias],
+        'sessoes': [{
+            'sessao_id': sid,
+            'data_inicio': data_inicio.isoformat(),
+            'duracao_minutos': duracao,
+            'total_selecoes': qtd,
+            'pictogramas_distintos': distintos,
+            'tempo_resposta_medio': round(soma / qtd_tempo, 3) if qtd_tempo else None,
+            'tempo_resposta': percentis_sessao.get(sid)
+        } for sid, data_inicio, duracao, qtd, distintos, soma, qtd_tempo in sessoes],
+        'por_dia': [{
+            'dia': str(d),
+            'sessoes': qtd_sessoes,
+            'total_selecoes': qtd,
+            'tempo_resposta_medio': round(soma / qtd_tempo, 3) if qtd_tempo else None
+        } for d, (qtd_sessoes, qtd, soma, qtd_tempo) in sorted(por_dia.items())]
+    }
@@ -0,0 +1,165 @@
+"""
+exportacao.py
+Exportação em streaming do histórico de seleções (CSV / NDJSON)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+As seleções de sessões arquivadas (retencao.py) são lidas de arquivo_sessao
+e intercaladas na mesma ordem, então a exportação não depende do arquivamento.
+"""
+
+import csv
+import heapq
+import io
+import json
+from sqlalchemy import or_
+from app import db
+from app.arquivo import desempacotar
+from app.models import Usuario, Paciente, Categoria, Pictograma, Sessao, HistoricoSelecao, ArquivoSessao
+
+# Linhas buscadas do cursor por vez; a memória usada não depende do total exportado
+LINHAS_POR_LOTE = 1000
+ARQUIVOS_POR_LOTE = 50  # Sessões arquivadas (um blob cada) buscadas por vez
+
+COLUNAS_EXPORTACAO = [
+    'historico_id', 'timestamp', 'tempo_resposta_segundos',
+    'pictograma_id', 'pictograma_nome', 'categoria_id', 'categoria_nome',
+    'sessao_id', 'sessao_data_inicio', 'sessao_finalizada',
+    'paciente_id', 'paciente_nome', 'profissional_id', 'profissional_nome'
+]
+
+
+def _filtrar_sessoes(query, paciente_id, profissional_id):
+    if paciente_id:
+        query = query.filter(Sessao.paciente_id == paciente_id)
+    if profissional_id:
+        query = query.filter(Sessao.profissional_id == profissional_id)
+    return query
+
+
+def _selecoes_ativas(paciente_id, profissional_id, inicio, fim):
+    """Consulta (somente colunas) das seleções com pictograma, categoria, sessão e paciente"""
+    query = db.session.query(
+        HistoricoSelecao.id,
+        HistoricoSelecao.timestamp,
+        HistoricoSelecao.tempo_resposta_segundos,
+        Pictograma.id,
+        Pictograma.nome,
+        Categoria.id,
+        Categoria.nome,
+        Sessao.id,
+        Sessao.data_inicio,
+        Sessao.finalizada,
+        Paciente.id,
+        Paciente.nome,
+        Usuario.id,
+        Usuario.nome
+    ).select_from(HistoricoSelecao).join(
+        Sessao, Sessao.id == HistoricoSelecao.sessao_id
+    ).join(
+        Paciente, Paciente.id == Sessao.paciente_id
+    ).join(
+        Pictograma, Pictograma.id == HistoricoSelecao.pictograma_id
+    ).join(
+        Categoria, Categoria.id == Pictograma.categoria_id
+    ).outerjoin(
+        Usuario, Usuario.id == Sessao.profissional_id
+    )
+
+    query = _filtrar_sessoes(query, paciente_id, profissional_id)
+    if inicio:
+        query = query.filter(HistoricoSelecao.timestamp >= inicio)
+    if fim:
+        query = query.filter(HistoricoSelecao.timestamp < fim)
+
+    # stream_results usa cursor no servidor (PostgreSQL); yield_per lê em lotes
+    return query.order_by(
+        Sessao.data_inicio, Sessao.id, HistoricoSelecao.timestamp, HistoricoSelecao.id
+    ).execution_options(stream_results=True).yield_per(LINHAS_POR_LOTE)
+
+
+def _selecoes_arquivadas(paciente_id, profissional_id, inicio, fim):
+    """Mesmas colunas de _selecoes_ativas, desempacotando uma sessão arquivada por vez"""
+    query = db.session.query(
+        ArquivoSessao.inicio, ArquivoSessao.dados,
+        Sessao.id, Sessao.data_inicio, Sessao.finalizada,
+        Paciente.id, Paciente.nome, Usuario.id, Usuario.nome
+    ).join(
+        Sessao, Sessao.id == ArquivoSessao.sessao_id
+    ).join(
+        Paciente, Paciente.id == Sessao.paciente_id
+    ).outerjoin(
+        Usuario, Usuario.id == Sessao.profissional_id
+    )
+
+    query = _filtrar_sessoes(query, paciente_id, profissional_id)
+    if inicio:
+        query = query.filter(or_(ArquivoSessao.fim.is_(None), ArquivoSessao.fim >= inicio))
+    if fim:
+        query = query.filter(ArquivoSessao.inicio < fim)
+
+    pictogramas = {}  # id -> (nome, categoria_id, categoria_nome)
+    arquivos = query.order_by(Sessao.data_inicio, Sessao.id).execution_options(
+        stream_results=True
+    ).yield_per(ARQUIVOS_POR_LOTE)
+
+    for inicio_blob, dados, *sessao in arquivos:
+        selecoes = sorted(desempacotar(inicio_blob, dados), key=lambda s: (s[2], s[0]))
+
+        faltando = {s[1] for s in selecoes} - pictogramas.keys()
+        if faltando:
+            pictogramas.update((pid, resto) for pid, *resto in db.session.query(
+                Pictograma.id, Pictograma.nome, Categoria.id, Categoria.nome
+            ).join(Categoria, Categoria.id == Pictograma.categoria_id).filter(Pictograma.id.in_(faltando)))
+
+        for historico_id, pictograma_id, timestamp, tempo in selecoes:
+            if (inicio and timestamp < inicio) or (fim and timestamp >= fim) or pictograma_id not in pictogramas:
+                continue
+            nome, categoria_id, categoria_nome = pictogramas[pictograma_id]
+            yield (historico_id, timestamp, tempo, pictograma_id, nome, categoria_id, categoria_nome, *sessao)
+
+
+def _ordem(linha):
+    # (data de início da sessão, sessão, timestamp, id): a ordem das duas fontes
+    return linha[8], linha[7], linha[1], linha[0]
+
+
+def consulta_exportacao(paciente_id=None, profissional_id=None, inicio=None, fim=None):
+    """Linhas da exportação (colunas de COLUNAS_EXPORTACAO), ativas e arquivadas, em ordem"""
+    return heapq.merge(
+        _selecoes_ativas(paciente_id, profissional_id, inicio, fim),
+        _selecoes_arquivadas(paciente_id, profissional_id, inicio, fim),
+        key=_ordem
+    )
+
+
+def _valores(linha):
+    return [v.isoformat() if hasattr(v, 'isoformat') else v for v in linha]
+
+
+def gerar_csv(linhas):
+    """Gera o CSV em pedaços (cabeçalho + um pedaço por lote de linhas)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    escritor.writerow(COLUNAS_EXPORTACAO)
+    for i, linha in enumerate(linhas, 1):
+        escritor.writerow(_valores(linha))
+        if i % LINHAS_POR_LOTE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    yield buffer.getvalue()
+
+
+def gerar_ndjson(linhas):
+    """Gera um objeto JSON por linha"""
+    pedaco = []
+    for linha in linhas:
+        pedaco.append(json.dumps(dict(zip(COLUNAS_EXPORTACAO, _valores(linha))), ensure_ascii=False))
+        if len(pedaco) >= LINHAS_POR_LOTE:
+            yield '\n'.join(pedaco) + '\n'
+            pedaco = []
+
+    if pedaco:
+        yield '\n'.join(pedaco) + '\n'
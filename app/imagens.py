@@ -0,0 +1,109 @@
+"""
+imagens.py
+Processamento local de imagens dos pictogramas (variantes WebP + deduplicação por hash)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import hashlib
+import io
+import os
+import re
+import tempfile
+
+# Variantes geradas localmente (lado máximo em pixels)
+VARIANTES = {
+    'grande': 500,      # Mesmo limite da transformação do Cloudinary
+    'miniatura': 300,   # Card do quadro de comunicação (150px em telas 2x)
+}
+QUALIDADE_WEBP = 80
+
+_PADRAO_LOCAL = re.compile(r'^(?P<base>/static/images/[0-9a-f]{16})_(?P<lado>\d+)\.webp$')
+_TRANSFORMACAO_MINIATURA_CLOUDINARY = 'w_300,h_300,c_limit,q_auto,f_auto'
+
+
+def _nome_variante(hash_conteudo, lado):
+    return f"{hash_conteudo}_{lado}.webp"
+
+
+def _gravar(caminho, escrever):
+    """
+    Grava num temporário exclusivo (mkstemp) e renomeia: outra thread ou
+    worker pode estar gerando o mesmo hash, e ninguém lê um arquivo pela metade
+    """
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            escrever(f)
+        os.chmod(temporario, 0o644)  # mkstemp cria com 0600; as imagens são servidas como estáticos
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+def processar_imagem_local(dados, extensao, pasta):
+    """
+    Grava a imagem em `pasta` e retorna a URL pública da variante grande.
+
+    O nome do arquivo é o hash do conteúdo, então a mesma imagem enviada
+    várias vezes é gravada uma única vez. Com Pillow instalado são geradas
+    as variantes WebP redimensionadas; sem Pillow o original é mantido.
+    """
+    hash_conteudo = hashlib.sha256(dados).hexdigest()[:16]
+    os.makedirs(pasta, exist_ok=True)
+
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        nome_arquivo = f"{hash_conteudo}.{extensao}"
+        caminho = os.path.join(pasta, nome_arquivo)
+        if not os.path.exists(caminho):
+            _gravar(caminho, lambda f: f.write(dados))
+        return f"/static/images/{nome_arquivo}"
+
+    nome_grande = _nome_variante(hash_conteudo, VARIANTES['grande'])
+    if all(os.path.exists(os.path.join(pasta, _nome_variante(hash_conteudo, lado)))
+           for lado in VARIANTES.values()):
+        return f"/static/images/{nome_grande}"
+
+    try:
+        original = Image.open(io.BytesIO(dados))
+        original.load()
+    except (OSError, Image.DecompressionBombError):
+        raise ValueError('Arquivo não é uma imagem válida')
+
+    with original:
+        imagem = ImageOps.exif_transpose(original)
+        imagem = imagem.convert('RGBA' if 'A' in imagem.getbands() or 'transparency' in imagem.info else 'RGB')
+
+        for lado in VARIANTES.values():
+            variante = imagem.copy()
+            variante.thumbnail((lado, lado), Image.LANCZOS)
+
+            _gravar(
+                os.path.join(pasta, _nome_variante(hash_conteudo, lado)),
+                lambda f: variante.save(f, 'WEBP', quality=QUALIDADE_WEBP, method=4)
+            )
+
+    return f"/static/images/{nome_grande}"
+
+
+def url_miniatura(imagem_url):
+    """
+    URL da variante pequena usada no quadro de comunicação.
+    Imagens locais processadas usam a variante de miniatura; no Cloudinary
+    a transformação é aplicada na própria URL; outras URLs são mantidas.
+    """
+    if not imagem_url:
+        return imagem_url
+
+    local = _PADRAO_LOCAL.match(imagem_url)
+    if local:
+        return f"{local.group('base')}_{VARIANTES['miniatura']}.webp"
+
+    if 'res.cloudinary.com' in imagem_url and '/image/upload/' in imagem_url:
+        return imagem_url.replace(
+            '/image/upload/', f'/image/upload/{_TRANSFORMACAO_MINIATURA_CLOUDINARY}/', 1
+        )
+
+    return imagem_url
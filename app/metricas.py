@@ -0,0 +1,150 @@
+"""
+metricas.py
+Instrumentação das requisições: Server-Timing, contagem de SQL e histogramas por endpoint
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import threading
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Limites dos buckets de latência (segundos), no padrão do Prometheus
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RegistroMetricas:
+    """
+    Acumula as métricas do processo. Cada worker do gunicorn mantém o seu
+    registro; /api/metrics expõe o do worker que atendeu a requisição.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencia = {}      # (endpoint, método) -> [contagem por bucket..., soma, total]
+        self.requisicoes = {}   # (endpoint, método, status) -> total
+        self.consultas = {}     # endpoint -> [total de consultas, segundos no banco]
+
+    def registrar(self, endpoint, metodo, status, duracao, consultas, tempo_db):
+        with self._lock:
+            serie = self.latencia.setdefault((endpoint, metodo), [0] * (len(BUCKETS_LATENCIA) + 2))
+            for i, limite in enumerate(BUCKETS_LATENCIA):
+                if duracao <= limite:
+                    serie[i] += 1
+            serie[-2] += duracao
+            serie[-1] += 1
+
+            chave = (endpoint, metodo, status)
+            self.requisicoes[chave] = self.requisicoes.get(chave, 0) + 1
+
+            acumulado = self.consultas.setdefault(endpoint, [0, 0.0])
+            acumulado[0] += consultas
+            acumulado[1] += tempo_db
+
+    def formato_prometheus(self):
+        """Exporta no formato texto do Prometheus (versão 0.0.4)"""
+        linhas = [
+            '# HELP caa_http_request_duration_seconds Latência das requisições por endpoint',
+            '# TYPE caa_http_request_duration_seconds histogram'
+        ]
+        with self._lock:
+            for (endpoint, metodo), serie in sorted(self.latencia.items()):
+                rotulos = f'endpoint="{endpoint}",method="{metodo}"'
+                for limite, contagem in zip(BUCKETS_LATENCIA, serie):
+                    linhas.append(f'caa_http_request_duration_seconds_bucket{{{rotulos},le="{limite}"}} {contagem}')
+                linhas.append(f'caa_http_request_duration_seconds_bucket{{{rotulos},le="+Inf"}} {serie[-1]}')
+                linhas.append(f'caa_http_request_duration_seconds_sum{{{rotulos}}} {serie[-2]:.6f}')
+                linhas.append(f'caa_http_request_duration_seconds_count{{{rotulos}}} {serie[-1]}')
+
+            linhas += [
+                '# HELP caa_http_requests_total Requisições atendidas por endpoint e status',
+                '# TYPE caa_http_requests_total counter'
+            ]
+            for (endpoint, metodo, status), total in sorted(self.requisicoes.items()):
+                linhas.append(
+                    f'caa_http_requests_total{{endpoint="{endpoint}",method="{metodo}",status="{status}"}} {total}'
+                )
+
+            linhas += [
+                '# HELP caa_db_queries_total Comandos SQL executados por endpoint',
+                '# TYPE caa_db_queries_total counter'
+            ]
+            for endpoint, (consultas, _) in sorted(self.consultas.items()):
+                linhas.append(f'caa_db_queries_total{{endpoint="{endpoint}"}} {consultas}')
+
+            linhas += [
+                '# HELP caa_db_duration_seconds_total Tempo gasto no banco por endpoint',
+                '# TYPE caa_db_duration_seconds_total counter'
+            ]
+            for endpoint, (_, tempo_db) in sorted(self.consultas.items()):
+                linhas.append(f'caa_db_duration_seconds_total{{endpoint="{endpoint}"}} {tempo_db:.6f}')
+
+        return '\n'.join(linhas) + '\n'
+
+
+registro_metricas = RegistroMetricas()
+
+
+def _antes_do_sql(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('inicio_sql', []).append(time.perf_counter())
+
+
+def _fim_do_sql(conn):
+    # Sempre desempilha (mesmo fora de requisição): a pilha da conexão não pode crescer
+    inicios = conn.info.get('inicio_sql')
+    if not inicios:
+        return
+    duracao = time.perf_counter() - inicios.pop()
+    if has_request_context() and 'metricas_inicio' in g:
+        g.metricas_consultas += 1
+        g.metricas_tempo_db += duracao
+
+
+def _depois_do_sql(conn, cursor, statement, parameters, context, executemany):
+    _fim_do_sql(conn)
+
+
+def _erro_no_sql(contexto):
+    # Consulta que falhou não chega ao after_cursor_execute
+    if contexto.connection is not None:
+        _fim_do_sql(contexto.connection)
+
+
+def _iniciar_requisicao():
+    g.metricas_inicio = time.perf_counter()
+    g.metricas_consultas = 0
+    g.metricas_tempo_db = 0.0
+
+
+def _finalizar_requisicao(resposta):
+    if 'metricas_inicio' not in g:
+        return resposta
+
+    duracao = time.perf_counter() - g.metricas_inicio
+    registro_metricas.registrar(
+        request.endpoint or 'desconhecido',
+        request.method,
+        resposta.status_code,
+        duracao,
+        g.metricas_consultas,
+        g.metricas_tempo_db
+    )
+
+    resposta.headers.add(
+        'Server-Timing',
+        f'app;dur={duracao * 1000:.1f}, '
+        f'db;dur={g.metricas_tempo_db * 1000:.1f};desc="{g.metricas_consultas} consultas"'
+    )
+    return resposta
+
+
+def init_metricas(app):
+    """Registra os hooks de requisição e os eventos de SQL do SQLAlchemy"""
+    if not event.contains(Engine, 'before_cursor_execute', _antes_do_sql):
+        event.listen(Engine, 'before_cursor_execute', _antes_do_sql)
+        event.listen(Engine, 'after_cursor_execute', _depois_do_sql)
+        event.listen(Engine, 'handle_error', _erro_no_sql)
+
+    app.before_request(_iniciar_requisicao)
+    app.after_request(_finalizar_requisicao)
@@ -33,8 +33,13 @@ class Paciente(db.Model):
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
     ativo = db.Column(db.Boolean, default=True)
     data_cadastro = db.Column(db.DateTime, default=datetime.utcnow)
+    ordem_personalizada = db.Column(db.Boolean, default=False)  # Quadro ordenado pelo uso do paciente
     
     sessoes = db.relationship('Sessao', backref='paciente', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('ix_paciente_usuario_ativo', 'usuario_id', 'ativo'),
+    )
 
 class Categoria(db.Model):
     __tablename__ = 'categoria'
@@ -57,8 +62,13 @@ class Pictograma(db.Model):
     categoria_id = db.Column(db.Integer, db.ForeignKey('categoria.id'), nullable=False)
     ordem = db.Column(db.Integer)
     ativo = db.Column(db.Boolean, default=True)
+    hash_imagem = db.Column(db.String(64))  # SHA-256 da imagem importada (pula reenvio se igual)
     
     historico = db.relationship('HistoricoSelecao', backref='pictograma', lazy=True)
+    
+    __table_args__ = (
+        db.Index('ix_pictograma_categoria_ativo_ordem', 'categoria_id', 'ativo', 'ordem'),
+    )
 
 class Sessao(db.Model):
     """
@@ -78,6 +88,15 @@ class Sessao(db.Model):
     finalizada = db.Column(db.Boolean, default=False)
     
     historico = db.relationship('HistoricoSelecao', backref='sessao', lazy=True, cascade='all, delete-orphan')
+    arquivo = db.relationship('ArquivoSessao', backref='sessao', uselist=False, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('ix_sessao_paciente_finalizada', 'paciente_id', 'finalizada'),
+        db.Index('ix_sessao_data_inicio_id', 'data_inicio', 'id'),  # Paginação do histórico
+        # No máximo uma sessão aberta por paciente (alvo do INSERT ... ON CONFLICT ao abrir)
+        db.Index('ix_sessao_paciente_aberta', 'paciente_id', unique=True,
+                 sqlite_where=finalizada == False, postgresql_where=finalizada == False),
+    )
 
 class HistoricoSelecao(db.Model):
     __tablename__ = 'historico_selecao'
@@ -87,6 +106,63 @@ class HistoricoSelecao(db.Model):
     pictograma_id = db.Column(db.Integer, db.ForeignKey('pictograma.id'), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.now)
     tempo_resposta_segundos = db.Column(db.Float)
+    evento_id = db.Column(db.String(64), unique=True, index=True)  # ID gerado no tablet (deduplica reenvios)
+    
+    __table_args__ = (
+        db.Index('ix_historico_sessao_timestamp', 'sessao_id', 'timestamp'),
+    )
+
+class OrdemPaciente(db.Model):
+    """
+    Ranking de pictogramas pré-calculado por paciente (uso recente ponderado)
+    Recalculado ao finalizar sessão; só existe para pacientes com ordem_personalizada
+    """
+    __tablename__ = 'ordem_paciente'
+    
+    paciente_id = db.Column(db.Integer, db.ForeignKey('paciente.id'), primary_key=True)
+    ranking = db.Column(db.Text)  # JSON: ids de pictogramas do mais para o menos usado
+    data_atualizacao = db.Column(db.DateTime, default=datetime.now)
+
+class ResumoSessao(db.Model):
+    """
+    Totais de uma sessão finalizada (consolidados ao finalizar, ver resumos.py)
+    Evita contar historico_selecao nas listagens
+    """
+    __tablename__ = 'resumo_sessao'
+
+    sessao_id = db.Column(db.Integer, db.ForeignKey('sessao.id'), primary_key=True)
+    total_selecoes = db.Column(db.Integer, nullable=False, default=0)
+    pictogramas_distintos = db.Column(db.Integer, nullable=False, default=0)
+    soma_tempo_resposta = db.Column(db.Float, nullable=False, default=0.0)
+    qtd_tempo_resposta = db.Column(db.Integer, nullable=False, default=0)  # Seleções com tempo informado
+
+class UsoDiario(db.Model):
+    """
+    Seleções por paciente, pictograma e dia (dia de início da sessão)
+    Só inclui sessões finalizadas; recalculado por dia ao finalizar cada sessão
+    """
+    __tablename__ = 'uso_diario'
+
+    paciente_id = db.Column(db.Integer, db.ForeignKey('paciente.id'), primary_key=True)
+    dia = db.Column(db.Date, primary_key=True)
+    pictograma_id = db.Column(db.Integer, db.ForeignKey('pictograma.id'), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    soma_tempo_resposta = db.Column(db.Float, nullable=False, default=0.0)
+    qtd_tempo_resposta = db.Column(db.Integer, nullable=False, default=0)
+
+class ArquivoSessao(db.Model):
+    """
+    Seleções de uma sessão antiga compactadas em um único blob (ver arquivo.py)
+    As linhas correspondentes saem de historico_selecao
+    """
+    __tablename__ = 'arquivo_sessao'
+
+    sessao_id = db.Column(db.Integer, db.ForeignKey('sessao.id'), primary_key=True)
+    quantidade = db.Column(db.Integer, nullable=False)
+    inicio = db.Column(db.DateTime)  # Timestamp da primeira seleção (base dos deltas)
+    fim = db.Column(db.DateTime)  # Timestamp da última seleção (nulo em arquivos antigos)
+    dados = db.Column(db.LargeBinary, nullable=False)
+    data_arquivamento = db.Column(db.DateTime, default=datetime.now)
 
 class Configuracao(db.Model):
     __tablename__ = 'configuracao'
@@ -94,4 +170,20 @@ class Configuracao(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     chave = db.Column(db.String(100), unique=True, nullable=False)
     valor = db.Column(db.Text)
-    descricao = db.Column(db.String(200))
\ No newline at end of file
+    descricao = db.Column(db.String(200))
+
+class TarefaUpload(db.Model):
+    """
+    Upload de imagem (ou importação da biblioteca) processado em segundo plano
+    Status: pendente -> processando -> concluido | erro
+    """
+    __tablename__ = 'tarefa_upload'
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    status = db.Column(db.String(20), nullable=False, default='pendente')
+    url = db.Column(db.String(300))
+    miniatura_url = db.Column(db.String(300))
+    erro = db.Column(db.Text)
+    resultado = db.Column(db.Text)  # JSON do relatório da importação da biblioteca
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    data_conclusao = db.Column(db.DateTime)
\ No newline at end of file
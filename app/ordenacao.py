@@ -0,0 +1,72 @@
+"""
+ordenacao.py
+Ordenação personalizada do quadro pelo uso recente de cada paciente
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import json
+import math
+from datetime import datetime, timedelta
+from app import db
+from app.models import UsoDiario, OrdemPaciente
+
+MEIA_VIDA_DIAS = 30     # Uso de 30 dias atrás vale metade do uso de hoje
+JANELA_DIAS = 180       # Seleções mais antigas não entram no cálculo
+
+
+def calcular_ordem_paciente(paciente_id, agora=None):
+    """
+    Recalcula e grava (na transação atual) o ranking de pictogramas do paciente.
+    As contagens por pictograma e dia vêm de uso_diario (sessões finalizadas);
+    o peso exponencial é aplicado sobre esses poucos grupos.
+    """
+    agora = agora or datetime.now()
+
+    grupos = db.session.query(
+        UsoDiario.pictograma_id, UsoDiario.dia, UsoDiario.total
+    ).filter(
+        UsoDiario.paciente_id == paciente_id,
+        UsoDiario.dia >= (agora - timedelta(days=JANELA_DIAS)).date()
+    ).all()
+
+    pontuacoes = {}
+    hoje = agora.date()
+    for pictograma_id, data, qtd in grupos:
+        idade = (hoje - data).days
+        pontuacoes[pictograma_id] = pontuacoes.get(pictograma_id, 0.0) + qtd * math.pow(0.5, idade / MEIA_VIDA_DIAS)
+
+    ranking = sorted(pontuacoes, key=lambda pid: -pontuacoes[pid])
+
+    ordem = OrdemPaciente.query.get(paciente_id)
+    if ordem is None:
+        ordem = OrdemPaciente(paciente_id=paciente_id)
+        db.session.add(ordem)
+    ordem.ranking = json.dumps(ranking)
+    ordem.data_atualizacao = agora
+    return ranking
+
+
+def obter_ordem_paciente(paciente_id):
+    """
+    Retorna (posições, versão) do ranking pré-calculado, ou (None, None)
+    se o paciente não usa ordenação personalizada (sem linha em OrdemPaciente)
+    """
+    linha = db.session.query(OrdemPaciente.ranking, OrdemPaciente.data_atualizacao).filter(
+        OrdemPaciente.paciente_id == paciente_id
+    ).first()
+    if linha is None:
+        return None, None
+
+    ranking = json.loads(linha.ranking or '[]')
+    posicoes = {pictograma_id: i for i, pictograma_id in enumerate(ranking)}
+    return posicoes, linha.data_atualizacao.isoformat()
+
+
+def aplicar_ordem(pictogramas, posicoes):
+    """
+    Ordena os pictogramas mais usados primeiro; os nunca usados
+    mantêm a ordem cadastrada (campo ordem) depois deles
+    """
+    fim = len(posicoes)
+    # sorted é estável: a lista já vem ordenada por Pictograma.ordem
+    return sorted(pictogramas, key=lambda p: posicoes.get(p['id'], fim))
@@ -0,0 +1,193 @@
+"""
+predicao.py
+Predição do próximo pictograma (bigramas/trigramas por paciente)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import heapq
+import threading
+import time
+from collections import Counter, OrderedDict
+from app import db
+from app.models import Paciente, Sessao, HistoricoSelecao
+
+# Peso de cada nível na interpolação (trigrama, bigrama, frequência geral)
+PESOS = (0.6, 0.3, 0.1)
+MAX_SESSOES_MAPEADAS = 10000
+MAX_MODELOS = 1000  # Pacientes em memória por processo; o usado há mais tempo sai primeiro
+JANELA_RELEITURA = 500  # Ids abaixo do último lido relidos a cada atualização
+ATUALIZAR_APOS = 5  # Segundos em que prever() responde só da memória
+
+
+class ModeloPaciente:
+    """Contagens de transições de um paciente, montadas na ordem das seleções de cada sessão"""
+
+    __slots__ = ('unigramas', 'bigramas', 'trigramas', 'cauda_sessao', 'ultimo_historico_id',
+                 'vistos', 'atualizado_em')
+
+    def __init__(self):
+        self.unigramas = Counter()
+        self.bigramas = {}        # anterior -> Counter(próximo)
+        self.trigramas = {}       # (penúltimo, anterior) -> Counter(próximo)
+        self.cauda_sessao = {}    # sessao_id -> (penúltimo, anterior)
+        self.ultimo_historico_id = 0
+        self.vistos = set()       # Ids dentro da janela de releitura já contados
+        self.atualizado_em = time.monotonic()  # None: há gravações ainda não lidas
+
+    def adicionar(self, historico_id, sessao_id, pictograma_id):
+        if historico_id in self.vistos:
+            return
+        self.vistos.add(historico_id)
+        penultimo, anterior = self.cauda_sessao.get(sessao_id, (None, None))
+
+        self.unigramas[pictograma_id] += 1
+        if anterior is not None:
+            self.bigramas.setdefault(anterior, Counter())[pictograma_id] += 1
+            if penultimo is not None:
+                self.trigramas.setdefault((penultimo, anterior), Counter())[pictograma_id] += 1
+
+        self.cauda_sessao[sessao_id] = (anterior, pictograma_id)
+        self.ultimo_historico_id = max(self.ultimo_historico_id, historico_id)
+
+    def inicio_releitura(self):
+        """Menor id relido na próxima atualização; descarta os vistos abaixo dele"""
+        inicio = max(self.ultimo_historico_id - JANELA_RELEITURA, 0)
+        self.vistos = {i for i in self.vistos if i > inicio}
+        return inicio
+
+    def prever(self, contexto, k):
+        """Top-k (pictograma_id, pontuação) para o contexto (lista dos últimos pictogramas)"""
+        niveis = []
+        if len(contexto) >= 2:
+            niveis.append((PESOS[0], self.trigramas.get((contexto[-2], contexto[-1]))))
+        if contexto:
+            niveis.append((PESOS[1], self.bigramas.get(contexto[-1])))
+        niveis.append((PESOS[2], self.unigramas))
+
+        pontuacao = Counter()
+        for peso, contagens in niveis:
+            if not contagens:
+                continue
+            total = sum(contagens.values())
+            for pictograma_id, qtd in contagens.items():
+                pontuacao[pictograma_id] += peso * qtd / total
+
+        return heapq.nlargest(k, pontuacao.items(), key=lambda item: item[1])
+
+
+class ServicoPredicao:
+    """
+    Mantém um ModeloPaciente por paciente em memória (até MAX_MODELOS).
+
+    O modelo é montado a partir do banco no primeiro uso (ou em reconstruir()).
+    registrar() só marca o modelo como desatualizado após cada gravação neste
+    worker: o próximo prever() relê o banco uma vez, por mais lotes que tenham
+    chegado. Sem gravações locais, prever() só volta ao banco depois de
+    ATUALIZAR_APOS segundos, para trazer as seleções gravadas por outros workers. Cada atualização relê os últimos
+    JANELA_RELEITURA ids (ignorando os já contados): uma seleção cujo commit
+    terminou depois de outra de id maior ainda é incluída.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._modelos = OrderedDict()
+        self._paciente_da_sessao = {}
+
+    def _novas_selecoes(self, paciente_id=None, apos_id=0):
+        query = db.session.query(
+            Sessao.paciente_id,
+            HistoricoSelecao.id,
+            HistoricoSelecao.sessao_id,
+            HistoricoSelecao.pictograma_id
+        ).join(Sessao, Sessao.id == HistoricoSelecao.sessao_id)
+
+        if paciente_id is not None:
+            query = query.filter(Sessao.paciente_id == paciente_id)
+        if apos_id:
+            query = query.filter(HistoricoSelecao.id > apos_id)
+
+        return query.order_by(
+            HistoricoSelecao.sessao_id, HistoricoSelecao.timestamp, HistoricoSelecao.id
+        ).yield_per(5000)
+
+    def reconstruir(self, paciente_id=None):
+        """Reconstrói do banco os modelos de um paciente ou de todos (os MAX_MODELOS mais ativos)"""
+        modelos = {}
+        for pid, historico_id, sessao_id, pictograma_id in self._novas_selecoes(paciente_id):
+            modelos.setdefault(pid, ModeloPaciente()).adicionar(historico_id, sessao_id, pictograma_id)
+        for modelo in modelos.values():
+            modelo.inicio_releitura()
+
+        with self._lock:
+            if paciente_id is None:
+                recentes = heapq.nlargest(MAX_MODELOS, modelos.items(), key=lambda item: item[1].ultimo_historico_id)
+                self._modelos = OrderedDict(sorted(recentes, key=lambda item: item[1].ultimo_historico_id))
+            else:
+                self._guardar(paciente_id, modelos.get(paciente_id, ModeloPaciente()))
+        return len(modelos)
+
+    def _guardar(self, paciente_id, modelo):
+        self._modelos[paciente_id] = modelo
+        self._modelos.move_to_end(paciente_id)
+        while len(self._modelos) > MAX_MODELOS:
+            self._modelos.popitem(last=False)
+
+    def _atualizar(self, paciente_id):
+        """
+        Carrega o modelo se necessário e aplica as seleções ainda não vistas;
+        None se o paciente não existe
+        """
+        with self._lock:
+            modelo = self._modelos.get(paciente_id)
+            if modelo is not None:
+                self._modelos.move_to_end(paciente_id)
+
+        if modelo is None:
+            if db.session.query(Paciente.id).filter_by(id=paciente_id).scalar() is None:
+                return None
+            self.reconstruir(paciente_id)
+            with self._lock:
+                return self._modelos.get(paciente_id)
+
+        atualizado_em = modelo.atualizado_em
+        if atualizado_em is not None and time.monotonic() - atualizado_em < ATUALIZAR_APOS:
+            return modelo
+
+        with self._lock:
+            inicio = modelo.inicio_releitura()
+        novas = self._novas_selecoes(paciente_id, inicio).all()
+        with self._lock:
+            for _, historico_id, sessao_id, pictograma_id in novas:
+                modelo.adicionar(historico_id, sessao_id, pictograma_id)
+            modelo.atualizado_em = time.monotonic()
+        return modelo
+
+    def registrar(self, sessao_id):
+        """Chamado após gravar seleções: o modelo do paciente (se em memória) relê o banco no próximo prever()"""
+        paciente_id = self._paciente_da_sessao.get(sessao_id)
+        if paciente_id is None:
+            paciente_id = db.session.query(Sessao.paciente_id).filter_by(id=sessao_id).scalar()
+            if len(self._paciente_da_sessao) > MAX_SESSOES_MAPEADAS:
+                self._paciente_da_sessao.clear()
+            self._paciente_da_sessao[sessao_id] = paciente_id
+
+        with self._lock:
+            modelo = self._modelos.get(paciente_id)
+            if modelo is not None:
+                modelo.atualizado_em = None
+
+    def prever(self, paciente_id, contexto=None, sessao_id=None, k=5):
+        """
+        Sugestões para o próximo pictograma, ou None se o paciente não existe.
+        Sem contexto explícito, usa as últimas seleções registradas na sessão informada.
+        """
+        modelo = self._atualizar(paciente_id)
+        if modelo is None:
+            return None
+        with self._lock:
+            if contexto is None:
+                contexto = [p for p in modelo.cauda_sessao.get(sessao_id, ()) if p is not None]
+            return modelo.prever(list(contexto)[-2:], k)
+
+
+servico_predicao = ServicoPredicao()
@@ -0,0 +1,66 @@
+"""
+replica.py
+Leituras na réplica (bind 'replica') e escritas no primário, com leitura das próprias escritas
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+Só as rotas marcadas com @ler_da_replica consultam a réplica. O cliente que
+acabou de gravar (marca na sessão de login) continua lendo do primário por
+REPLICA_JANELA_ESCRITA segundos, tempo para a réplica alcançar o primário.
+"""
+
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy.session import Session
+
+BIND_REPLICA = 'replica'
+
+
+class SessaoRoteada(Session):
+    """
+    Session do Flask-SQLAlchemy que escolhe o engine por comando: flush e
+    INSERT/UPDATE/DELETE sempre no primário; consultas vão para a réplica
+    quando a requisição pediu e ainda não gravou nada.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and BIND_REPLICA in self._db.engines and has_request_context():
+            if self._flushing or getattr(clause, 'is_dml', False):
+                g.escreveu_no_primario = True
+            elif g.get('ler_da_replica') and not g.get('escreveu_no_primario'):
+                return self._db.engines[BIND_REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def ler_da_replica(f):
+    """Rota somente leitura: consulta a réplica, salvo se o cliente gravou há pouco"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        ultima_escrita = session.get('ultima_escrita')
+        janela = current_app.config.get('REPLICA_JANELA_ESCRITA', 5)
+        if ultima_escrita is None or time.time() - ultima_escrita > janela:
+            g.ler_da_replica = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _marcar_escrita(resposta):
+    if g.get('escreveu_no_primario'):
+        session['ultima_escrita'] = time.time()
+    return resposta
+
+
+def init_replica(app):
+    """
+    Se REPLICA_DATABASE_URL estiver definida, registra o bind da réplica (com o
+    mesmo perfil de engine do primário). Deve rodar antes de db.init_app.
+    """
+    url = app.config.get('REPLICA_DATABASE_URL')
+    if not url:
+        return
+
+    from app.banco import opcoes_engine
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds[BIND_REPLICA] = dict(opcoes_engine(url, app.config), url=url)
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.after_request(_marcar_escrita)
@@ -0,0 +1,187 @@
+"""
+resumos.py
+Tabelas de resumo (totais por sessão e uso diário) mantidas ao finalizar sessões
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import distinct, func
+from sqlalchemy.orm import aliased
+from app import db
+from app.arquivo import desempacotar, selecoes_arquivadas
+from app.models import Sessao, HistoricoSelecao, ResumoSessao, UsoDiario, ArquivoSessao
+
+TAMANHO_LOTE = 5000
+
+
+def _agregados():
+    """Colunas comuns: total, soma e quantidade dos tempos de resposta informados"""
+    tempo = HistoricoSelecao.tempo_resposta_segundos
+    return func.count(HistoricoSelecao.id), func.coalesce(func.sum(tempo), 0.0), func.count(tempo)
+
+
+def _como_data(valor):
+    """func.date devolve texto no SQLite e date no PostgreSQL"""
+    if isinstance(valor, date):
+        return valor
+    return datetime.strptime(str(valor), '%Y-%m-%d').date()
+
+
+def consolidar_sessao(sessao):
+    """
+    Recalcula, na transação atual, o resumo da sessão e o uso diário do
+    paciente no dia em que ela começou. Recalcular (em vez de somar) torna a
+    operação idempotente: finalizar de novo ou receber seleções atrasadas
+    não duplica contagens. Seleções já arquivadas (retencao.py) também contam.
+    """
+    db.session.flush()
+    total, soma, qtd = _agregados()
+    tempo = HistoricoSelecao.tempo_resposta_segundos
+
+    selecoes = db.session.query(HistoricoSelecao.pictograma_id, tempo).filter(
+        HistoricoSelecao.sessao_id == sessao.id
+    ).all()
+    selecoes += [(pictograma_id, t) for _, pictograma_id, _, t in selecoes_arquivadas(sessao.id) or ()]
+    tempos = [t for _, t in selecoes if t is not None]
+
+    resumo = ResumoSessao.query.get(sessao.id)
+    if resumo is None:
+        resumo = ResumoSessao(sessao_id=sessao.id)
+        db.session.add(resumo)
+    resumo.total_selecoes = len(selecoes)
+    resumo.pictogramas_distintos = len({pictograma_id for pictograma_id, _ in selecoes})
+    resumo.soma_tempo_resposta = sum(tempos)
+    resumo.qtd_tempo_resposta = len(tempos)
+
+    dia = sessao.data_inicio.date()
+    inicio_dia = datetime(dia.year, dia.month, dia.day)
+    # Só sessões com resumo: as demais são contadas direto do histórico nas
+    # estatísticas, e entrar aqui também as contaria duas vezes
+    db.session.flush()
+    filtros_dia = (
+        Sessao.paciente_id == sessao.paciente_id,
+        Sessao.finalizada == True,
+        db.session.query(ResumoSessao.sessao_id).filter(ResumoSessao.sessao_id == Sessao.id).exists(),
+        Sessao.data_inicio >= inicio_dia,
+        Sessao.data_inicio < inicio_dia + timedelta(days=1)
+    )
+
+    uso = {pictograma_id: [qtd_total, soma_tempo, qtd_tempo] for pictograma_id, qtd_total, soma_tempo, qtd_tempo in db.session.query(
+        HistoricoSelecao.pictograma_id, total, soma, qtd
+    ).join(
+        Sessao, Sessao.id == HistoricoSelecao.sessao_id
+    ).filter(*filtros_dia).group_by(HistoricoSelecao.pictograma_id)}
+
+    arquivos = db.session.query(ArquivoSessao.inicio, ArquivoSessao.dados).join(
+        Sessao, Sessao.id == ArquivoSessao.sessao_id
+    ).filter(*filtros_dia)
+    for inicio_arquivo, dados in arquivos:
+        for _, pictograma_id, _, t in desempacotar(inicio_arquivo, dados):
+            acumulado = uso.setdefault(pictograma_id, [0, 0.0, 0])
+            acumulado[0] += 1
+            if t is not None:
+                acumulado[1] += t
+                acumulado[2] += 1
+
+    UsoDiario.query.filter_by(paciente_id=sessao.paciente_id, dia=dia).delete(synchronize_session=False)
+    if uso:
+        db.session.execute(UsoDiario.__table__.insert(), [{
+            'paciente_id': sessao.paciente_id,
+            'dia': dia,
+            'pictograma_id': pictograma_id,
+            'total': qtd_total,
+            'soma_tempo_resposta': soma_tempo,
+            'qtd_tempo_resposta': qtd_tempo
+        } for pictograma_id, (qtd_total, soma_tempo, qtd_tempo) in uso.items()])
+
+
+def _gravar_em_lotes(modelo, linhas, ao_progredir=None):
+    lote, gravadas = [], 0
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= TAMANHO_LOTE:
+            db.session.execute(modelo.__table__.insert(), lote)
+            gravadas += len(lote)
+            lote = []
+            if ao_progredir:
+                ao_progredir(modelo.__tablename__, gravadas)
+    if lote:
+        db.session.execute(modelo.__table__.insert(), lote)
+        gravadas += len(lote)
+    return gravadas
+
+
+def reconstruir_resumos(ao_progredir=None):
+    """
+    Refaz as duas tabelas a partir de historico_selecao (sessões finalizadas),
+    em uma transação. Usado na primeira implantação e após correções manuais.
+
+    Sessões arquivadas já tiveram os resumos garantidos no arquivamento e não
+    mudam mais: as linhas delas (e os dias de uso_diario em que aparecem)
+    são mantidas como estão.
+    """
+    total, soma, qtd = _agregados()
+
+    sessao_arquivada = db.session.query(ArquivoSessao.sessao_id).filter(
+        ArquivoSessao.sessao_id == Sessao.id
+    ).exists()
+
+    def dia_com_arquivo(paciente_id, dia):
+        outra = aliased(Sessao)
+        return db.session.query(ArquivoSessao.sessao_id).join(
+            outra, outra.id == ArquivoSessao.sessao_id
+        ).filter(outra.paciente_id == paciente_id, func.date(outra.data_inicio) == dia).exists()
+
+    ha_arquivos = db.session.query(ArquivoSessao.sessao_id).first() is not None
+    filtros_sessao = [Sessao.finalizada == True]
+    filtros_dia = [Sessao.finalizada == True]
+
+    if ha_arquivos:
+        ResumoSessao.query.filter(
+            ~db.session.query(ArquivoSessao.sessao_id).filter(
+                ArquivoSessao.sessao_id == ResumoSessao.sessao_id
+            ).exists()
+        ).delete(synchronize_session=False)
+        UsoDiario.query.filter(
+            ~dia_com_arquivo(UsoDiario.paciente_id, UsoDiario.dia)
+        ).delete(synchronize_session=False)
+        filtros_sessao.append(~sessao_arquivada)
+        filtros_dia.append(~dia_com_arquivo(Sessao.paciente_id, func.date(Sessao.data_inicio)))
+    else:
+        ResumoSessao.query.delete(synchronize_session=False)
+        UsoDiario.query.delete(synchronize_session=False)
+
+    por_sessao = db.session.query(
+        Sessao.id, total, func.count(distinct(HistoricoSelecao.pictograma_id)), soma, qtd
+    ).outerjoin(
+        HistoricoSelecao, HistoricoSelecao.sessao_id == Sessao.id
+    ).filter(*filtros_sessao).group_by(Sessao.id).yield_per(TAMANHO_LOTE)
+
+    sessoes = _gravar_em_lotes(ResumoSessao, ({
+        'sessao_id': sessao_id,
+        'total_selecoes': qtd_total,
+        'pictogramas_distintos': distintos,
+        'soma_tempo_resposta': soma_tempo,
+        'qtd_tempo_resposta': qtd_tempo
+    } for sessao_id, qtd_total, distintos, soma_tempo, qtd_tempo in por_sessao), ao_progredir)
+
+    dia = func.date(Sessao.data_inicio)
+    por_dia = db.session.query(
+        Sessao.paciente_id, dia, HistoricoSelecao.pictograma_id, total, soma, qtd
+    ).join(
+        Sessao, Sessao.id == HistoricoSelecao.sessao_id
+    ).filter(*filtros_dia).group_by(
+        Sessao.paciente_id, dia, HistoricoSelecao.pictograma_id
+    ).yield_per(TAMANHO_LOTE)
+
+    dias = _gravar_em_lotes(UsoDiario, ({
+        'paciente_id': paciente_id,
+        'dia': _como_data(d),
+        'pictograma_id': pictograma_id,
+        'total': qtd_total,
+        'soma_tempo_resposta': soma_tempo,
+        'qtd_tempo_resposta': qtd_tempo
+    } for paciente_id, d, pictograma_id, qtd_total, soma_tempo, qtd_tempo in por_dia), ao_progredir)
+
+    db.session.commit()
+    return {'resumo_sessao': sessoes, 'uso_diario': dias}
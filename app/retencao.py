@@ -0,0 +1,93 @@
+"""
+retencao.py
+Retenção do histórico: move seleções de sessões antigas para arquivo_sessao
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+from datetime import datetime, timedelta
+from itertools import groupby
+from app import db
+from app.arquivo import empacotar, desempacotar
+from app.models import Sessao, HistoricoSelecao, ResumoSessao, ArquivoSessao
+from app.resumos import consolidar_sessao
+
+TAMANHO_LOTE = 500
+
+
+def sessoes_para_arquivar(dias, limite=None):
+    """
+    Ids das sessões finalizadas iniciadas antes do corte (meia-noite de
+    `dias` atrás) que ainda têm seleções em historico_selecao. O corte por
+    dia inteiro arquiva juntas as sessões do mesmo dia (mesma linha de uso_diario).
+    """
+    hoje = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    query = db.session.query(Sessao.id).filter(
+        Sessao.finalizada == True,
+        Sessao.data_inicio < hoje - timedelta(days=dias),
+        db.session.query(HistoricoSelecao.id).filter(HistoricoSelecao.sessao_id == Sessao.id).exists()
+    ).order_by(Sessao.id)
+    if limite:
+        query = query.limit(limite)
+    return [sid for (sid,) in query]
+
+
+def arquivar_sessoes(sessao_ids, ao_progredir=None):
+    """
+    Compacta as seleções das sessões em lotes (uma transação por lote) e as
+    remove de historico_selecao. Os resumos (resumos.py) são garantidos antes,
+    então listagens e estatísticas continuam contando essas sessões.
+    Se a sessão já tem arquivo (seleções chegaram depois), as novas são mescladas.
+    """
+    totais = {'sessoes': 0, 'selecoes': 0, 'bytes': 0}
+
+    for i in range(0, len(sessao_ids), TAMANHO_LOTE):
+        lote = sessao_ids[i:i + TAMANHO_LOTE]
+
+        com_resumo = {sid for (sid,) in db.session.query(ResumoSessao.sessao_id).filter(
+            ResumoSessao.sessao_id.in_(lote)
+        )}
+        for sessao in Sessao.query.filter(Sessao.id.in_(set(lote) - com_resumo)):
+            consolidar_sessao(sessao)
+
+        linhas = db.session.query(
+            HistoricoSelecao.sessao_id, HistoricoSelecao.id, HistoricoSelecao.pictograma_id,
+            HistoricoSelecao.timestamp, HistoricoSelecao.tempo_resposta_segundos
+        ).filter(HistoricoSelecao.sessao_id.in_(lote)).order_by(
+            HistoricoSelecao.sessao_id, HistoricoSelecao.timestamp, HistoricoSelecao.id
+        ).all()
+
+        existentes = {a.sessao_id: a for a in ArquivoSessao.query.filter(ArquivoSessao.sessao_id.in_(lote))}
+        novos = []
+        for sessao_id, grupo in groupby(linhas, key=lambda linha: linha[0]):
+            selecoes = [tuple(linha[1:]) for linha in grupo]
+            arquivo = existentes.get(sessao_id)
+            if arquivo is not None:
+                selecoes = sorted(desempacotar(arquivo.inicio, arquivo.dados) + selecoes, key=lambda s: (s[2], s[0]))
+
+            inicio, blob = empacotar(selecoes)
+            fim = max(s[2] for s in selecoes)
+            if arquivo is not None:
+                arquivo.inicio, arquivo.fim, arquivo.dados, arquivo.quantidade = inicio, fim, blob, len(selecoes)
+                arquivo.data_arquivamento = datetime.now()
+            else:
+                novos.append({
+                    'sessao_id': sessao_id,
+                    'quantidade': len(selecoes),
+                    'inicio': inicio,
+                    'fim': fim,
+                    'dados': blob,
+                    'data_arquivamento': datetime.now()
+                })
+            totais['bytes'] += len(blob)
+
+        if novos:
+            db.session.execute(ArquivoSessao.__table__.insert(), novos)
+        HistoricoSelecao.query.filter(HistoricoSelecao.sessao_id.in_(lote)).delete(synchronize_session=False)
+        db.session.commit()
+
+        totais['sessoes'] += len({linha[0] for linha in linhas})
+        totais['selecoes'] += len(linhas)
+        if ao_progredir:
+            ao_progredir(totais)
+
+    return totais
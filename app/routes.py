@@ -5,14 +5,43 @@ Sistema de Comunicação Alternativa com Pictogramas para TEA
 Instituto Tia Dani - Costa Rica/MS
 """
 
-from flask import Blueprint, render_template, jsonify, request, session, redirect, url_for
-from app.models import db, Usuario, Paciente, Categoria, Pictograma, Sessao, HistoricoSelecao
-from datetime import datetime
-from sqlalchemy import desc
+from flask import Blueprint, render_template, jsonify, request, session, redirect, url_for, current_app, Response, stream_with_context, send_file
+from app.models import db, Usuario, Paciente, Categoria, Pictograma, Sessao, HistoricoSelecao, OrdemPaciente, ResumoSessao
+from app.banco import INSERTS_COM_CONFLITO
+from app.cache import cache_quadro
+from app.estatisticas import estatisticas_paciente
+from app.exportacao import consulta_exportacao, gerar_csv, gerar_ndjson
+from app.imagens import url_miniatura
+from app.uploads import fila_uploads
+from app.metricas import registro_metricas
+from app.predicao import servico_predicao
+from app.ordenacao import calcular_ordem_paciente, obter_ordem_paciente, aplicar_ordem
+from app.busca import indice_busca
+from app.biblioteca import verificar_biblioteca, importar_em_tarefa, exportar_biblioteca
+from app.resumos import consolidar_sessao
+from app.ao_vivo import canal_sessoes, transmitir, EVENTO_FIM
+from app.replica import ler_da_replica
+from app.sessoes_login import cache_perfis, usuario_logado
+from app.arquivo import selecoes_arquivadas
+from datetime import datetime, timedelta
+from sqlalchemy import desc, func, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from functools import wraps
+import hashlib
+import io
+import json
+import tempfile
+import zipfile
 
 main = Blueprint('main', __name__)
 
+MAX_SELECOES_LOTE = 500
+MAX_EVENTO_ID = 64  # Tamanho de HistoricoSelecao.evento_id
+MAX_ATRASO_MS = 7 * 24 * 3600 * 1000  # Fila offline guardada no tablet por até uma semana
+MAX_TEMPO_RESPOSTA = 3600  # Acima disso (ou negativo) o tempo é gravado como nulo, sem rejeitar o toque
+MAX_ITENS_LOTE = 1000
+
 
 # ========== DECORATOR DE AUTENTICAÇÃO ==========
 
@@ -20,7 +49,7 @@ def login_required(f):
     """Decorator para proteger rotas que exigem login"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'usuario_id' not in session:
+        if not usuario_logado():
             if request.is_json:
                 return jsonify({'erro': 'Não autenticado'}), 401
             return redirect(url_for('main.index'))
@@ -33,7 +62,7 @@ def login_required(f):
 @main.route('/')
 def index():
     """Página de Login"""
-    if 'usuario_id' in session:
+    if usuario_logado():
         return redirect(url_for('main.selecionar_paciente'))
     return render_template('login.html')
 
@@ -96,6 +125,7 @@ def api_login():
     session['usuario_id'] = usuario.id
     session['usuario_nome'] = usuario.nome
     session['usuario_login'] = usuario.login
+    cache_perfis.guardar(usuario)
     
     return jsonify({
         'sucesso': True,
@@ -152,21 +182,17 @@ def api_logout():
 @main.route('/api/usuario/atual', methods=['GET'])
 def api_usuario_atual():
     """Retorna dados do usuário logado"""
-    if 'usuario_id' not in session:
-        return jsonify({'logado': False}), 200
-    
-    usuario = Usuario.query.get(session['usuario_id'])
-    if not usuario:
-        session.clear()
+    perfil = usuario_logado()
+    if not perfil:
         return jsonify({'logado': False}), 200
     
     return jsonify({
         'logado': True,
         'usuario': {
-            'id': usuario.id,
-            'nome': usuario.nome,
-            'login': usuario.login,
-            'cargo': usuario.cargo
+            'id': perfil['id'],
+            'nome': perfil['nome'],
+            'login': perfil['login'],
+            'cargo': perfil['cargo']
         }
     })
 
@@ -175,6 +201,7 @@ def api_usuario_atual():
 
 @main.route('/api/pacientes', methods=['GET'])
 @login_required
+@ler_da_replica
 def api_listar_pacientes():
     """Lista pacientes do profissional logado"""
     usuario_id = session.get('usuario_id')
@@ -213,10 +240,14 @@ def api_criar_paciente():
         nivel_suporte=dados.get('nivel_suporte'),
         preferencias=dados.get('preferencias'),
         foto_perfil=dados.get('foto_perfil'),
-        usuario_id=usuario_id
+        usuario_id=usuario_id,
+        ordem_personalizada=bool(dados.get('ordem_personalizada'))
     )
     
     db.session.add(paciente)
+    if paciente.ordem_personalizada:
+        db.session.flush()
+        calcular_ordem_paciente(paciente.id)
     db.session.commit()
     
     return jsonify({
@@ -227,6 +258,7 @@ def api_criar_paciente():
 
 @main.route('/api/pacientes/<int:paciente_id>', methods=['GET'])
 @login_required
+@ler_da_replica
 def api_obter_paciente(paciente_id):
     """Obtém dados de um paciente"""
     paciente = Paciente.query.get_or_404(paciente_id)
@@ -237,7 +269,8 @@ def api_obter_paciente(paciente_id):
         'data_nascimento': paciente.data_nascimento.isoformat() if paciente.data_nascimento else None,
         'diagnostico': paciente.diagnostico,
         'nivel_suporte': paciente.nivel_suporte,
-        'foto_perfil': paciente.foto_perfil
+        'foto_perfil': paciente.foto_perfil,
+        'ordem_personalizada': bool(paciente.ordem_personalizada)
     })
 
 
@@ -256,6 +289,12 @@ def api_atualizar_paciente(paciente_id):
         paciente.diagnostico = dados['diagnostico']
     if 'nivel_suporte' in dados:
         paciente.nivel_suporte = dados['nivel_suporte']
+    if 'ordem_personalizada' in dados:
+        paciente.ordem_personalizada = bool(dados['ordem_personalizada'])
+        if paciente.ordem_personalizada:
+            calcular_ordem_paciente(paciente.id)
+        else:
+            OrdemPaciente.query.filter_by(paciente_id=paciente.id).delete()
     
     db.session.commit()
     return jsonify({'sucesso': True})
@@ -271,22 +310,78 @@ def api_excluir_paciente(paciente_id):
     return jsonify({'sucesso': True})
 
 
+@main.route('/api/pacientes/<int:paciente_id>/estatisticas', methods=['GET'])
+@login_required
+@ler_da_replica
+def api_estatisticas_paciente(paciente_id):
+    """
+    Evolução do paciente: frequência de pictogramas, distribuição por categoria
+    e percentis do tempo de resposta (por sessão e por dia)
+    Filtros: data_inicio, data_fim (YYYY-MM-DD), top (quantidade de pictogramas)
+    """
+    Paciente.query.get_or_404(paciente_id)
+    
+    try:
+        inicio, fim = _ler_intervalo_datas()
+    except ValueError:
+        return jsonify({'erro': 'Datas devem estar no formato YYYY-MM-DD'}), 400
+    
+    top = min(max(request.args.get('top', 20, type=int), 1), 200)
+    
+    return jsonify(estatisticas_paciente(paciente_id, inicio, fim, limite_pictogramas=top))
+
+
+@main.route('/api/pacientes/<int:paciente_id>/predicao', methods=['GET'])
+@login_required
+def api_predicao_paciente(paciente_id):
+    """
+    Sugere os próximos pictogramas a partir do histórico do paciente
+    Parâmetros: contexto (ids separados por vírgula, do mais antigo ao mais recente),
+    sessao_id (usa as últimas seleções gravadas da sessão), k (quantidade)
+    """
+    k = min(max(request.args.get('k', 5, type=int), 1), 50)
+    
+    contexto = None
+    if request.args.get('contexto'):
+        try:
+            contexto = [int(p) for p in request.args['contexto'].split(',') if p]
+        except ValueError:
+            return jsonify({'erro': 'contexto deve conter ids separados por vírgula'}), 400
+    
+    sugestoes = servico_predicao.prever(
+        paciente_id,
+        contexto=contexto,
+        sessao_id=request.args.get('sessao_id', type=int),
+        k=k
+    )
+    if sugestoes is None:
+        return jsonify({'erro': 'Paciente não encontrado'}), 404
+    
+    return jsonify({
+        'sugestoes': [{
+            'pictograma_id': pictograma_id,
+            'pontuacao': round(pontuacao, 4)
+        } for pictograma_id, pontuacao in sugestoes]
+    })
+
+
 # ========== API - CATEGORIAS ==========
 
 @main.route('/api/categorias', methods=['GET'])
+@ler_da_replica
 def api_listar_categorias():
-    """Lista todas as categorias"""
-    categorias = Categoria.query.order_by(Categoria.ordem).all()
-    
-    return jsonify({
-        'categorias': [{
+    """Lista todas as categorias (cache versionado)"""
+    def carregar():
+        categorias = Categoria.query.order_by(Categoria.ordem).all()
+        return [{
             'id': c.id,
             'nome': c.nome,
             'cor': c.cor,
             'icone': c.icone,
             'ordem': c.ordem
         } for c in categorias]
-    })
+
+    return jsonify({'categorias': cache_quadro.obter('categorias', carregar)})
 
 
 @main.route('/api/categorias', methods=['POST'])
@@ -309,6 +404,7 @@ def api_criar_categoria():
     )
     
     db.session.add(categoria)
+    cache_quadro.invalidar()
     db.session.commit()
     
     return jsonify({
@@ -333,6 +429,7 @@ def api_atualizar_categoria(categoria_id):
     if dados.get('ordem'):
         categoria.ordem = dados['ordem']
     
+    cache_quadro.invalidar()
     db.session.commit()
     return jsonify({'sucesso': True})
 
@@ -344,6 +441,7 @@ def api_excluir_categoria(categoria_id):
     categoria = Categoria.query.get_or_404(categoria_id)
     Pictograma.query.filter_by(categoria_id=categoria_id).delete()
     db.session.delete(categoria)
+    cache_quadro.invalidar()
     db.session.commit()
     return jsonify({'sucesso': True})
 
@@ -351,26 +449,68 @@ def api_excluir_categoria(categoria_id):
 # ========== API - PICTOGRAMAS ==========
 
 @main.route('/api/pictogramas', methods=['GET'])
+@ler_da_replica
 def api_listar_pictogramas():
-    """Lista pictogramas"""
+    """Lista pictogramas (cache versionado); com paciente_id usa a ordem personalizada"""
     categoria_id = request.args.get('categoria_id', type=int)
     
-    query = Pictograma.query.filter_by(ativo=True)
-    if categoria_id:
-        query = query.filter_by(categoria_id=categoria_id)
-    
-    pictogramas = query.order_by(Pictograma.ordem).all()
-    
-    return jsonify({
-        'pictogramas': [{
+    def carregar():
+        query = Pictograma.query.filter_by(ativo=True)
+        if categoria_id:
+            query = query.filter_by(categoria_id=categoria_id)
+        
+        pictogramas = query.options(joinedload(Pictograma.categoria)).order_by(Pictograma.ordem).all()
+        return [{
             'id': p.id,
             'nome': p.nome,
             'imagem_url': p.imagem_url,
+            'imagem_miniatura_url': url_miniatura(p.imagem_url),
             'audio_texto': p.audio_texto,
             'categoria_id': p.categoria_id,
             'categoria_nome': p.categoria.nome,
-            'categoria_cor': p.categoria.cor
+            'categoria_cor': p.categoria.cor,
+            'ordem': p.ordem
         } for p in pictogramas]
+    
+    pictogramas = cache_quadro.obter(('pictogramas', categoria_id), carregar)
+    
+    # Ordenação personalizada (opcional) pelo ranking pré-calculado do paciente
+    paciente_id = request.args.get('paciente_id', type=int)
+    if paciente_id:
+        posicoes, _ = obter_ordem_paciente(paciente_id)
+        if posicoes is not None:
+            pictogramas = aplicar_ordem(pictogramas, posicoes)
+    
+    return jsonify({'pictogramas': pictogramas})
+
+
+@main.route('/api/pictogramas/busca', methods=['GET'])
+@ler_da_replica
+def api_buscar_pictogramas():
+    """
+    Busca pictogramas por nome ou texto falado, sem diferenciar acentos
+    e tolerando erros de digitação. Parâmetros: q, limite
+    """
+    consulta = request.args.get('q', '').strip()
+    limite = min(max(request.args.get('limite', 20, type=int), 1), 100)
+    
+    if not consulta:
+        return jsonify({'erro': 'Parâmetro q é obrigatório'}), 400
+    
+    resultados = indice_busca.buscar(consulta, limite)
+    
+    return jsonify({
+        'pictogramas': [{
+            'id': pid,
+            'nome': nome,
+            'audio_texto': audio_texto,
+            'imagem_url': imagem_url,
+            'imagem_miniatura_url': url_miniatura(imagem_url),
+            'categoria_id': categoria_id,
+            'categoria_nome': categoria_nome,
+            'categoria_cor': categoria_cor,
+            'pontuacao': round(pontuacao, 3)
+        } for pontuacao, (pid, nome, audio_texto, imagem_url, categoria_id, categoria_nome, categoria_cor) in resultados]
     })
 
 
@@ -399,6 +539,7 @@ def api_criar_pictograma():
     )
     
     db.session.add(pictograma)
+    cache_quadro.invalidar()
     db.session.commit()
     
     return jsonify({
@@ -416,8 +557,9 @@ def api_atualizar_pictograma(pictograma_id):
     
     if dados.get('nome'):
         pictograma.nome = dados['nome']
-    if dados.get('imagem_url'):
+    if dados.get('imagem_url') and dados['imagem_url'] != pictograma.imagem_url:
         pictograma.imagem_url = dados['imagem_url']
+        pictograma.hash_imagem = None
     if dados.get('audio_texto'):
         pictograma.audio_texto = dados['audio_texto']
     if dados.get('categoria_id'):
@@ -425,6 +567,7 @@ def api_atualizar_pictograma(pictograma_id):
     if dados.get('ordem'):
         pictograma.ordem = dados['ordem']
     
+    cache_quadro.invalidar()
     db.session.commit()
     return jsonify({'sucesso': True})
 
@@ -435,88 +578,576 @@ def api_excluir_pictograma(pictograma_id):
     """Desativa um pictograma"""
     pictograma = Pictograma.query.get_or_404(pictograma_id)
     pictograma.ativo = False
+    cache_quadro.invalidar()
     db.session.commit()
     return jsonify({'sucesso': True})
 
 
+# ========== API - EDIÇÃO EM LOTE ==========
+
+CAMPOS_LOTE_CATEGORIA = {'nome', 'cor', 'icone', 'ordem'}
+CAMPOS_LOTE_PICTOGRAMA = {'nome', 'imagem_url', 'audio_texto', 'categoria_id', 'ordem', 'ativo'}
+
+
+def _validar_campo(coluna, valor):
+    """Confere o valor contra o tipo e a nulidade da coluna; retorna a mensagem de erro ou None"""
+    if valor is None:
+        return None if coluna.nullable else 'é obrigatório'
+
+    tipo = coluna.type.python_type
+    if tipo is int and (not isinstance(valor, int) or isinstance(valor, bool)):
+        return 'deve ser um número inteiro'
+    if tipo is bool and not isinstance(valor, bool):
+        return 'deve ser true ou false'
+    if tipo is str:
+        if not isinstance(valor, str):
+            return 'deve ser texto'
+        if not coluna.nullable and not valor.strip():
+            return 'é obrigatório'
+        if coluna.type.length and len(valor) > coluna.type.length:
+            return f'deve ter no máximo {coluna.type.length} caracteres'
+    return None
+
+
+def _aplicar_lote(modelo, itens, campos_permitidos):
+    """
+    Valida e aplica uma lista de {id, campo: valor} com um único UPDATE em lote
+    Retorna None se deu certo, ou (mensagem, status HTTP) em caso de erro
+    """
+    if not isinstance(itens, list) or not itens:
+        return 'Lista de itens obrigatória', 400
+    if len(itens) > MAX_ITENS_LOTE:
+        return f'Máximo de {MAX_ITENS_LOTE} itens por lote', 400
+
+    for item in itens:
+        if not isinstance(item, dict) or not isinstance(item.get('id'), int):
+            return 'Cada item precisa de um id numérico', 400
+        invalidos = set(item) - {'id'} - campos_permitidos
+        if invalidos:
+            return f"Campos não permitidos: {', '.join(sorted(invalidos))}", 400
+        for campo in set(item) - {'id'}:
+            erro = _validar_campo(modelo.__table__.c[campo], item[campo])
+            if erro:
+                return f"Item {item['id']}: {campo} {erro}", 400
+
+    ids = {item['id'] for item in itens}
+    if len(ids) != len(itens):
+        return 'Ids repetidos no lote', 400
+
+    encontrados = {i for (i,) in db.session.query(modelo.id).filter(modelo.id.in_(ids))}
+    faltando = ids - encontrados
+    if faltando:
+        return f"Não encontrados: {', '.join(str(i) for i in sorted(faltando))}", 404
+
+    categorias_destino = {item['categoria_id'] for item in itens if 'categoria_id' in item}
+    if categorias_destino:
+        existentes = {i for (i,) in db.session.query(Categoria.id).filter(Categoria.id.in_(categorias_destino))}
+        if categorias_destino - existentes:
+            return 'Categoria não encontrada', 404
+
+    if modelo is Pictograma:
+        # Imagem trocada à mão: a próxima importação da biblioteca deve reenviá-la
+        for item in itens:
+            if 'imagem_url' in item:
+                item['hash_imagem'] = None
+
+    try:
+        db.session.bulk_update_mappings(modelo, itens)
+        cache_quadro.invalidar()
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return 'Conflito ao salvar: valores duplicados', 400
+    return None
+
+
+def _ids_para_ordem(dados):
+    ids = dados.get('ids')
+    if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+        return None
+    return [{'id': pid, 'ordem': posicao} for posicao, pid in enumerate(ids, 1)]
+
+
+@main.route('/api/categorias/ordem', methods=['PUT'])
+@login_required
+def api_reordenar_categorias():
+    """Aplica uma nova ordem às categorias - Recebe: { ids: [ids na ordem desejada] }"""
+    itens = _ids_para_ordem(request.get_json() or {})
+    if itens is None:
+        return jsonify({'erro': 'ids deve ser uma lista de números'}), 400
+    
+    erro = _aplicar_lote(Categoria, itens, CAMPOS_LOTE_CATEGORIA)
+    if erro:
+        return jsonify({'erro': erro[0]}), erro[1]
+    return jsonify({'sucesso': True, 'atualizados': len(itens)})
+
+
+@main.route('/api/pictogramas/ordem', methods=['PUT'])
+@login_required
+def api_reordenar_pictogramas():
+    """
+    Aplica uma nova ordem aos pictogramas - Recebe: { ids: [...], categoria_id (opcional) }
+    Com categoria_id, os pictogramas também passam para essa categoria
+    """
+    dados = request.get_json() or {}
+    itens = _ids_para_ordem(dados)
+    if itens is None:
+        return jsonify({'erro': 'ids deve ser uma lista de números'}), 400
+    
+    if dados.get('categoria_id'):
+        for item in itens:
+            item['categoria_id'] = dados['categoria_id']
+    
+    erro = _aplicar_lote(Pictograma, itens, CAMPOS_LOTE_PICTOGRAMA)
+    if erro:
+        return jsonify({'erro': erro[0]}), erro[1]
+    return jsonify({'sucesso': True, 'atualizados': len(itens)})
+
+
+@main.route('/api/categorias/lote', methods=['PATCH'])
+@login_required
+def api_editar_categorias_lote():
+    """Edita várias categorias em uma transação - Recebe: { categorias: [{ id, campos... }] }"""
+    dados = request.get_json() or {}
+    
+    erro = _aplicar_lote(Categoria, dados.get('categorias'), CAMPOS_LOTE_CATEGORIA)
+    if erro:
+        return jsonify({'erro': erro[0]}), erro[1]
+    return jsonify({'sucesso': True, 'atualizados': len(dados['categorias'])})
+
+
+@main.route('/api/pictogramas/lote', methods=['PATCH'])
+@login_required
+def api_editar_pictogramas_lote():
+    """Edita vários pictogramas em uma transação - Recebe: { pictogramas: [{ id, campos... }] }"""
+    dados = request.get_json() or {}
+    
+    erro = _aplicar_lote(Pictograma, dados.get('pictogramas'), CAMPOS_LOTE_PICTOGRAMA)
+    if erro:
+        return jsonify({'erro': erro[0]}), erro[1]
+    return jsonify({'sucesso': True, 'atualizados': len(dados['pictogramas'])})
+
+
+# ========== API - QUADRO DE COMUNICAÇÃO ==========
+
+def _montar_quadro():
+    """Monta categorias + pictogramas ativos em uma única consulta"""
+    linhas = db.session.query(Categoria, Pictograma).outerjoin(
+        Pictograma,
+        and_(Pictograma.categoria_id == Categoria.id, Pictograma.ativo == True)
+    ).order_by(
+        Categoria.ordem, Categoria.id, Pictograma.ordem, Pictograma.id
+    ).all()
+
+    categorias = {}
+    for c, p in linhas:
+        if c.id not in categorias:
+            categorias[c.id] = {
+                'id': c.id,
+                'nome': c.nome,
+                'cor': c.cor,
+                'icone': c.icone,
+                'ordem': c.ordem,
+                'pictogramas': []
+            }
+        if p is not None:
+            categorias[c.id]['pictogramas'].append({
+                'id': p.id,
+                'nome': p.nome,
+                'imagem_url': p.imagem_url,
+                'imagem_miniatura_url': url_miniatura(p.imagem_url),
+                'audio_texto': p.audio_texto,
+                'categoria_id': p.categoria_id,
+                'ordem': p.ordem
+            })
+
+    return list(categorias.values())
+
+
+@main.route('/api/quadro', methods=['GET'])
+@ler_da_replica
+def api_obter_quadro():
+    """
+    Retorna o quadro completo (categorias com seus pictogramas)
+    Usa ETag do conteúdo: o tablet revalida e recebe 304 se nada mudou
+    """
+    def carregar():
+        categorias = _montar_quadro()
+        versao = hashlib.sha1(
+            json.dumps(categorias, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        return categorias, versao
+
+    categorias, versao = cache_quadro.obter('quadro', carregar)
+
+    # Ordenação personalizada (opcional): ranking pré-calculado do paciente
+    paciente_id = request.args.get('paciente_id', type=int)
+    if paciente_id:
+        posicoes, versao_ordem = obter_ordem_paciente(paciente_id)
+        if posicoes is not None:
+            categorias = [
+                dict(c, pictogramas=aplicar_ordem(c['pictogramas'], posicoes)) for c in categorias
+            ]
+            versao = hashlib.sha1(f'{versao}:{paciente_id}:{versao_ordem}'.encode('utf-8')).hexdigest()
+
+    # Comparação fraca: com gzip/brotli a ETag enviada ao cliente é W/"..." (ver compressao.py)
+    if request.if_none_match.contains_weak(versao):
+        resposta = current_app.response_class(status=304)
+    else:
+        resposta = jsonify({'versao': versao, 'categorias': categorias})
+
+    resposta.set_etag(versao)
+    resposta.headers['Cache-Control'] = 'no-cache'
+    return resposta
+
+
 # ========== API - SESSÕES ==========
 
+def _ler_intervalo_datas():
+    """
+    Lê data_inicio/data_fim (YYYY-MM-DD) da query string
+    Retorna (inicio, fim_exclusivo) como datetime ou None; levanta ValueError se inválido
+    """
+    inicio = fim = None
+    if request.args.get('data_inicio'):
+        inicio = datetime.strptime(request.args['data_inicio'], '%Y-%m-%d')
+    if request.args.get('data_fim'):
+        fim = datetime.strptime(request.args['data_fim'], '%Y-%m-%d') + timedelta(days=1)
+    return inicio, fim
+
+
+def _codificar_cursor(data_inicio, sessao_id):
+    """Gera o cursor de paginação a partir da última sessão da página"""
+    return f"{data_inicio.isoformat()}|{sessao_id}"
+
+
+def _decodificar_cursor(cursor):
+    """Converte o cursor recebido em (data_inicio, id); levanta ValueError se inválido"""
+    data_iso, sessao_id = cursor.rsplit('|', 1)
+    return datetime.fromisoformat(data_iso), int(sessao_id)
+
+
 @main.route('/api/sessoes', methods=['GET'])
 @login_required
+@ler_da_replica
 def api_listar_sessoes():
-    """Lista todas as sessões"""
-    sessoes = Sessao.query.order_by(desc(Sessao.data_inicio)).all()
+    """
+    Lista sessões com paginação por cursor (data_inicio, id)
+    Filtros: paciente_id, profissional_id, data_inicio, data_fim (YYYY-MM-DD), finalizada
+    """
+    limite = min(max(request.args.get('limite', 50, type=int), 1), 200)
+    cursor = request.args.get('cursor')
+    paciente_id = request.args.get('paciente_id', type=int)
+    profissional_id = request.args.get('profissional_id', type=int)
+    finalizada = request.args.get('finalizada')
+
+    # Sessões finalizadas têm o total em resumo_sessao; só as abertas contam o histórico
+    contagem_aberta = db.session.query(func.count(HistoricoSelecao.id)).filter(
+        HistoricoSelecao.sessao_id == Sessao.id
+    ).correlate(Sessao).scalar_subquery()
+    total_interacoes = func.coalesce(ResumoSessao.total_selecoes, contagem_aberta).label('total_interacoes')
+    query = db.session.query(
+        Sessao,
+        Paciente.nome.label('paciente_nome'),
+        Usuario.nome.label('profissional_nome'),
+        total_interacoes
+    ).join(
+        Paciente, Paciente.id == Sessao.paciente_id
+    ).outerjoin(
+        Usuario, Usuario.id == Sessao.profissional_id
+    ).outerjoin(
+        ResumoSessao, ResumoSessao.sessao_id == Sessao.id
+    )
+
+    if paciente_id:
+        query = query.filter(Sessao.paciente_id == paciente_id)
+    if profissional_id:
+        query = query.filter(Sessao.profissional_id == profissional_id)
+    if finalizada in ('true', 'false'):
+        query = query.filter(Sessao.finalizada == (finalizada == 'true'))
+
+    try:
+        inicio, fim = _ler_intervalo_datas()
+    except ValueError:
+        return jsonify({'erro': 'Datas devem estar no formato YYYY-MM-DD'}), 400
+    if inicio:
+        query = query.filter(Sessao.data_inicio >= inicio)
+    if fim:
+        query = query.filter(Sessao.data_inicio < fim)
+
+    if cursor:
+        try:
+            cursor_data, cursor_id = _decodificar_cursor(cursor)
+        except ValueError:
+            return jsonify({'erro': 'Cursor inválido'}), 400
+        query = query.filter(or_(
+            Sessao.data_inicio < cursor_data,
+            and_(Sessao.data_inicio == cursor_data, Sessao.id < cursor_id)
+        ))
+
+    linhas = query.order_by(
+        desc(Sessao.data_inicio), desc(Sessao.id)
+    ).limit(limite + 1).all()
+
+    tem_mais = len(linhas) > limite
+    linhas = linhas[:limite]
+    proximo_cursor = None
+    if tem_mais:
+        ultima = linhas[-1].Sessao
+        proximo_cursor = _codificar_cursor(ultima.data_inicio, ultima.id)
 
     return jsonify({
         'sessoes': [{
             'id': s.id,
             'paciente_id': s.paciente_id,
-            'paciente_nome': s.paciente.nome,
+            'paciente_nome': paciente_nome,
             'profissional_id': s.profissional_id,
-            'profissional_nome': s.profissional.nome if s.profissional else 'N/A',
+            'profissional_nome': profissional_nome or 'N/A',
             'data_inicio': s.data_inicio.isoformat(),
             'data_fim': s.data_fim.isoformat() if s.data_fim else None,
             'duracao_minutos': s.duracao_minutos,
             'duracao': int((s.data_fim - s.data_inicio).total_seconds()) if (s.finalizada and s.data_fim) else None,
             'avaliacao': s.avaliacao,
             'finalizada': s.finalizada,
-            'total_interacoes': HistoricoSelecao.query.filter_by(sessao_id=s.id).count()
-        } for s in sessoes]
+            'total_interacoes': total
+        } for s, paciente_nome, profissional_nome, total in linhas],
+        'proximo_cursor': proximo_cursor,
+        'tem_mais': tem_mais
     })
 
 
+
+def _abrir_sessao(paciente_id, profissional_id):
+    """
+    Get-or-create atômico da sessão aberta do paciente: INSERT ... ON CONFLICT
+    DO NOTHING no índice parcial ix_sessao_paciente_aberta. Pedidos simultâneos
+    (tablet que dispara duas vezes, dois aparelhos) recebem a mesma sessão.
+    Retorna (sessao_id, criada).
+    """
+    tabela = Sessao.__table__
+    aberta = tabela.c.finalizada == False
+    inserir = INSERTS_COM_CONFLITO.get(db.engine.dialect.name)
+
+    for _ in range(3):
+        if inserir is not None:
+            comando = inserir(tabela).values(
+                paciente_id=paciente_id,
+                profissional_id=profissional_id,
+                data_inicio=datetime.now(),
+                finalizada=False
+            ).on_conflict_do_nothing(index_elements=[tabela.c.paciente_id], index_where=aberta)
+
+            if db.engine.dialect.name == 'postgresql':
+                # RETURNING: sessão nova em uma única ida ao banco
+                sessao_id = db.session.execute(comando.returning(tabela.c.id)).scalar()
+            else:
+                resultado = db.session.execute(comando)
+                sessao_id = resultado.inserted_primary_key[0] if resultado.rowcount else None
+            db.session.commit()
+            if sessao_id is not None:
+                return sessao_id, True
+        else:
+            try:
+                sessao = Sessao(paciente_id=paciente_id, profissional_id=profissional_id)
+                db.session.add(sessao)
+                db.session.commit()
+                return sessao.id, True
+            except IntegrityError:
+                db.session.rollback()
+
+        sessao_id = db.session.query(Sessao.id).filter(
+            Sessao.paciente_id == paciente_id, Sessao.finalizada == False
+        ).scalar()
+        if sessao_id is not None:
+            return sessao_id, False
+        # A sessão existente foi finalizada entre o INSERT e a consulta: tenta de novo
+
+    raise RuntimeError(f'Não foi possível abrir sessão para o paciente {paciente_id}')
+
+
 @main.route('/api/sessoes', methods=['POST'])
 @login_required
 def api_criar_sessao():
-    """Inicia nova sessão"""
+    """Inicia nova sessão (ou devolve a que já está aberta para o paciente)"""
     dados = request.get_json()
     paciente_id = dados.get('paciente_id')
     
     if not paciente_id:
         return jsonify({'erro': 'paciente_id obrigatório'}), 400
     
-    sessao_aberta = Sessao.query.filter_by(paciente_id=paciente_id, finalizada=False).first()
+    sessao_id, criada = _abrir_sessao(paciente_id, session.get('usuario_id'))
     
-    if sessao_aberta:
+    if not criada:
         return jsonify({
             'sucesso': True,
-            'sessao_id': sessao_aberta.id,
+            'sessao_id': sessao_id,
             'mensagem': 'Sessão já estava aberta'
         })
     
-    sessao = Sessao(
-        paciente_id=paciente_id,
-        profissional_id=session.get('usuario_id')
-    )
-    db.session.add(sessao)
-    db.session.commit()
-    
-    return jsonify({'sucesso': True, 'sessao_id': sessao.id}), 201
+    return jsonify({'sucesso': True, 'sessao_id': sessao_id}), 201
+
+
+def _numero(valor):
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+def _validar_selecao(item):
+    """Erro de formato de uma seleção ou None (a existência do pictograma é conferida à parte)"""
+    pictograma_id = item.get('pictograma_id')
+    if not isinstance(pictograma_id, int) or isinstance(pictograma_id, bool) or pictograma_id <= 0:
+        return 'pictograma_id deve ser um id inteiro'
+
+    tempo = item.get('tempo_resposta_segundos')
+    if tempo is not None and not _numero(tempo):
+        return 'tempo_resposta_segundos deve ser um número'
+    return None
+
+
+def _tempo_resposta(item):
+    """Tempo fora de 0..MAX_TEMPO_RESPOSTA (relógio do tablet, aba esquecida aberta) vira nulo"""
+    tempo = item.get('tempo_resposta_segundos')
+    return tempo if tempo is not None and 0 <= tempo <= MAX_TEMPO_RESPOSTA else None
+
+
+def _pictogramas_inexistentes(ids):
+    ids = set(ids)
+    existentes = {pid for (pid,) in db.session.query(Pictograma.id).filter(Pictograma.id.in_(ids))}
+    return sorted(ids - existentes)
 
 
 @main.route('/api/sessoes/<int:sessao_id>/selecao', methods=['POST'])
 @login_required
 def api_registrar_selecao(sessao_id):
     """Registra seleção de pictograma"""
+    sessao = Sessao.query.get_or_404(sessao_id)
     dados = request.get_json()
     pictograma_id = dados.get('pictograma_id')
-    tempo_resposta = dados.get('tempo_resposta_segundos')
     
     if not pictograma_id:
         return jsonify({'erro': 'pictograma_id obrigatório'}), 400
+
+    erro = _validar_selecao(dados)
+    if erro:
+        return jsonify({'erro': erro}), 400
+    if _pictogramas_inexistentes([pictograma_id]):
+        return jsonify({'erro': 'Pictograma não encontrado'}), 400
     
     historico = HistoricoSelecao(
         sessao_id=sessao_id,
         pictograma_id=pictograma_id,
-        tempo_resposta_segundos=tempo_resposta
+        tempo_resposta_segundos=_tempo_resposta(dados)
     )
     
     db.session.add(historico)
+    # Seleção que chega depois da finalização: atualiza os resumos na mesma transação
+    if sessao.finalizada:
+        consolidar_sessao(sessao)
     db.session.commit()
+    servico_predicao.registrar(sessao_id)
+    canal_sessoes.publicar_selecoes(sessao_id, HistoricoSelecao.id == historico.id)
     
     return jsonify({'sucesso': True, 'historico_id': historico.id}), 201
 
 
+@main.route('/api/sessoes/<int:sessao_id>/selecoes', methods=['POST'])
+@login_required
+def api_registrar_selecoes_lote(sessao_id):
+    """
+    Registra um lote de seleções em uma única transação
+    Recebe: { selecoes: [{ evento_id, pictograma_id, tempo_resposta_segundos, atraso_ms }] }
+    Reenvios com evento_id já gravado são ignorados (idempotente). Itens inválidos
+    voltam em `rejeitadas` ({ indice, evento_id, erro }) sem impedir os demais.
+    """
+    sessao = Sessao.query.get_or_404(sessao_id)
+    dados = request.get_json() or {}
+    selecoes = dados.get('selecoes')
+
+    if not isinstance(selecoes, list) or not selecoes:
+        return jsonify({'erro': 'Lista de seleções obrigatória'}), 400
+
+    if len(selecoes) > MAX_SELECOES_LOTE:
+        return jsonify({'erro': f'Máximo de {MAX_SELECOES_LOTE} seleções por lote'}), 400
+
+    agora = datetime.now()
+    novas, rejeitadas = {}, []
+
+    def rejeitar(indice, item, erro):
+        evento_id = item.get('evento_id') if isinstance(item, dict) else None
+        rejeitadas.append({'indice': indice, 'evento_id': evento_id, 'erro': erro})
+
+    for indice, item in enumerate(selecoes):
+        if not isinstance(item, dict) or not item.get('evento_id') or not item.get('pictograma_id'):
+            rejeitar(indice, item, 'Cada seleção precisa de evento_id e pictograma_id')
+            continue
+
+        evento_id = str(item['evento_id'])
+        if len(evento_id) > MAX_EVENTO_ID:
+            rejeitar(indice, item, f'evento_id deve ter no máximo {MAX_EVENTO_ID} caracteres')
+            continue
+
+        erro = _validar_selecao(item)
+        atraso_ms = item.get('atraso_ms') or 0
+        if not erro and not _numero(atraso_ms):
+            erro = 'atraso_ms deve ser um número'
+        if erro:
+            rejeitar(indice, item, erro)
+            continue
+
+        # Relógio do tablet adiantado ou fila mais antiga que o limite: ajusta em vez de perder o toque
+        atraso_ms = min(max(atraso_ms, 0), MAX_ATRASO_MS)
+        novas[evento_id] = {
+            'sessao_id': sessao_id,
+            'pictograma_id': item['pictograma_id'],
+            'tempo_resposta_segundos': _tempo_resposta(item),
+            'timestamp': agora - timedelta(milliseconds=atraso_ms),
+            'evento_id': evento_id,
+            'indice': indice
+        }
+
+    inexistentes = set(_pictogramas_inexistentes(linha['pictograma_id'] for linha in novas.values()))
+    for evento_id, linha in list(novas.items()):
+        if linha['pictograma_id'] in inexistentes:
+            rejeitadas.append({'indice': linha['indice'], 'evento_id': evento_id, 'erro': 'Pictograma não encontrado'})
+            del novas[evento_id]
+    for linha in novas.values():
+        del linha['indice']
+    rejeitadas.sort(key=lambda r: r['indice'])
+
+    def _inserir():
+        existentes = {e for (e,) in db.session.query(HistoricoSelecao.evento_id).filter(
+            HistoricoSelecao.evento_id.in_(list(novas))
+        )}
+        linhas = [linha for evento_id, linha in novas.items() if evento_id not in existentes]
+        if linhas:
+            db.session.execute(HistoricoSelecao.__table__.insert(), linhas)
+        db.session.commit()
+        return len(linhas)
+
+    try:
+        inseridas = _inserir() if novas else 0
+    except IntegrityError:
+        # Outro worker gravou parte do lote ao mesmo tempo; refaz a deduplicação
+        db.session.rollback()
+        inseridas = _inserir()
+
+    if inseridas:
+        servico_predicao.registrar(sessao_id)
+        canal_sessoes.publicar_selecoes(sessao_id, HistoricoSelecao.evento_id.in_(list(novas)))
+        # Fila offline entregue depois da finalização: atualiza os resumos
+        if sessao.finalizada:
+            consolidar_sessao(sessao)
+            db.session.commit()
+
+    return jsonify({
+        'sucesso': True,
+        'recebidas': len(novas),
+        'inseridas': inseridas,
+        'duplicadas': len(novas) - inseridas,
+        'evento_ids': list(novas),
+        'rejeitadas': rejeitadas
+    }), 201
+
+
 @main.route('/api/sessoes/<int:sessao_id>/finalizar', methods=['POST'])
 @login_required
 def api_finalizar_sessao(sessao_id):
@@ -539,20 +1170,92 @@ def api_finalizar_sessao(sessao_id):
     if dados.get('observacoes'):
         sessao.observacoes = dados['observacoes']
     
+    consolidar_sessao(sessao)
+    
+    # Ranking do quadro pré-calculado aqui, não a cada carregamento
+    if sessao.paciente.ordem_personalizada:
+        calcular_ordem_paciente(sessao.paciente_id)
+    
     db.session.commit()
+    canal_sessoes.publicar(sessao_id, [EVENTO_FIM])
     
     return jsonify({'sucesso': True, 'duracao_minutos': sessao.duracao_minutos})
 
 
+def _worker_sincrono():
+    """gunicorn com worker sync: um pedido por vez por processo (wsgi.multithread falso)"""
+    ambiente = request.environ
+    return ambiente.get('SERVER_SOFTWARE', '').startswith('gunicorn') and not ambiente.get('wsgi.multithread')
+
+
+@main.route('/api/sessoes/<int:sessao_id>/ao-vivo', methods=['GET'])
+@login_required
+def api_sessao_ao_vivo(sessao_id):
+    """
+    Acompanha a sessão em tempo real (Server-Sent Events, use EventSource)
+    Eventos: selecao (id = id do histórico, dados como em /historico) e fim
+    Reconexões retomam pelo cabeçalho Last-Event-ID (ou ?desde=<id>)
+    """
+    if _worker_sincrono():
+        return jsonify({'erro': 'Acompanhamento ao vivo requer gunicorn com -k gthread ou gevent'}), 503
+
+    sessao = Sessao.query.get_or_404(sessao_id)
+
+    try:
+        ultimo_id = int(request.headers.get('Last-Event-ID') or request.args.get('desde') or 0)
+    except ValueError:
+        return jsonify({'erro': 'Last-Event-ID inválido'}), 400
+
+    app = current_app._get_current_object()
+    assinatura = None
+    if not sessao.finalizada:
+        assinatura = canal_sessoes.assinar(app, sessao_id)
+        if assinatura is None:
+            return jsonify({'erro': 'Muitas sessões acompanhadas, tente novamente em instantes'}), 503
+
+    resposta = Response(
+        stream_with_context(transmitir(app, sessao_id, ultimo_id, assinatura)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    if assinatura is not None:
+        # Garante a saída do canal mesmo se o corpo nunca chegar a ser lido
+        resposta.call_on_close(lambda: canal_sessoes.cancelar(assinatura))
+    return resposta
+
+
 @main.route('/api/sessoes/<int:sessao_id>/historico', methods=['GET'])
 @login_required
+@ler_da_replica
 def api_obter_historico_sessao(sessao_id):
-    """Obtém histórico de uma sessão"""
+    """Obtém histórico de uma sessão (inclusive de sessões arquivadas)"""
     sessao = Sessao.query.get_or_404(sessao_id)
     
-    historico = HistoricoSelecao.query.filter_by(
+    historico = [{
+        'id': h.id,
+        'pictograma_nome': h.pictograma.nome,
+        'pictograma_imagem': h.pictograma.imagem_url,
+        'categoria_nome': h.pictograma.categoria.nome,
+        'timestamp': h.timestamp.isoformat(),
+        'tempo_resposta_segundos': h.tempo_resposta_segundos
+    } for h in HistoricoSelecao.query.filter_by(
         sessao_id=sessao_id
-    ).order_by(HistoricoSelecao.timestamp).all()
+    ).order_by(HistoricoSelecao.timestamp).all()]
+    
+    arquivadas = selecoes_arquivadas(sessao_id)
+    if arquivadas:
+        pictogramas = {p.id: p for p in Pictograma.query.options(joinedload(Pictograma.categoria)).filter(
+            Pictograma.id.in_({pictograma_id for _, pictograma_id, _, _ in arquivadas})
+        )}
+        historico = sorted([{
+            'id': historico_id,
+            'pictograma_nome': pictogramas[pictograma_id].nome,
+            'pictograma_imagem': pictogramas[pictograma_id].imagem_url,
+            'categoria_nome': pictogramas[pictograma_id].categoria.nome,
+            'timestamp': timestamp.isoformat(),
+            'tempo_resposta_segundos': tempo
+        } for historico_id, pictograma_id, timestamp, tempo in arquivadas] + historico,
+            key=lambda h: h['timestamp'])
     
     return jsonify({
         'sessao_id': sessao.id,
@@ -563,26 +1266,59 @@ def api_obter_historico_sessao(sessao_id):
         'duracao_minutos': sessao.duracao_minutos,
         'avaliacao': sessao.avaliacao,
         'finalizada': sessao.finalizada,
-        'historico': [{
-            'id': h.id,
-            'pictograma_nome': h.pictograma.nome,
-            'pictograma_imagem': h.pictograma.imagem_url,
-            'categoria_nome': h.pictograma.categoria.nome,
-            'timestamp': h.timestamp.isoformat(),
-            'tempo_resposta_segundos': h.tempo_resposta_segundos
-        } for h in historico]
+        'arquivada': arquivadas is not None,
+        'historico': historico
     })
 
 
+# ========== API - EXPORTAÇÃO ==========
+
+@main.route('/api/exportar/selecoes', methods=['GET'])
+@login_required
+@ler_da_replica
+def api_exportar_selecoes():
+    """
+    Exporta o histórico de seleções em streaming
+    Parâmetros: formato (csv|ndjson), paciente_id, profissional_id, data_inicio, data_fim
+    """
+    formato = request.args.get('formato', 'csv')
+    if formato not in ('csv', 'ndjson'):
+        return jsonify({'erro': 'Formato deve ser csv ou ndjson'}), 400
+    
+    try:
+        inicio, fim = _ler_intervalo_datas()
+    except ValueError:
+        return jsonify({'erro': 'Datas devem estar no formato YYYY-MM-DD'}), 400
+    
+    linhas = consulta_exportacao(
+        paciente_id=request.args.get('paciente_id', type=int),
+        profissional_id=request.args.get('profissional_id', type=int),
+        inicio=inicio,
+        fim=fim
+    )
+    
+    if formato == 'csv':
+        gerador, mimetype = gerar_csv(linhas), 'text/csv'
+    else:
+        gerador, mimetype = gerar_ndjson(linhas), 'application/x-ndjson'
+    
+    nome_arquivo = f"selecoes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
+    return Response(
+        stream_with_context(gerador),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={nome_arquivo}'}
+    )
+
+
 # ========== API - UPLOAD DE IMAGEM ==========
 
 @main.route('/api/upload', methods=['POST'])
 @login_required
 def api_upload_imagem():
-    """Upload de imagem para pictograma via Cloudinary ou local"""
-    import os
-    from flask import current_app
-
+    """
+    Recebe a imagem do pictograma e agenda o envio (Cloudinary ou local)
+    Retorna 202 com tarefa_id; o status é consultado em /api/upload/<tarefa_id>
+    """
     if 'imagem' not in request.files:
         return jsonify({'erro': 'Nenhuma imagem enviada'}), 400
 
@@ -597,55 +1333,105 @@ def api_upload_imagem():
     if extensao not in extensoes_permitidas:
         return jsonify({'erro': 'Formato não permitido'}), 400
 
-    # Verificar se Cloudinary está configurado
-    cloudinary_configured = all([
-        current_app.config.get('CLOUDINARY_CLOUD_NAME'),
-        current_app.config.get('CLOUDINARY_API_KEY'),
-        current_app.config.get('CLOUDINARY_API_SECRET')
-    ])
+    tarefa = fila_uploads.enviar(current_app._get_current_object(), arquivo.read(), extensao)
+    if tarefa is None:
+        return jsonify({'erro': 'Muitos uploads em andamento, tente novamente em instantes'}), 503
 
-    if cloudinary_configured:
-        # Usar Cloudinary (produção)
-        try:
-            import cloudinary
-            import cloudinary.uploader
-
-            cloudinary.config(
-                cloud_name=current_app.config.get('CLOUDINARY_CLOUD_NAME'),
-                api_key=current_app.config.get('CLOUDINARY_API_KEY'),
-                api_secret=current_app.config.get('CLOUDINARY_API_SECRET')
-            )
-
-            resultado = cloudinary.uploader.upload(
-                arquivo,
-                folder='pictogramas_caa',
-                resource_type='image',
-                transformation=[
-                    {'width': 500, 'height': 500, 'crop': 'limit'},
-                    {'quality': 'auto:good'}
-                ]
-            )
-
-            url = resultado['secure_url']
-            return jsonify({'sucesso': True, 'url': url})
-
-        except Exception as e:
-            return jsonify({'erro': f'Erro ao fazer upload no Cloudinary: {str(e)}'}), 500
-    else:
-        # Usar armazenamento local (desenvolvimento)
-        try:
-            nome_arquivo = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{arquivo.filename}"
-            pasta_uploads = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'app', 'static', 'images')
-            os.makedirs(pasta_uploads, exist_ok=True)
+    return jsonify({
+        'sucesso': True,
+        'tarefa_id': tarefa.id,
+        'status': tarefa.status
+    }), 202
+
+
+@main.route('/api/upload/<tarefa_id>', methods=['GET'])
+@login_required
+def api_status_upload(tarefa_id):
+    """Status de um upload: pendente, processando, concluido ou erro"""
+    tarefa = fila_uploads.consultar(tarefa_id, current_app.config['UPLOAD_TEMPO_MAXIMO'])
+    if tarefa is None:
+        return jsonify({'erro': 'Tarefa não encontrada'}), 404
 
-            caminho_completo = os.path.join(pasta_uploads, nome_arquivo)
-            arquivo.save(caminho_completo)
+    return jsonify({
+        'tarefa_id': tarefa.id,
+        'status': tarefa.status,
+        'url': tarefa.url,
+        'miniatura_url': tarefa.miniatura_url,
+        'erro': tarefa.erro
+    })
 
-            url = f"/static/images/{nome_arquivo}"
-            return jsonify({'sucesso': True, 'url': url})
 
-        except Exception as e:
-            return jsonify({'erro': f'Erro ao salvar arquivo localmente: {str(e)}'}), 500
+# ========== API - BIBLIOTECA (IMPORTAR/EXPORTAR) ==========
+
+@main.route('/api/biblioteca/importar', methods=['POST'])
+@login_required
+def api_importar_biblioteca():
+    """
+    Importa um .zip com manifesto.json e imagens (formato em biblioteca.py)
+    Confere o arquivo e retorna 202 com tarefa_id; a importação roda na fila de
+    uploads e o relatório é consultado em /api/biblioteca/importar/<tarefa_id>
+    Limitado a MAX_CONTENT_LENGTH; bibliotecas grandes: python gerenciar_biblioteca.py importar
+    """
+    if 'arquivo' not in request.files:
+        return jsonify({'erro': 'Nenhum arquivo enviado'}), 400
+
+    conteudo = request.files['arquivo'].read()
+    try:
+        verificar_biblioteca(io.BytesIO(conteudo))
+    except (ValueError, zipfile.BadZipFile) as e:
+        return jsonify({'erro': f'Arquivo inválido: {e}'}), 400
+
+    tarefa = fila_uploads.agendar(
+        current_app._get_current_object(), importar_em_tarefa, conteudo, current_app.config
+    )
+    if tarefa is None:
+        return jsonify({'erro': 'Muitos uploads em andamento, tente novamente em instantes'}), 503
+
+    return jsonify({
+        'sucesso': True,
+        'tarefa_id': tarefa.id,
+        'status': tarefa.status
+    }), 202
+
+
+@main.route('/api/biblioteca/importar/<tarefa_id>', methods=['GET'])
+@login_required
+def api_status_importacao(tarefa_id):
+    """Status da importação; com erro, nada foi gravado"""
+    tarefa = fila_uploads.consultar(tarefa_id, current_app.config['UPLOAD_TEMPO_MAXIMO'])
+    if tarefa is None:
+        return jsonify({'erro': 'Tarefa não encontrada'}), 404
+
+    return jsonify({
+        'tarefa_id': tarefa.id,
+        'status': tarefa.status,
+        'relatorio': json.loads(tarefa.resultado) if tarefa.resultado else None,
+        'erro': tarefa.erro
+    })
+
+
+@main.route('/api/biblioteca/exportar', methods=['GET'])
+@login_required
+def api_exportar_biblioteca():
+    """
+    Baixa a biblioteca atual em .zip - Parâmetros: baixar_remotas=1, inativos=1
+    Downloads remotos limitados por TEMPO_MAX_DOWNLOADS; bibliotecas grandes:
+    python gerenciar_biblioteca.py exportar --baixar-remotas
+    """
+    arquivo = tempfile.TemporaryFile()
+    exportar_biblioteca(
+        arquivo,
+        baixar_remotas=request.args.get('baixar_remotas') == '1',
+        incluir_inativos=request.args.get('inativos') == '1'
+    )
+    arquivo.seek(0)
+
+    return send_file(
+        arquivo,
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name=f"biblioteca_{datetime.now().strftime('%Y%m%d')}.zip"
+    )
 
 
 # ========== API - HEALTH CHECK ==========
@@ -659,3 +1445,12 @@ def api_health():
         'versao': '2.0.0',
         'sistema': 'CAA - Instituto Tia Dani'
     })
+
+
+@main.route('/api/metrics', methods=['GET'])
+def api_metricas():
+    """Métricas do worker no formato texto do Prometheus"""
+    return Response(
+        registro_metricas.formato_prometheus(),
+        mimetype='text/plain; version=0.0.4'
+    )
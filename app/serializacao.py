@@ -0,0 +1,71 @@
+"""
+serializacao.py
+Provedores de JSON da aplicação (orjson quando disponível)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ProvedorJSONPadrao(DefaultJSONProvider):
+    """
+    json da biblioteca padrão, sem escapar acentos. compact vem de JSON_COMPACTO:
+    None = indentado só em modo debug (comportamento do Flask)
+    """
+
+    ensure_ascii = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.compact = app.config.get('JSON_COMPACTO')
+
+
+class ProvedorORJSON(ProvedorJSONPadrao):
+    """
+    orjson: serializa em bytes e em C. Datas e Decimal continuam passando pelo
+    conversor do Flask (default), então a saída tem os mesmos valores da padrão;
+    só a ordem das chaves e o espaçamento mudam.
+    """
+
+    OPCOES = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return self._serializar(obj, kwargs.get('indent') is not None).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def _serializar(self, obj, indentado):
+        opcoes = self.OPCOES | (orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS if indentado else 0)
+        return orjson.dumps(obj, default=self.default, option=opcoes)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indentado = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(
+            self._serializar(obj, indentado) + b'\n',
+            mimetype=self.mimetype
+        )
+
+
+PROVEDORES = {
+    'padrao': ProvedorJSONPadrao,
+    'orjson': ProvedorORJSON
+}
+
+
+def criar_provedor_json(app):
+    """Escolhe pelo JSON_PROVEDOR (auto|orjson|padrao); auto usa orjson se instalado"""
+    nome = app.config.get('JSON_PROVEDOR', 'auto')
+    if nome == 'auto':
+        nome = 'orjson' if orjson is not None else 'padrao'
+    if nome not in PROVEDORES:
+        raise ValueError(f'JSON_PROVEDOR desconhecido: {nome}')
+    if nome == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_PROVEDOR=orjson, mas o pacote orjson não está instalado')
+    return PROVEDORES[nome](app)
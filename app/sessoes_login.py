@@ -0,0 +1,277 @@
+"""
+sessoes_login.py
+Sessão de login no servidor (um arquivo por sessão) e perfil do usuário em cache
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+Com SESSION_TYPE = 'filesystem', o cookie leva só um identificador aleatório e
+os dados da sessão ficam em SESSION_FILE_DIR, visíveis para todos os workers
+da máquina. O perfil do usuário logado (nome, login, cargo, ativo) fica em
+cache por SESSAO_PERFIL_VALIDADE segundos, então login_required e
+/api/usuario/atual não consultam a tabela usuario a cada requisição.
+Alterar ou desativar um Usuario pelo ORM descarta o perfil após o commit;
+UPDATEs em massa (query.update) só valem quando o cache expira.
+"""
+
+import json
+import os
+import re
+import secrets
+import tempfile
+import threading
+import time
+from flask import g, session
+from flask.sessions import SessionInterface, SessionMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from werkzeug.datastructures import CallbackDict
+
+FORMATO_SID = re.compile(r'[A-Za-z0-9_-]{43}')
+RENOVAR_APOS = 60  # Segundos entre renovações do prazo de uma sessão em uso
+LIMPEZA_INTERVALO = 600  # Segundos entre varreduras de sessões expiradas (por processo)
+CAMPOS_PERFIL = ('id', 'nome', 'login', 'cargo', 'ativo')
+
+
+def _ler_json(caminho):
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_json(caminho, dados):
+    """Grava num temporário e renomeia: outro worker nunca lê um arquivo pela metade"""
+    pasta = os.path.dirname(caminho)
+    fd, temporario = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False)
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+def _apagar(caminho):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+
+class SessaoArquivo(CallbackDict, SessionMixin):
+    """Dados de uma sessão; `sid` é None até a primeira gravação"""
+
+    def __init__(self, dados=None, sid=None):
+        def ao_mudar(sessao):
+            sessao.modified = True
+
+        super().__init__(dados, ao_mudar)
+        self.sid = sid
+        self.usuario_original = self.get('usuario_id')
+        self.modified = False
+
+
+class InterfaceSessaoArquivos(SessionInterface):
+    """
+    Um JSON por sessão em `pasta`. A sessão expira após
+    PERMANENT_SESSION_LIFETIME sem uso; o arquivo só é regravado quando os
+    dados mudam.
+    """
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self._proxima_limpeza = 0
+        os.makedirs(pasta, exist_ok=True)
+
+    def _caminho(self, sid):
+        return os.path.join(self.pasta, sid + '.json')
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and FORMATO_SID.fullmatch(sid):
+            caminho = self._caminho(sid)
+            try:
+                idade = time.time() - os.path.getmtime(caminho)
+            except OSError:
+                idade = None
+
+            if idade is not None and idade < app.permanent_session_lifetime.total_seconds():
+                dados = _ler_json(caminho)
+                if dados is not None:
+                    if idade > RENOVAR_APOS:
+                        try:
+                            os.utime(caminho)
+                        except OSError:
+                            pass
+                    return SessaoArquivo(dados, sid)
+        return SessaoArquivo()
+
+    def save_session(self, app, session, response):
+        nome = self.get_cookie_name(app)
+        dominio = self.get_cookie_domain(app)
+        caminho_cookie = self.get_cookie_path(app)
+
+        if not session:
+            if session.sid and session.modified:
+                _apagar(self._caminho(session.sid))
+                response.delete_cookie(nome, domain=dominio, path=caminho_cookie)
+            return
+
+        if not session.modified:
+            return
+
+        # Identificador novo a cada login ou troca de usuário (evita fixação de sessão)
+        if session.sid is None or session.get('usuario_id') != session.usuario_original:
+            if session.sid:
+                _apagar(self._caminho(session.sid))
+            session.sid = secrets.token_urlsafe(32)
+
+        _gravar_json(self._caminho(session.sid), dict(session))
+        response.set_cookie(
+            nome, session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=dominio,
+            path=caminho_cookie,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+        response.vary.add('Cookie')
+
+        if time.time() >= self._proxima_limpeza:
+            self._proxima_limpeza = time.time() + LIMPEZA_INTERVALO
+            self.limpar_expiradas(app.permanent_session_lifetime.total_seconds())
+
+    def limpar_expiradas(self, validade):
+        """Remove sessões sem uso há mais de `validade` segundos e temporários órfãos"""
+        limite = time.time() - validade
+        removidas = 0
+        for entrada in os.scandir(self.pasta):
+            if not entrada.is_file() or not entrada.name.endswith(('.json', '.tmp')):
+                continue
+            try:
+                if entrada.stat().st_mtime < limite:
+                    os.remove(entrada.path)
+                    removidas += 1
+            except OSError:
+                pass
+        return removidas
+
+
+class CachePerfis:
+    """
+    Perfil do usuário por id, com validade. Em disco (compartilhado pelos
+    workers) quando há pasta configurada; senão, em memória do processo.
+    """
+
+    def __init__(self):
+        self.pasta = None
+        self.validade = 300
+        self._memoria = {}
+        self._lock = threading.Lock()
+
+    def configurar(self, pasta, validade):
+        self.pasta = pasta
+        self.validade = validade
+        self._memoria.clear()
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+    def _caminho(self, usuario_id):
+        return os.path.join(self.pasta, f'{int(usuario_id)}.json')
+
+    def _ler(self, usuario_id):
+        if self.pasta is None:
+            with self._lock:
+                instante, perfil = self._memoria.get(usuario_id, (0, None))
+            return perfil if time.time() - instante < self.validade else None
+
+        caminho = self._caminho(usuario_id)
+        try:
+            if time.time() - os.path.getmtime(caminho) >= self.validade:
+                return None
+        except OSError:
+            return None
+        return _ler_json(caminho)
+
+    def guardar(self, usuario):
+        perfil = {campo: getattr(usuario, campo) for campo in CAMPOS_PERFIL}
+        if self.pasta is None:
+            with self._lock:
+                self._memoria[usuario.id] = (time.time(), perfil)
+        else:
+            _gravar_json(self._caminho(usuario.id), perfil)
+        return perfil
+
+    def obter(self, usuario_id):
+        """Perfil do cache ou, na falta, do banco; None se o usuário não existe"""
+        perfil = self._ler(usuario_id)
+        if perfil is not None:
+            return perfil
+
+        from app.models import Usuario
+        usuario = Usuario.query.get(usuario_id)
+        if not usuario:
+            return None
+        return self.guardar(usuario)
+
+    def invalidar(self, usuario_id):
+        if self.pasta is None:
+            with self._lock:
+                self._memoria.pop(usuario_id, None)
+        else:
+            _apagar(self._caminho(usuario_id))
+
+
+cache_perfis = CachePerfis()
+
+
+def usuario_logado():
+    """
+    Perfil do usuário da sessão, ou None (sem login, usuário removido ou
+    desativado; nos dois últimos casos a sessão é encerrada)
+    """
+    if 'usuario' in g:
+        return g.usuario
+    if 'usuario_id' not in session:
+        return None
+
+    perfil = cache_perfis.obter(session['usuario_id'])
+    if not perfil or not perfil['ativo']:
+        session.clear()
+        perfil = None
+    g.usuario = perfil
+    return perfil
+
+
+def _anotar_usuarios(sessao_db, contexto):
+    from app.models import Usuario
+    ids = {obj.id for obj in list(sessao_db.dirty) + list(sessao_db.deleted) if isinstance(obj, Usuario)}
+    if ids:
+        sessao_db.info.setdefault('usuarios_alterados', set()).update(ids)
+
+
+def _invalidar_apos_commit(sessao_db):
+    # Só depois do commit: antes disso, outra requisição poderia reler o valor antigo
+    for usuario_id in sessao_db.info.pop('usuarios_alterados', ()):
+        cache_perfis.invalidar(usuario_id)
+
+
+def _descartar_anotacoes(sessao_db, transacao_anterior):
+    sessao_db.info.pop('usuarios_alterados', None)
+
+
+event.listen(Session, 'after_flush', _anotar_usuarios)
+event.listen(Session, 'after_commit', _invalidar_apos_commit)
+event.listen(Session, 'after_soft_rollback', _descartar_anotacoes)
+
+
+def init_sessoes(app):
+    """Sessão em arquivos quando SESSION_TYPE = 'filesystem'; senão, cookie assinado do Flask"""
+    if app.config.get('SESSION_TYPE') == 'filesystem':
+        pasta = app.config['SESSION_FILE_DIR']
+        app.session_interface = InterfaceSessaoArquivos(pasta)
+        cache_perfis.configurar(os.path.join(pasta, 'perfis'), app.config.get('SESSAO_PERFIL_VALIDADE', 300))
+    else:
+        cache_perfis.configurar(None, app.config.get('SESSAO_PERFIL_VALIDADE', 300))
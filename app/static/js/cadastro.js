@@ -0,0 +1,75 @@
+/**
+ * Página de cadastro de novo profissional
+ */
+
+document.getElementById('cadastroForm').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const nome = document.getElementById('nome').value.trim();
+    const cargo = document.getElementById('cargo').value;
+    const login = document.getElementById('login').value.trim();
+    const senha = document.getElementById('senha').value.trim();
+    const confirmarSenha = document.getElementById('confirmarSenha').value.trim();
+
+    const btnSubmit = e.target.querySelector('button[type="submit"]');
+    const msgDiv = document.getElementById('mensagem');
+
+    // Validações
+    if (senha !== confirmarSenha) {
+        msgDiv.textContent = 'As senhas não coincidem';
+        msgDiv.className = 'alert alert-error';
+        msgDiv.style.display = 'block';
+        return;
+    }
+
+    if (!/^\d{4,}$/.test(senha)) {
+        msgDiv.textContent = 'A senha deve conter apenas números (mínimo 4 dígitos)';
+        msgDiv.className = 'alert alert-error';
+        msgDiv.style.display = 'block';
+        return;
+    }
+
+    msgDiv.style.display = 'none';
+    btnSubmit.disabled = true;
+    btnSubmit.innerHTML = '<span>Cadastrando...</span>';
+
+    try {
+        const response = await fetch('/api/cadastro', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ nome, cargo, login, senha })
+        });
+
+        const data = await response.json();
+
+        if (data.sucesso) {
+            msgDiv.textContent = 'Cadastro realizado com sucesso! Redirecionando...';
+            msgDiv.className = 'alert alert-success';
+            msgDiv.style.display = 'block';
+
+            setTimeout(() => {
+                window.location.href = '/';
+            }, 1500);
+        } else {
+            msgDiv.textContent = data.erro || 'Erro ao cadastrar';
+            msgDiv.className = 'alert alert-error';
+            msgDiv.style.display = 'block';
+        }
+    } catch (error) {
+        console.error('Erro:', error);
+        msgDiv.textContent = 'Erro de conexão. Tente novamente.';
+        msgDiv.className = 'alert alert-error';
+        msgDiv.style.display = 'block';
+    } finally {
+        btnSubmit.disabled = false;
+        btnSubmit.innerHTML = `
+            <span>Criar Conta</span>
+            <svg width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+                <path d="M16 21v-2a4 4 0 0 0-4-4H5a4 4 0 0 0-4 4v2"/>
+                <circle cx="8.5" cy="7" r="4"/>
+                <line x1="20" y1="8" x2="20" y2="14"/>
+                <line x1="23" y1="11" x2="17" y2="11"/>
+            </svg>
+        `;
+    }
+});
@@ -0,0 +1,476 @@
+/**
+ * Tela de comunicação: quadro de pictogramas e registro das seleções
+ * Espera PACIENTE_ID definido pelo template
+ */
+
+let sessaoId = null;
+let categorias = [];
+let pictogramas = [];
+let categoriaAtual = null;
+let vozAtivada = true;
+let tempoInicio = null;
+let ultimoToque = null;  // Referência do tempo de resposta: início da sessão ou toque anterior
+let timerInterval = null;
+
+// Inicializar ao carregar página
+window.addEventListener('DOMContentLoaded', async () => {
+    await iniciarSessao();
+    await carregarCategorias();
+    atualizarSugestoes();
+    iniciarTimer();
+});
+
+async function iniciarSessao() {
+    try {
+        const response = await fetch('/api/sessoes', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ paciente_id: PACIENTE_ID })
+        });
+        const data = await response.json();
+        sessaoId = data.sessao_id;
+        tempoInicio = Date.now();
+        ultimoToque = tempoInicio;
+
+        // Envia toques que ficaram pendentes de uma visita anterior
+        enviarFila();
+    } catch (error) {
+        console.error('Erro ao iniciar sessão:', error);
+    }
+}
+
+async function carregarCategorias() {
+    try {
+        // Quadro completo em uma requisição; o navegador revalida via ETag (304)
+        const response = await fetch(`/api/quadro?paciente_id=${PACIENTE_ID}`);
+        const data = await response.json();
+        categorias = data.categorias;
+
+        renderizarCategorias();
+
+        if (categorias.length > 0) {
+            selecionarCategoria(categorias[0].id);
+        }
+    } catch (error) {
+        console.error('Erro ao carregar categorias:', error);
+    }
+}
+
+function renderizarCategorias() {
+    const tabs = document.getElementById('categoriasTabs');
+    tabs.innerHTML = categorias.map(cat => `
+        <button class="categoria-tab" 
+                style="background-color: ${cat.cor}"
+                onclick="selecionarCategoria(${cat.id})"
+                data-categoria-id="${cat.id}">
+            <span class="categoria-icone">${cat.icone}</span>
+            <span class="categoria-nome">${cat.nome}</span>
+        </button>
+    `).join('');
+}
+
+function selecionarCategoria(categoriaId) {
+    categoriaAtual = categoriaId;
+
+    document.querySelectorAll('.categoria-tab').forEach(tab => {
+        tab.classList.remove('active');
+        if (parseInt(tab.dataset.categoriaId) === categoriaId) {
+            tab.classList.add('active');
+        }
+    });
+
+    // Pictogramas já vieram no quadro: trocar de aba não faz requisição
+    const categoria = categorias.find(cat => cat.id === categoriaId);
+    pictogramas = categoria ? categoria.pictogramas : [];
+    renderizarPictogramas();
+}
+
+function renderizarPictogramas() {
+    const area = document.getElementById('pictogramasArea');
+
+    if (pictogramas.length === 0) {
+        area.innerHTML = '<p style="text-align: center; color: var(--gray-400); padding: 40px;">Nenhum pictograma nesta categoria</p>';
+        return;
+    }
+
+    area.innerHTML = pictogramas.map(cardPictograma).join('');
+}
+
+function cardPictograma(pict) {
+    return `
+        <div class="pictograma-card" onclick="clicarPictograma(event, ${pict.id}, '${pict.nome}', '${pict.audio_texto}')">
+            <div class="pictograma-imagem">
+                <img src="${pict.imagem_miniatura_url || pict.imagem_url}" alt="${pict.nome}" loading="lazy" 
+                     onerror="this.style.display='none'; this.parentElement.innerHTML='<span style=\\'font-size:3rem\\'>📷</span>'">
+            </div>
+            <div class="pictograma-nome">${pict.nome}</div>
+        </div>
+    `;
+}
+
+// ========== SUGESTÕES (PREDIÇÃO DO PRÓXIMO PICTOGRAMA) ==========
+let ultimasSelecoes = [];
+
+function buscarPictogramaNoQuadro(pictogramaId) {
+    for (const cat of categorias) {
+        const pict = cat.pictogramas.find(p => p.id === pictogramaId);
+        if (pict) return pict;
+    }
+    return null;
+}
+
+// Toques em sequência geram um único pedido de sugestões
+const ESPERA_SUGESTOES_MS = 800;
+let timerSugestoes = null;
+
+function agendarSugestoes() {
+    clearTimeout(timerSugestoes);
+    timerSugestoes = setTimeout(atualizarSugestoes, ESPERA_SUGESTOES_MS);
+}
+
+async function atualizarSugestoes() {
+    const area = document.getElementById('sugestoesArea');
+    if (!navigator.onLine) return;
+
+    try {
+        const response = await fetch(`/api/pacientes/${PACIENTE_ID}/predicao?k=6&contexto=${ultimasSelecoes.join(',')}`);
+        const data = await response.json();
+
+        // Ignora pictogramas que não estão mais ativos no quadro
+        const sugeridos = (data.sugestoes || [])
+            .map(s => buscarPictogramaNoQuadro(s.pictograma_id))
+            .filter(Boolean);
+
+        area.innerHTML = sugeridos.map(cardPictograma).join('');
+        area.style.display = sugeridos.length > 0 ? 'grid' : 'none';
+    } catch (error) {
+        console.error('Erro ao carregar sugestões:', error);
+    }
+}
+
+async function clicarPictograma(event, pictogramaId, nome, audioTexto) {
+    const tempoClique = Date.now();
+    const tempoResposta = (tempoClique - ultimoToque) / 1000;
+    ultimoToque = tempoClique;
+
+    // Feedback visual
+    const card = event?.currentTarget || event?.target?.closest('.pictograma-card');
+    if (card) {
+        card.classList.add('clicked');
+        setTimeout(() => {
+            card.classList.remove('clicked');
+        }, 300);
+    }
+
+    // Fala o texto (se voz ativada) - precisa ser após interação do usuário
+    if (vozAtivada) {
+        console.log('Tentando falar:', audioTexto);
+        try {
+            falar(audioTexto);
+        } catch (error) {
+            console.error('Erro ao reproduzir áudio:', error);
+            showAlert('Erro ao reproduzir áudio: ' + error.message, 'error');
+        }
+    } else {
+        console.log('Voz desativada - não falando');
+    }
+
+    // Registra na fila local (enviada em lotes)
+    enfileirarSelecao(pictogramaId, tempoResposta, tempoClique);
+
+    ultimasSelecoes = ultimasSelecoes.concat(pictogramaId).slice(-2);
+    agendarSugestoes();
+}
+
+// ========== FILA DE SELEÇÕES (OFFLINE) ==========
+// Os toques ficam no localStorage e são enviados em lote para
+// /api/sessoes/<id>/selecoes; o evento_id evita duplicar reenvios.
+const TAMANHO_LOTE = 20;
+const INTERVALO_ENVIO_MS = 3000;
+let envioEmAndamento = null;
+let ultimoAvisoFila = null;
+
+function chaveFila() {
+    return `filaSelecoes_${sessaoId}`;
+}
+
+function lerFila(chave = chaveFila()) {
+    try {
+        return JSON.parse(localStorage.getItem(chave)) || [];
+    } catch (error) {
+        return [];
+    }
+}
+
+function gravarFila(fila, chave = chaveFila()) {
+    try {
+        localStorage.setItem(chave, JSON.stringify(fila));
+    } catch (error) {
+        console.error('Erro ao gravar fila de seleções:', error);
+    }
+}
+
+function gerarEventoId() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+}
+
+function enfileirarSelecao(pictogramaId, tempoResposta, tempoClique) {
+    const fila = lerFila();
+    fila.push({
+        evento_id: gerarEventoId(),
+        pictograma_id: pictogramaId,
+        tempo_resposta_segundos: tempoResposta,
+        momento: tempoClique
+    });
+    gravarFila(fila);
+
+    if (fila.length >= TAMANHO_LOTE) {
+        enviarFila();
+    }
+}
+
+function avisarFila(mensagem) {
+    // Um aviso por problema, não um a cada tentativa
+    if (mensagem !== ultimoAvisoFila) {
+        ultimoAvisoFila = mensagem;
+        showAlert(mensagem, 'warning');
+    }
+}
+
+function guardarRejeitadas(lote, rejeitadas) {
+    // Toques recusados pelo servidor ficam guardados à parte (não somem nem travam a fila)
+    const chave = `selecoesRejeitadas_${sessaoId}`;
+    const porEvento = new Map(rejeitadas.map(r => [r.evento_id, r.erro]));
+    const itens = lote.filter(item => porEvento.has(item.evento_id))
+        .map(item => ({ ...item, erro: porEvento.get(item.evento_id) }));
+    gravarFila(lerFila(chave).concat(itens), chave);
+
+    console.error('Seleções recusadas pelo servidor:', rejeitadas);
+    avisarFila(`${rejeitadas.length} toque(s) recusado(s) pelo servidor e guardado(s) neste aparelho`);
+}
+
+async function esvaziarFila() {
+    let fila = lerFila();
+    while (fila.length > 0) {
+        const lote = fila.slice(0, TAMANHO_LOTE);
+        const agora = Date.now();
+
+        const response = await fetch(`/api/sessoes/${sessaoId}/selecoes`, {
+            method: 'POST',
+            keepalive: true,
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                selecoes: lote.map(item => ({
+                    evento_id: item.evento_id,
+                    pictograma_id: item.pictograma_id,
+                    tempo_resposta_segundos: item.tempo_resposta_segundos,
+                    atraso_ms: agora - item.momento
+                }))
+            })
+        });
+
+        // Qualquer erro do pedido inteiro (servidor, sessão expirada ou removida):
+        // o lote fica na fila e é reenviado na próxima tentativa
+        if (!response.ok) {
+            const detalhe = await response.text();
+            console.error(`Lote de seleções não aceito (HTTP ${response.status}):`, detalhe);
+            if (response.status !== 401 && response.status < 500) {
+                avisarFila(`Toques ainda não registrados (erro ${response.status}); continuam guardados neste aparelho`);
+            }
+            break;
+        }
+
+        const data = await response.json();
+        if (data.rejeitadas && data.rejeitadas.length > 0) {
+            guardarRejeitadas(lote, data.rejeitadas);
+        }
+        ultimoAvisoFila = null;
+
+        const enviados = new Set(lote.map(item => item.evento_id));
+        fila = lerFila().filter(item => !enviados.has(item.evento_id));
+        gravarFila(fila);
+    }
+}
+
+function enviarFila() {
+    // Um envio por vez; quem chama durante um envio recebe a mesma promise
+    if (envioEmAndamento || !sessaoId || !navigator.onLine) {
+        return envioEmAndamento || Promise.resolve();
+    }
+
+    envioEmAndamento = esvaziarFila()
+        .catch(error => console.error('Erro ao enviar seleções (ficam na fila):', error))
+        .finally(() => { envioEmAndamento = null; });
+    return envioEmAndamento;
+}
+
+setInterval(enviarFila, INTERVALO_ENVIO_MS);
+window.addEventListener('online', enviarFila);
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') {
+        enviarFila();
+    }
+});
+
+function falar(texto) {
+    if (!texto) {
+        console.warn('Texto vazio, não há o que falar');
+        return;
+    }
+
+    try {
+        // Força o cancelamento completo
+        window.speechSynthesis.cancel();
+
+        // Aguarda um momento para garantir que cancelou
+        setTimeout(() => {
+            try {
+                const utterance = new SpeechSynthesisUtterance(texto);
+                utterance.lang = 'pt-BR';
+                utterance.rate = 0.9;
+                utterance.pitch = 1.1;
+                utterance.volume = 1.0;
+
+                utterance.onstart = () => {
+                    console.log('Iniciou fala:', texto);
+                };
+
+                utterance.onend = () => {
+                    console.log('Finalizou fala:', texto);
+                };
+
+                utterance.onerror = (event) => {
+                    console.error('Erro na síntese de voz:', event);
+                    // Tenta reinicializar em caso de erro
+                    window.speechSynthesis.cancel();
+                };
+
+                // Verifica se o navegador está pronto
+                if (window.speechSynthesis.speaking) {
+                    console.warn('Ainda falando, forçando parada...');
+                    window.speechSynthesis.cancel();
+                    setTimeout(() => window.speechSynthesis.speak(utterance), 200);
+                } else {
+                    window.speechSynthesis.speak(utterance);
+                }
+            } catch (innerError) {
+                console.error('Erro interno ao falar:', innerError);
+            }
+        }, 150);
+    } catch (error) {
+        console.error('Erro ao inicializar síntese de voz:', error);
+    }
+}
+
+// Inicializar o sintetizador de voz quando a página carregar
+// Isso ajuda em alguns navegadores
+(function inicializarVoz() {
+    try {
+        // Força o carregamento das vozes
+        const voices = window.speechSynthesis.getVoices();
+        console.log('Vozes disponíveis:', voices.length);
+
+        // Alguns navegadores precisam de um evento extra
+        if (window.speechSynthesis.onvoiceschanged !== undefined) {
+            window.speechSynthesis.onvoiceschanged = () => {
+                const voicesUpdated = window.speechSynthesis.getVoices();
+                console.log('Vozes atualizadas:', voicesUpdated.length);
+            };
+        }
+    } catch (error) {
+        console.error('Erro ao inicializar vozes:', error);
+    }
+})();
+
+function toggleVoz() {
+    vozAtivada = !vozAtivada;
+    const btn = document.getElementById('btnVoz');
+    btn.textContent = vozAtivada ? '🔊 Voz Ativada' : '🔇 Voz Desativada';
+    btn.classList.toggle('active');
+
+    // Reiniciar síntese ao ativar/desativar
+    window.speechSynthesis.cancel();
+}
+
+// Sistema de proteção contra travamento de áudio
+// Verifica a cada 5 segundos se há fala presa e limpa
+setInterval(() => {
+    if (window.speechSynthesis.speaking) {
+        console.log('Verificação: Síntese de voz ainda ativa');
+    }
+}, 5000);
+
+function iniciarTimer() {
+    const timerEl = document.getElementById('timer');
+    timerInterval = setInterval(() => {
+        const segundos = Math.floor((Date.now() - tempoInicio) / 1000);
+        const mins = Math.floor(segundos / 60);
+        const segs = segundos % 60;
+        timerEl.textContent = `${String(mins).padStart(2, '0')}:${String(segs).padStart(2, '0')}`;
+    }, 1000);
+}
+
+function abrirModalFinalizar() {
+    document.getElementById('modalFinalizar').style.display = 'flex';
+    document.getElementById('avaliacao').focus();
+}
+
+function fecharModalFinalizar() {
+    document.getElementById('modalFinalizar').style.display = 'none';
+}
+
+document.getElementById('formFinalizar').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const avaliacao = document.getElementById('avaliacao').value.trim();
+    const observacoes = document.getElementById('observacoes').value.trim();
+
+    if (!avaliacao) {
+        showAlert('A avaliação é obrigatória!', 'warning');
+        return;
+    }
+
+    clearInterval(timerInterval);
+
+    // Espera o envio em andamento e manda o que sobrou antes de finalizar
+    await enviarFila();
+    await enviarFila();
+    const pendentes = lerFila().length;
+    if (pendentes > 0) {
+        showAlert(`${pendentes} toque(s) ainda não foram enviados. Verifique a conexão e tente finalizar de novo.`, 'error');
+        iniciarTimer();
+        return;
+    }
+
+    try {
+        const response = await fetch(`/api/sessoes/${sessaoId}/finalizar`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ avaliacao, observacoes })
+        });
+
+        const data = await response.json();
+
+        if (data.sucesso) {
+            showAlert(`Sessão finalizada com sucesso!\nDuração: ${data.duracao_minutos} minuto(s)`, 'success');
+            setTimeout(() => {
+                window.location.href = '/selecionar-paciente';
+            }, 1500);
+        } else {
+            showAlert('Erro: ' + (data.erro || 'Erro desconhecido'), 'error');
+        }
+    } catch (error) {
+        console.error('Erro ao finalizar sessão:', error);
+        showAlert('Erro ao finalizar sessão', 'error');
+    }
+});
+
+async function voltarParaPacientes() {
+    const confirmar = await showConfirm('Deseja sair? Você precisará finalizar a sessão com uma avaliação.');
+    if (confirmar) {
+        abrirModalFinalizar();
+    }
+}
@@ -0,0 +1,661 @@
+/**
+ * Gerenciamento de categorias e pictogramas
+ */
+
+let categorias = [];
+let pictogramas = [];
+let imagemUrlAtual = null;
+
+// Carregar dados ao abrir a página
+window.addEventListener('DOMContentLoaded', async () => {
+    await carregarUsuarioAtual();
+    await carregarCategorias();
+
+    // Configurar listener de preview de imagem
+    const inputImagem = document.getElementById('pictogramaImagem');
+    if (inputImagem) {
+        inputImagem.addEventListener('change', function(event) {
+            console.log('🎯 Event listener disparado!');
+            atualizarPreview(event);
+        });
+        console.log('✓ Event listener de preview configurado');
+    } else {
+        console.error('✗ Input pictogramaImagem não encontrado');
+    }
+});
+
+async function carregarUsuarioAtual() {
+    try {
+        const response = await fetch('/api/usuario/atual');
+        const data = await response.json();
+
+        if (!data.logado) {
+            window.location.href = '/';
+            return;
+        }
+
+        document.getElementById('usuarioNome').textContent = `Olá, ${data.usuario.nome}`;
+    } catch (error) {
+        console.error('Erro:', error);
+    }
+}
+
+// ============ CATEGORIAS ============
+
+async function carregarCategorias() {
+    try {
+        const response = await fetch('/api/categorias');
+        const data = await response.json();
+
+        if (data.erro === 'Não autenticado') {
+            window.location.href = '/';
+            return;
+        }
+
+        categorias = data.categorias || [];
+        renderizarCategorias();
+        popularSelectsCategorias();
+    } catch (error) {
+        console.error('Erro ao carregar categorias:', error);
+        document.getElementById('listaCategorias').innerHTML =
+            '<p class="error">Erro ao carregar categorias.</p>';
+    }
+}
+
+function renderizarCategorias() {
+    const lista = document.getElementById('listaCategorias');
+
+    if (categorias.length === 0) {
+        lista.innerHTML = `
+            <div class="empty-state">
+                <p>Nenhuma categoria cadastrada</p>
+                <button onclick="abrirModalCategoria()" class="btn-primary">
+                    Criar Primeira Categoria
+                </button>
+            </div>
+        `;
+        return;
+    }
+
+    lista.innerHTML = `
+        <p style="color: var(--gray-500); margin-bottom: 12px;">Arraste os cartões para mudar a ordem.</p>
+        <div class="pacientes-grid" id="gradeCategorias">
+            ${categorias.map(c => `
+                <div class="paciente-card" draggable="true" data-id="${c.id}" style="cursor: grab; background: ${c.cor}20; border-color: ${c.cor};">
+                    <div style="font-size: 2rem; flex-shrink: 0;">${c.icone || '📁'}</div>
+                    <div class="paciente-info" style="flex: 1;">
+                        <h3>${c.nome}</h3>
+                        <p style="color: ${c.cor}; font-weight: 600;">Ordem: ${c.ordem || 0}</p>
+                    </div>
+                    <div style="display: flex; gap: 8px; flex-direction: column;">
+                        <button onclick="editarCategoria(${c.id})" class="btn-secondary" style="font-size: 0.85rem; padding: 8px 12px;">
+                            ✏️ Editar
+                        </button>
+                        <button onclick="excluirCategoria(${c.id}, '${c.nome}')" class="btn-danger" style="font-size: 0.85rem; padding: 8px 12px;">
+                            🗑️ Excluir
+                        </button>
+                    </div>
+                </div>
+            `).join('')}
+        </div>
+    `;
+
+    ativarArrastar(document.getElementById('gradeCategorias'), ids => salvarOrdem('/api/categorias/ordem', { ids }, carregarCategorias));
+}
+
+function abrirModalCategoria(categoriaId = null) {
+    const modal = document.getElementById('modalCategoria');
+    const titulo = document.getElementById('tituloModalCategoria');
+    const form = document.getElementById('formCategoria');
+
+    form.reset();
+
+    if (categoriaId) {
+        const categoria = categorias.find(c => c.id === categoriaId);
+        titulo.textContent = 'Editar Categoria';
+        document.getElementById('categoriaId').value = categoria.id;
+        document.getElementById('categoriaNome').value = categoria.nome;
+        document.getElementById('categoriaCor').value = categoria.cor;
+        document.getElementById('categoriaIcone').value = categoria.icone || '';
+        document.getElementById('categoriaOrdem').value = categoria.ordem || '';
+    } else {
+        titulo.textContent = 'Nova Categoria';
+        document.getElementById('categoriaId').value = '';
+    }
+
+    modal.style.display = 'flex';
+}
+
+function editarCategoria(id) {
+    abrirModalCategoria(id);
+}
+
+async function excluirCategoria(id, nome) {
+    const confirmar = await showConfirm(`Tem certeza que deseja excluir a categoria "${nome}"?\n\nAVISO: Todos os pictogramas desta categoria também serão excluídos!`);
+    if (!confirmar) {
+        return;
+    }
+
+    try {
+        const response = await fetch(`/api/categorias/${id}`, {
+            method: 'DELETE'
+        });
+
+        const data = await response.json();
+
+        if (data.sucesso) {
+            showAlert('Categoria excluída com sucesso!', 'success');
+            await carregarCategorias();
+        } else {
+            showAlert('Erro ao excluir: ' + (data.erro || 'Erro desconhecido'), 'error');
+        }
+    } catch (error) {
+        console.error('Erro:', error);
+        showAlert('Erro ao excluir categoria', 'error');
+    }
+}
+
+document.getElementById('formCategoria').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const categoriaId = document.getElementById('categoriaId').value;
+    const dados = {
+        nome: document.getElementById('categoriaNome').value,
+        cor: document.getElementById('categoriaCor').value,
+        icone: document.getElementById('categoriaIcone').value || null,
+        ordem: parseInt(document.getElementById('categoriaOrdem').value) || 0
+    };
+
+    try {
+        const url = categoriaId ? `/api/categorias/${categoriaId}` : '/api/categorias';
+        const method = categoriaId ? 'PUT' : 'POST';
+
+        const response = await fetch(url, {
+            method: method,
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(dados)
+        });
+
+        const result = await response.json();
+
+        if (result.sucesso) {
+            showAlert(categoriaId ? 'Categoria atualizada!' : 'Categoria criada!', 'success');
+            fecharModal('modalCategoria');
+            await carregarCategorias();
+        } else {
+            showAlert('Erro: ' + (result.erro || 'Erro desconhecido'), 'error');
+        }
+    } catch (error) {
+        console.error('Erro:', error);
+        showAlert('Erro ao salvar categoria', 'error');
+    }
+});
+
+// ============ ORDENAÇÃO (ARRASTAR E SOLTAR) ============
+
+function ativarArrastar(grade, aoSoltar) {
+    let arrastado = null;
+
+    grade.addEventListener('dragstart', (e) => {
+        arrastado = e.target.closest('[draggable="true"]');
+        if (arrastado) arrastado.style.opacity = '0.5';
+    });
+
+    grade.addEventListener('dragover', (e) => {
+        e.preventDefault();
+        const alvo = e.target.closest('[draggable="true"]');
+        if (!arrastado || !alvo || alvo === arrastado) return;
+
+        const caixa = alvo.getBoundingClientRect();
+        const depois = e.clientX > caixa.left + caixa.width / 2;
+        grade.insertBefore(arrastado, depois ? alvo.nextSibling : alvo);
+    });
+
+    grade.addEventListener('dragend', () => {
+        if (!arrastado) return;
+        arrastado.style.opacity = '';
+        arrastado = null;
+        aoSoltar([...grade.querySelectorAll('[data-id]')].map(el => parseInt(el.dataset.id)));
+    });
+}
+
+// Envia a ordem inteira em uma requisição (uma transação no servidor)
+async function salvarOrdem(url, corpo, recarregar) {
+    try {
+        const response = await fetch(url, {
+            method: 'PUT',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(corpo)
+        });
+        const data = await response.json();
+
+        if (data.sucesso) {
+            showAlert('Ordem atualizada!', 'success');
+        } else {
+            showAlert(data.erro || 'Erro ao salvar ordem', 'error');
+        }
+    } catch (error) {
+        console.error('Erro:', error);
+        showAlert('Erro ao salvar ordem', 'error');
+    }
+    recarregar();
+}
+
+// ============ PICTOGRAMAS ============
+
+let temporizadorBusca = null;
+
+function buscarPictogramasComAtraso() {
+    clearTimeout(temporizadorBusca);
+    temporizadorBusca = setTimeout(carregarPictogramas, 250);
+}
+
+async function carregarPictogramas() {
+    const categoriaId = document.getElementById('filtroCategoriaPictograma').value;
+    const termo = document.getElementById('buscaPictograma').value.trim();
+    let url = categoriaId ? `/api/pictogramas?categoria_id=${categoriaId}` : '/api/pictogramas';
+    if (termo) {
+        url = `/api/pictogramas/busca?limite=100&q=${encodeURIComponent(termo)}`;
+    }
+
+    try {
+        const response = await fetch(url);
+        const data = await response.json();
+
+        if (data.erro === 'Não autenticado') {
+            window.location.href = '/';
+            return;
+        }
+
+        pictogramas = data.pictogramas || [];
+        if (termo && categoriaId) {
+            pictogramas = pictogramas.filter(p => p.categoria_id === parseInt(categoriaId));
+        }
+        renderizarPictogramas();
+    } catch (error) {
+        console.error('Erro ao carregar pictogramas:', error);
+        document.getElementById('listaPictogramas').innerHTML =
+            '<p class="error">Erro ao carregar pictogramas.</p>';
+    }
+}
+
+function renderizarPictogramas() {
+    const lista = document.getElementById('listaPictogramas');
+
+    if (pictogramas.length === 0) {
+        lista.innerHTML = `
+            <div class="empty-state">
+                <p>Nenhum pictograma encontrado</p>
+                <button onclick="abrirModalPictograma()" class="btn-primary">
+                    Criar Primeiro Pictograma
+                </button>
+            </div>
+        `;
+        return;
+    }
+
+    // Reordenar só faz sentido vendo uma categoria inteira, sem busca
+    const categoriaId = parseInt(document.getElementById('filtroCategoriaPictograma').value);
+    const podeOrdenar = categoriaId && !document.getElementById('buscaPictograma').value.trim();
+
+    lista.innerHTML = `
+        ${podeOrdenar ? '<p style="color: var(--gray-500); margin-bottom: 12px;">Arraste os pictogramas para mudar a ordem no quadro.</p>' : ''}
+        <div class="pictogramas-area" id="gradePictogramas" style="padding: 0;">
+            ${pictogramas.map(p => {
+                const categoria = categorias.find(c => c.id === p.categoria_id);
+                return `
+                    <div class="pictograma-card" data-id="${p.id}" ${podeOrdenar ? 'draggable="true"' : ''} style="position: relative;">
+                        <div class="pictograma-imagem">
+                            <img src="${p.imagem_url}" alt="${p.nome}">
+                        </div>
+                        <div class="pictograma-nome">${p.nome}</div>
+                        <p style="font-size: 0.8rem; color: var(--gray-500); margin-top: 4px;">
+                            ${categoria ? categoria.nome : 'Sem categoria'}
+                        </p>
+                        <div style="display: flex; gap: 4px; margin-top: 8px;">
+                            <button onclick="editarPictograma(${p.id})" class="btn-secondary" style="flex: 1; font-size: 0.75rem; padding: 6px;">
+                                ✏️
+                            </button>
+                            <button onclick="excluirPictograma(${p.id}, '${p.nome}')" class="btn-danger" style="flex: 1; font-size: 0.75rem; padding: 6px;">
+                                🗑️
+                            </button>
+                        </div>
+                    </div>
+                `;
+            }).join('')}
+        </div>
+    `;
+
+    if (podeOrdenar) {
+        ativarArrastar(document.getElementById('gradePictogramas'), ids =>
+            salvarOrdem('/api/pictogramas/ordem', { ids, categoria_id: categoriaId }, carregarPictogramas));
+    }
+}
+
+function abrirModalPictograma(pictogramaId = null) {
+    const modal = document.getElementById('modalPictograma');
+    const titulo = document.getElementById('tituloModalPictograma');
+    const form = document.getElementById('formPictograma');
+    const inputFile = document.getElementById('pictogramaImagem');
+    const previewImg = document.getElementById('previewImagem');
+    const previewContainer = document.getElementById('previewContainer');
+
+    console.log('🔧 Abrindo modal pictograma, ID:', pictogramaId);
+
+    // Limpar formulário e preview completamente
+    form.reset();
+    imagemUrlAtual = null;
+    previewContainer.style.display = 'none';
+    previewImg.removeAttribute('src');
+    previewImg.onload = null;
+    previewImg.onerror = null;
+
+    if (inputFile) {
+        inputFile.value = '';
+        console.log('✓ Input file limpo');
+    }
+
+    if (pictogramaId) {
+        const pictograma = pictogramas.find(p => p.id === pictogramaId);
+        if (!pictograma) {
+            showAlert('Pictograma não encontrado', 'error');
+            return;
+        }
+
+        titulo.textContent = 'Editar Pictograma';
+        document.getElementById('pictogramaId').value = pictograma.id;
+        document.getElementById('pictogramaNome').value = pictograma.nome;
+        document.getElementById('pictogramaCategoria').value = pictograma.categoria_id;
+        document.getElementById('pictogramaAudio').value = pictograma.audio_texto;
+        document.getElementById('pictogramaOrdem').value = pictograma.ordem || '';
+
+        // Mostrar preview da imagem atual (simplificado)
+        imagemUrlAtual = pictograma.imagem_url;
+
+        if (pictograma.imagem_url) {
+            console.log('📷 Carregando preview da imagem existente:', pictograma.imagem_url);
+
+            // Aguardar um pouco para garantir que limpeza foi feita
+            setTimeout(() => {
+                previewImg.src = pictograma.imagem_url;
+                previewContainer.style.display = 'block';
+                console.log('✓ Preview da imagem existente exibido');
+            }, 100);
+        } else {
+            console.warn('⚠️ Pictograma sem URL de imagem');
+        }
+    } else {
+        titulo.textContent = 'Novo Pictograma';
+        document.getElementById('pictogramaId').value = '';
+    }
+
+    modal.style.display = 'flex';
+}
+
+function editarPictograma(id) {
+    abrirModalPictograma(id);
+}
+
+async function excluirPictograma(id, nome) {
+    const confirmar = await showConfirm(`Tem certeza que deseja excluir o pictograma "${nome}"?`);
+    if (!confirmar) {
+        return;
+    }
+
+    try {
+        const response = await fetch(`/api/pictogramas/${id}`, {
+            method: 'DELETE'
+        });
+
+        const data = await response.json();
+
+        if (data.sucesso) {
+            showAlert('Pictograma excluído com sucesso!', 'success');
+            await carregarPictogramas();
+        } else {
+            showAlert('Erro ao excluir: ' + (data.erro || 'Erro desconhecido'), 'error');
+        }
+    } catch (error) {
+        console.error('Erro:', error);
+        showAlert('Erro ao excluir pictograma', 'error');
+    }
+}
+
+// Função simplificada para atualizar preview
+function atualizarPreview(event) {
+    const file = event.target.files[0];
+    const previewImg = document.getElementById('previewImagem');
+    const previewContainer = document.getElementById('previewContainer');
+
+    console.log('🖼️ atualizarPreview chamada');
+    console.log('   Arquivo:', file ? file.name : 'nenhum');
+    console.log('   Tamanho:', file ? (file.size / 1024).toFixed(2) + 'KB' : 'N/A');
+
+    if (!file) {
+        console.log('⚠️ Nenhum arquivo selecionado');
+        previewContainer.style.display = 'none';
+        return;
+    }
+
+    // Validar tamanho (máximo 5MB)
+    if (file.size > 5 * 1024 * 1024) {
+        showAlert('Arquivo muito grande! Máximo 5MB', 'warning');
+        event.target.value = '';
+        previewContainer.style.display = 'none';
+        return;
+    }
+
+    // Validar tipo
+    const extensoesPermitidas = ['image/png', 'image/jpeg', 'image/jpg', 'image/gif', 'image/webp'];
+    if (!extensoesPermitidas.includes(file.type)) {
+        showAlert('Formato não permitido! Use PNG, JPG, GIF ou WEBP', 'warning');
+        event.target.value = '';
+        previewContainer.style.display = 'none';
+        return;
+    }
+
+    // Ler arquivo e mostrar preview
+    const reader = new FileReader();
+
+    reader.onload = function(e) {
+        console.log('✅ FileReader.onload disparado');
+
+        // Forçar limpeza completa do preview antigo
+        previewImg.removeAttribute('src');
+        previewImg.onload = null;
+        previewImg.onerror = null;
+
+        // Pequeno delay para garantir limpeza
+        setTimeout(() => {
+            previewImg.src = e.target.result;
+            previewContainer.style.display = 'block';
+            imagemUrlAtual = null; // Forçar novo upload
+
+            console.log('✓ Preview atualizado com sucesso!');
+            console.log('   Data URL length:', e.target.result.length);
+        }, 10);
+    };
+
+    reader.onerror = function(error) {
+        console.error('❌ Erro ao ler arquivo:', error);
+        showAlert('Erro ao carregar imagem', 'error');
+        previewContainer.style.display = 'none';
+    };
+
+    console.log('📖 Iniciando leitura do arquivo...');
+    reader.readAsDataURL(file);
+}
+
+document.getElementById('formPictograma').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const pictogramaId = document.getElementById('pictogramaId').value;
+    const arquivoImagem = document.getElementById('pictogramaImagem').files[0];
+
+    // Se for novo pictograma ou se selecionou nova imagem, fazer upload
+    let imagemUrl = imagemUrlAtual;
+
+    if (arquivoImagem) {
+        const btnSalvar = document.getElementById('btnSalvarPictograma');
+        btnSalvar.disabled = true;
+        btnSalvar.textContent = 'Enviando imagem...';
+
+        const formData = new FormData();
+        formData.append('imagem', arquivoImagem);
+
+        try {
+            const uploadResponse = await fetch('/api/upload', {
+                method: 'POST',
+                body: formData
+            });
+
+            const uploadResult = await uploadResponse.json();
+
+            // O upload é processado em segundo plano: acompanhar a tarefa
+            const tarefa = uploadResult.sucesso
+                ? await aguardarUpload(uploadResult.tarefa_id, btnSalvar)
+                : uploadResult;
+
+            if (tarefa.status !== 'concluido') {
+                showAlert('Erro ao fazer upload: ' + (tarefa.erro || 'Erro desconhecido'), 'error');
+                btnSalvar.disabled = false;
+                btnSalvar.innerHTML = '<svg width="18" height="18" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><polyline points="20 6 9 17 4 12"/></svg> Salvar';
+                return;
+            }
+
+            imagemUrl = tarefa.url;
+        } catch (error) {
+            console.error('Erro no upload:', error);
+            showAlert('Erro ao fazer upload da imagem', 'error');
+            btnSalvar.disabled = false;
+            btnSalvar.innerHTML = '<svg width="18" height="18" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><polyline points="20 6 9 17 4 12"/></svg> Salvar';
+            return;
+        }
+    }
+
+    // Validar se tem imagem (novo ou existente)
+    if (!imagemUrl) {
+        showAlert('Por favor, selecione uma imagem para o pictograma', 'warning');
+        return;
+    }
+
+    const dados = {
+        nome: document.getElementById('pictogramaNome').value,
+        categoria_id: parseInt(document.getElementById('pictogramaCategoria').value),
+        audio_texto: document.getElementById('pictogramaAudio').value,
+        imagem_url: imagemUrl,
+        ordem: parseInt(document.getElementById('pictogramaOrdem').value) || 0
+    };
+
+    try {
+        const url = pictogramaId ? `/api/pictogramas/${pictogramaId}` : '/api/pictogramas';
+        const method = pictogramaId ? 'PUT' : 'POST';
+
+        const response = await fetch(url, {
+            method: method,
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(dados)
+        });
+
+        const result = await response.json();
+
+        if (result.sucesso) {
+            showAlert(pictogramaId ? 'Pictograma atualizado!' : 'Pictograma criado!', 'success');
+            fecharModal('modalPictograma');
+            await carregarPictogramas();
+        } else {
+            showAlert('Erro: ' + (result.erro || 'Erro desconhecido'), 'error');
+        }
+    } catch (error) {
+        console.error('Erro:', error);
+        showAlert('Erro ao salvar pictograma', 'error');
+    } finally {
+        const btnSalvar = document.getElementById('btnSalvarPictograma');
+        btnSalvar.disabled = false;
+        btnSalvar.innerHTML = '<svg width="18" height="18" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><polyline points="20 6 9 17 4 12"/></svg> Salvar';
+    }
+});
+
+async function aguardarUpload(tarefaId, btnSalvar, limiteSegundos = 120) {
+    const inicio = Date.now();
+    btnSalvar.textContent = 'Processando imagem...';
+
+    while (Date.now() - inicio < limiteSegundos * 1000) {
+        await new Promise(resolve => setTimeout(resolve, 700));
+
+        const response = await fetch(`/api/upload/${tarefaId}`);
+        const tarefa = await response.json();
+
+        if (tarefa.status === 'concluido' || tarefa.status === 'erro') {
+            return tarefa;
+        }
+    }
+
+    return { status: 'erro', erro: 'Tempo esgotado aguardando o upload' };
+}
+
+// ============ AUXILIARES ============
+
+function popularSelectsCategorias() {
+    const selects = [
+        document.getElementById('pictogramaCategoria'),
+        document.getElementById('filtroCategoriaPictograma')
+    ];
+
+    selects.forEach(select => {
+        // Limpar opções existentes (exceto a primeira)
+        while (select.options.length > 1) {
+            select.remove(1);
+        }
+
+        // Adicionar categorias
+        categorias.forEach(c => {
+            const option = document.createElement('option');
+            option.value = c.id;
+            option.textContent = `${c.icone || '📁'} ${c.nome}`;
+            select.appendChild(option);
+        });
+    });
+}
+
+function mudarTab(tab, event) {
+    event.preventDefault();
+
+    // Atualizar tabs ativas
+    document.querySelectorAll('.nav-item').forEach(item => {
+        item.classList.remove('active');
+    });
+    event.target.closest('.nav-item').classList.add('active');
+
+    // Mostrar seção correspondente
+    if (tab === 'categorias') {
+        document.getElementById('secaoCategorias').style.display = 'block';
+        document.getElementById('secaoPictogramas').style.display = 'none';
+    } else {
+        document.getElementById('secaoCategorias').style.display = 'none';
+        document.getElementById('secaoPictogramas').style.display = 'block';
+        carregarPictogramas();
+    }
+}
+
+function fecharModal(modalId, event) {
+    if (!event || event.target.classList.contains('modal-overlay')) {
+        document.getElementById(modalId).style.display = 'none';
+    }
+}
+
+async function logout() {
+    const confirmar = await showConfirm('Deseja realmente sair?');
+    if (confirmar) {
+        await fetch('/api/logout', { method: 'POST' });
+        window.location.href = '/';
+    }
+}
+
+// Fechar modais com ESC
+document.addEventListener('keydown', (e) => {
+    if (e.key === 'Escape') {
+        fecharModal('modalCategoria');
+        fecharModal('modalPictograma');
+    }
+});
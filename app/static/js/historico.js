@@ -0,0 +1,348 @@
+/**
+ * Histórico de sessões e acompanhamento ao vivo
+ */
+
+let sessoes = [];
+let pacientes = [];
+let proximoCursor = null;
+let filtrosAtuais = {};
+let fonteAoVivo = null;
+
+// Carregar dados ao abrir a página
+window.addEventListener('DOMContentLoaded', async () => {
+    await carregarUsuarioAtual();
+    await carregarPacientes();
+    await carregarSessoes();
+});
+
+async function carregarUsuarioAtual() {
+    try {
+        const response = await fetch('/api/usuario/atual');
+        const data = await response.json();
+
+        if (!data.logado) {
+            window.location.href = '/';
+            return;
+        }
+
+        document.getElementById('usuarioNome').textContent = `Olá, ${data.usuario.nome}`;
+    } catch (error) {
+        console.error('Erro:', error);
+    }
+}
+
+async function carregarPacientes() {
+    try {
+        const response = await fetch('/api/pacientes');
+        const data = await response.json();
+
+        if (data.erro === 'Não autenticado') {
+            window.location.href = '/';
+            return;
+        }
+
+        pacientes = data.pacientes || [];
+
+        // Popular select de filtro
+        const select = document.getElementById('filtroPaciente');
+        pacientes.forEach(p => {
+            const option = document.createElement('option');
+            option.value = p.id;
+            option.textContent = p.nome;
+            select.appendChild(option);
+        });
+    } catch (error) {
+        console.error('Erro ao carregar pacientes:', error);
+    }
+}
+
+async function carregarSessoes(maisPaginas = false) {
+    try {
+        const params = new URLSearchParams(filtrosAtuais);
+        if (maisPaginas && proximoCursor) {
+            params.set('cursor', proximoCursor);
+        }
+
+        const response = await fetch(`/api/sessoes?${params.toString()}`);
+        const data = await response.json();
+
+        if (data.erro === 'Não autenticado') {
+            window.location.href = '/';
+            return;
+        }
+
+        const pagina = data.sessoes || [];
+        sessoes = maisPaginas ? sessoes.concat(pagina) : pagina;
+        proximoCursor = data.proximo_cursor;
+        document.getElementById('btnCarregarMais').style.display = data.tem_mais ? 'inline-flex' : 'none';
+        renderizarSessoes();
+    } catch (error) {
+        console.error('Erro ao carregar sessões:', error);
+        document.getElementById('listaSessoes').innerHTML =
+            '<p class="error">Erro ao carregar histórico.</p>';
+    }
+}
+
+function renderizarSessoes() {
+    const lista = document.getElementById('listaSessoes');
+    const totalEl = document.getElementById('totalSessoes');
+
+    totalEl.textContent = `${sessoes.length} sessão${sessoes.length !== 1 ? 'ões' : ''} carregada${sessoes.length !== 1 ? 's' : ''}${proximoCursor ? ' (há mais)' : ''}`;
+
+    if (sessoes.length === 0) {
+        lista.innerHTML = `
+            <div class="empty-state">
+                <svg width="64" height="64" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="1.5" style="margin-bottom: 16px; opacity: 0.5;">
+                    <circle cx="12" cy="12" r="10"/>
+                    <polyline points="12 6 12 12 16 14"/>
+                </svg>
+                <p>Nenhuma sessão encontrada</p>
+            </div>
+        `;
+        return;
+    }
+
+    // Renderizar como tabela
+    lista.innerHTML = `
+        <div style="overflow-x: auto;">
+            <table class="historico-table">
+                <thead>
+                    <tr>
+                        <th>Paciente</th>
+                        <th>Profissional</th>
+                        <th>Data/Hora</th>
+                        <th>Duração</th>
+                        <th>Status</th>
+                        <th>Interações</th>
+                        <th>Ações</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    ${sessoes.map(s => renderizarLinhaSessao(s)).join('')}
+                </tbody>
+            </table>
+        </div>
+    `;
+}
+
+function renderizarLinhaSessao(sessao) {
+    const statusBadge = sessao.finalizada
+        ? '<span class="badge badge-success">Finalizada</span>'
+        : '<span class="badge badge-warning">Em andamento</span>';
+
+    let duracao = '-';
+    if (sessao.finalizada && sessao.duracao !== null) {
+        duracao = formatarDuracao(sessao.duracao);
+    } else if (sessao.finalizada) {
+        duracao = 'N/A';
+    }
+
+    return `
+        <tr style="cursor: pointer;" onclick="verDetalhes(${sessao.id})">
+            <td><strong>${sessao.paciente_nome || 'N/A'}</strong></td>
+            <td>${sessao.profissional_nome || 'N/A'}</td>
+            <td>${formatarDataHora(sessao.data_inicio)}</td>
+            <td>${duracao}</td>
+            <td>${statusBadge}</td>
+            <td style="text-align: center;">${sessao.total_interacoes || 0}</td>
+            <td>
+                <button onclick="event.stopPropagation(); verDetalhes(${sessao.id})" class="btn-secondary" style="padding: 6px 12px; font-size: 0.8rem;">
+                    Ver detalhes
+                </button>
+            </td>
+        </tr>
+    `;
+}
+
+async function verDetalhes(sessaoId) {
+    try {
+        // Buscar detalhes da sessão
+        const response = await fetch(`/api/sessoes/${sessaoId}/historico`);
+
+        if (!response.ok) {
+            showAlert('Erro ao carregar detalhes da sessão', 'error');
+            return;
+        }
+
+        const data = await response.json();
+        const sessao = sessoes.find(s => s.id === sessaoId);
+
+        // Renderizar header
+        document.getElementById('detalhesHeader').innerHTML = `
+            <div style="display: grid; grid-template-columns: repeat(2, 1fr); gap: 12px;">
+                <div>
+                    <strong style="color: var(--gray-500); font-size: 0.8rem;">PACIENTE</strong>
+                    <p style="font-size: 1.1rem; font-weight: 600; margin-top: 4px;">${sessao.paciente_nome}</p>
+                </div>
+                <div>
+                    <strong style="color: var(--gray-500); font-size: 0.8rem;">PROFISSIONAL</strong>
+                    <p style="font-size: 1.1rem; font-weight: 600; margin-top: 4px;">${sessao.profissional_nome}</p>
+                </div>
+                <div>
+                    <strong style="color: var(--gray-500); font-size: 0.8rem;">DATA/HORA</strong>
+                    <p style="margin-top: 4px;">${formatarDataHora(sessao.data_inicio)}</p>
+                </div>
+                <div>
+                    <strong style="color: var(--gray-500); font-size: 0.8rem;">DURAÇÃO</strong>
+                    <p style="margin-top: 4px;">${
+                        sessao.finalizada
+                            ? (sessao.duracao !== null ? formatarDuracao(sessao.duracao) : 'Duração não calculada')
+                            : '<span style="color: var(--warning);">Sessão em andamento</span>'
+                    }</p>
+                </div>
+                ${sessao.avaliacao ? `
+                <div style="grid-column: 1 / -1; margin-top: 8px; padding: 14px; background: #F9FAFB; border-left: 4px solid #6B7280; border-radius: 6px;">
+                    <strong style="color: #374151; font-size: 0.85rem; display: block; margin-bottom: 8px;">📝 AVALIAÇÃO DO PROFISSIONAL</strong>
+                    <p style="margin: 0; line-height: 1.6; color: #1F2937;">${sessao.avaliacao}</p>
+                </div>
+                ` : ''}
+            </div>
+        `;
+
+        // Renderizar histórico de pictogramas
+        const historico = data.historico || [];
+        renderizarHistorico(historico);
+
+        // Sessão em andamento: novas seleções chegam pelo stream ao vivo
+        if (!sessao.finalizada) {
+            acompanharAoVivo(sessaoId, historico);
+        }
+
+        // Mostrar modal
+        document.getElementById('modalDetalhes').style.display = 'flex';
+    } catch (error) {
+        console.error('Erro:', error);
+        showAlert('Erro ao carregar detalhes', 'error');
+    }
+}
+
+function renderizarHistorico(historico) {
+    if (historico.length === 0) {
+        document.getElementById('listaHistorico').innerHTML = '<p style="color: var(--gray-400); text-align: center; padding: 20px;">Nenhum pictograma selecionado nesta sessão</p>';
+        return;
+    }
+    document.getElementById('listaHistorico').innerHTML = historico.map((item, index) => `
+        <div class="historico-item" style="display: flex; align-items: center; gap: 12px; margin-bottom: 8px; padding: 12px; background: var(--gray-50); border-radius: 8px;">
+            <div style="width: 36px; height: 36px; background: var(--primary-light); border-radius: 50%; display: flex; align-items: center; justify-content: center; font-size: 0.9rem; font-weight: 600; color: var(--primary-dark);">
+                ${index + 1}
+            </div>
+            <div style="flex: 1;">
+                <strong style="font-size: 1rem;">${item.pictograma_nome}</strong>
+                <p style="font-size: 0.8rem; color: var(--gray-500); margin-top: 2px;">Categoria: ${item.categoria_nome || 'N/A'}</p>
+            </div>
+        </div>
+    `).join('');
+}
+
+function acompanharAoVivo(sessaoId, historico) {
+    pararAoVivo();
+    const ultimoId = historico.reduce((maior, item) => Math.max(maior, item.id || 0), 0);
+    // Reconexões (a cada ~25 s) continuam do último id pelo Last-Event-ID
+    fonteAoVivo = new EventSource(`/api/sessoes/${sessaoId}/ao-vivo?desde=${ultimoId}`);
+
+    fonteAoVivo.addEventListener('selecao', (e) => {
+        const item = JSON.parse(e.data);
+        // Releituras podem repetir ids; um commit atrasado pode chegar fora de ordem
+        if (historico.some(h => h.id === item.id)) return;
+        historico.push(item);
+        historico.sort((a, b) => a.timestamp.localeCompare(b.timestamp) || a.id - b.id);
+        renderizarHistorico(historico);
+    });
+
+    fonteAoVivo.addEventListener('fim', () => {
+        pararAoVivo();
+        carregarSessoes();
+    });
+}
+
+function pararAoVivo() {
+    if (fonteAoVivo) {
+        fonteAoVivo.close();
+        fonteAoVivo = null;
+    }
+}
+
+function fecharModal(event) {
+    if (!event || event.target.classList.contains('modal-overlay')) {
+        pararAoVivo();
+        document.getElementById('modalDetalhes').style.display = 'none';
+    }
+}
+
+document.getElementById('formFiltros').addEventListener('submit', (e) => {
+    e.preventDefault();
+    aplicarFiltros();
+});
+
+function aplicarFiltros() {
+    const pacienteId = document.getElementById('filtroPaciente').value;
+    const dataInicio = document.getElementById('filtroPeriodoInicio').value;
+    const dataFim = document.getElementById('filtroPeriodoFim').value;
+    const status = document.getElementById('filtroStatus').value;
+
+    // Filtros aplicados no servidor
+    filtrosAtuais = {};
+    if (pacienteId) filtrosAtuais.paciente_id = pacienteId;
+    if (dataInicio) filtrosAtuais.data_inicio = dataInicio;
+    if (dataFim) filtrosAtuais.data_fim = dataFim;
+    if (status) filtrosAtuais.finalizada = status;
+
+    carregarSessoes();
+}
+
+function limparFiltros() {
+    document.getElementById('formFiltros').reset();
+    filtrosAtuais = {};
+    carregarSessoes();
+}
+
+async function logout() {
+    const confirmar = await showConfirm('Deseja realmente sair?');
+    if (confirmar) {
+        await fetch('/api/logout', { method: 'POST' });
+        window.location.href = '/';
+    }
+}
+
+function formatarDataHora(dataISO) {
+    if (!dataISO) return 'Data não disponível';
+
+    try {
+        // Corrigir formato de data do SQLite (substituir espaço por T para ISO)
+        const dataCorrigida = dataISO.replace(' ', 'T');
+        const data = new Date(dataCorrigida);
+
+        // Verificar se data é válida
+        if (isNaN(data.getTime())) {
+            return 'Data inválida';
+        }
+
+        const dataStr = data.toLocaleDateString('pt-BR');
+        const horaStr = data.toLocaleTimeString('pt-BR', { hour: '2-digit', minute: '2-digit' });
+        return `${dataStr} às ${horaStr}`;
+    } catch (error) {
+        console.error('Erro ao formatar data:', error, dataISO);
+        return 'Data inválida';
+    }
+}
+
+function formatarDuracao(segundos) {
+    const horas = Math.floor(segundos / 3600);
+    const minutos = Math.floor((segundos % 3600) / 60);
+    const segs = segundos % 60;
+
+    if (horas > 0) {
+        return `${horas}h ${minutos}min`;
+    } else if (minutos > 0) {
+        return `${minutos}min ${segs}s`;
+    } else {
+        return `${segs}s`;
+    }
+}
+
+// Fechar modal com ESC
+document.addEventListener('keydown', (e) => {
+    if (e.key === 'Escape') {
+        fecharModal();
+    }
+});
@@ -0,0 +1,45 @@
+/**
+ * Página de login
+ */
+
+document.getElementById('loginForm').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const login = document.getElementById('login').value.trim();
+    const senha = document.getElementById('senha').value.trim();
+    const btnSubmit = e.target.querySelector('button[type="submit"]');
+    const msgErro = document.getElementById('mensagemErro');
+
+    msgErro.style.display = 'none';
+    btnSubmit.disabled = true;
+    btnSubmit.innerHTML = '<span>Entrando...</span>';
+
+    try {
+        const response = await fetch('/api/login', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ login, senha })
+        });
+
+        const data = await response.json();
+
+        if (data.sucesso) {
+            window.location.href = '/selecionar-paciente';
+        } else {
+            msgErro.textContent = data.erro || 'Erro ao fazer login';
+            msgErro.style.display = 'block';
+        }
+    } catch (error) {
+        console.error('Erro:', error);
+        msgErro.textContent = 'Erro de conexão. Tente novamente.';
+        msgErro.style.display = 'block';
+    } finally {
+        btnSubmit.disabled = false;
+        btnSubmit.innerHTML = `
+            <span>Entrar</span>
+            <svg width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+                <path d="M5 12h14M12 5l7 7-7 7"/>
+            </svg>
+        `;
+    }
+});
@@ -0,0 +1,146 @@
+/**
+ * Seleção e cadastro de pacientes
+ */
+
+let pacientes = [];
+
+// Carregar dados ao abrir a página
+window.addEventListener('DOMContentLoaded', async () => {
+    await carregarUsuarioAtual();
+    await carregarPacientes();
+});
+
+async function carregarUsuarioAtual() {
+    try {
+        const response = await fetch('/api/usuario/atual');
+        const data = await response.json();
+
+        if (!data.logado) {
+            window.location.href = '/';
+            return;
+        }
+
+        document.getElementById('usuarioNome').textContent = `Olá, ${data.usuario.nome}`;
+    } catch (error) {
+        console.error('Erro:', error);
+    }
+}
+
+async function carregarPacientes() {
+    try {
+        const response = await fetch('/api/pacientes');
+        const data = await response.json();
+
+        if (data.erro === 'Não autenticado') {
+            window.location.href = '/';
+            return;
+        }
+
+        pacientes = data.pacientes || [];
+        renderizarPacientes();
+    } catch (error) {
+        console.error('Erro ao carregar pacientes:', error);
+        document.getElementById('listaPacientes').innerHTML = 
+            '<p class="error">Erro ao carregar pacientes.</p>';
+    }
+}
+
+function renderizarPacientes() {
+    const lista = document.getElementById('listaPacientes');
+
+    if (pacientes.length === 0) {
+        lista.innerHTML = `
+            <div class="empty-state">
+                <svg width="64" height="64" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="1.5" style="margin-bottom: 16px; opacity: 0.5;">
+                    <path d="M17 21v-2a4 4 0 0 0-4-4H5a4 4 0 0 0-4 4v2"/>
+                    <circle cx="9" cy="7" r="4"/>
+                    <line x1="17" y1="11" x2="23" y2="11"/>
+                </svg>
+                <p>Nenhum paciente cadastrado ainda</p>
+                <button onclick="mostrarFormularioNovoPaciente()" class="btn-primary">
+                    Cadastrar Primeiro Paciente
+                </button>
+            </div>
+        `;
+        return;
+    }
+
+    lista.innerHTML = pacientes.map(p => `
+        <div class="paciente-card" onclick="selecionarPaciente(${p.id})">
+            <div class="paciente-avatar">
+                ${p.foto_perfil ? 
+                    `<img src="${p.foto_perfil}" alt="${p.nome}">` : 
+                    '<span class="avatar-placeholder">👤</span>'
+                }
+            </div>
+            <div class="paciente-info">
+                <h3>${p.nome}</h3>
+                ${p.nivel_suporte ? `<span class="nivel-suporte">${p.nivel_suporte}</span>` : ''}
+                ${p.data_nascimento ? `<p>Nascimento: ${formatarData(p.data_nascimento)}</p>` : ''}
+            </div>
+            <div class="paciente-action">
+                <span class="btn-select">Selecionar →</span>
+            </div>
+        </div>
+    `).join('');
+}
+
+function selecionarPaciente(pacienteId) {
+    window.location.href = `/comunicacao/${pacienteId}`;
+}
+
+function mostrarFormularioNovoPaciente() {
+    document.getElementById('formNovoPaciente').style.display = 'block';
+    document.getElementById('nome').focus();
+}
+
+function esconderFormularioNovoPaciente() {
+    document.getElementById('formNovoPaciente').style.display = 'none';
+    document.getElementById('formCadastro').reset();
+}
+
+document.getElementById('formCadastro').addEventListener('submit', async (e) => {
+    e.preventDefault();
+
+    const dados = {
+        nome: document.getElementById('nome').value,
+        data_nascimento: document.getElementById('dataNascimento').value || null,
+        nivel_suporte: document.getElementById('nivelSuporte').value || null,
+        diagnostico: document.getElementById('diagnostico').value || null,
+        ordem_personalizada: document.getElementById('ordemPersonalizada').checked
+    };
+
+    try {
+        const response = await fetch('/api/pacientes', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(dados)
+        });
+
+        const result = await response.json();
+
+        if (result.sucesso) {
+            showAlert('Paciente cadastrado com sucesso!', 'success');
+            esconderFormularioNovoPaciente();
+            carregarPacientes();
+        } else {
+            showAlert('Erro ao cadastrar: ' + (result.erro || 'Erro desconhecido'), 'error');
+        }
+    } catch (error) {
+        console.error('Erro:', error);
+        showAlert('Erro ao cadastrar paciente', 'error');
+    }
+});
+
+async function logout() {
+    const confirmar = await showConfirm('Deseja realmente sair?');
+    if (confirmar) {
+        await fetch('/api/logout', { method: 'POST' });
+        window.location.href = '/';
+    }
+}
+
+function formatarData(dataISO) {
+    const data = new Date(dataISO + 'T00:00:00');
+    return data.toLocaleDateString('pt-BR');
+}
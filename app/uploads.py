@@ -0,0 +1,188 @@
+"""
+uploads.py
+Upload de imagens em segundo plano (Cloudinary, local ou simulado)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import io
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from app import db
+from app.imagens import processar_imagem_local, url_miniatura
+from app.models import TarefaUpload
+
+PASTA_IMAGENS = os.path.join(os.path.dirname(__file__), 'static', 'images')
+RETENCAO_TAREFAS = timedelta(days=1)
+
+
+class UploaderLocal:
+    """Grava as variantes WebP em static/images (ver imagens.py)"""
+
+    def enviar(self, dados, extensao):
+        return processar_imagem_local(dados, extensao, PASTA_IMAGENS)
+
+
+class UploaderCloudinary:
+    """Envia para o Cloudinary com a mesma transformação usada desde a v1"""
+
+    def __init__(self, cloud_name, api_key, api_secret):
+        import cloudinary
+        import cloudinary.uploader
+
+        cloudinary.config(cloud_name=cloud_name, api_key=api_key, api_secret=api_secret)
+        self._uploader = cloudinary.uploader
+
+    def enviar(self, dados, extensao):
+        resultado = self._uploader.upload(
+            io.BytesIO(dados),
+            folder='pictogramas_caa',
+            resource_type='image',
+            transformation=[
+                {'width': 500, 'height': 500, 'crop': 'limit'},
+                {'quality': 'auto:good'}
+            ]
+        )
+        return resultado['secure_url']
+
+
+class UploaderSimulado(UploaderLocal):
+    """
+    Substituto do Cloudinary para testes sem rede: espera `atraso` segundos
+    (como um envio lento) e grava localmente
+    """
+
+    def __init__(self, atraso=0.5):
+        self.atraso = atraso
+
+    def enviar(self, dados, extensao):
+        time.sleep(self.atraso)
+        return super().enviar(dados, extensao)
+
+
+def criar_uploader(config):
+    """Escolhe o uploader pela configuração UPLOADER (auto|cloudinary|local|simulado)"""
+    tipo = config.get('UPLOADER', 'auto')
+
+    cloudinary_configurado = all([
+        config.get('CLOUDINARY_CLOUD_NAME'),
+        config.get('CLOUDINARY_API_KEY'),
+        config.get('CLOUDINARY_API_SECRET')
+    ])
+
+    if tipo == 'simulado':
+        return UploaderSimulado(config.get('UPLOAD_SIMULADO_ATRASO', 0.5))
+    if tipo == 'cloudinary' or (tipo == 'auto' and cloudinary_configurado):
+        return UploaderCloudinary(
+            config.get('CLOUDINARY_CLOUD_NAME'),
+            config.get('CLOUDINARY_API_KEY'),
+            config.get('CLOUDINARY_API_SECRET')
+        )
+    return UploaderLocal()
+
+
+class FilaUploads:
+    """
+    Executor com concorrência limitada por processo. O estado de cada tarefa
+    fica na tabela TarefaUpload, então qualquer worker responde à consulta.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._vagas = None
+        self._uploader = None
+
+    def _iniciar(self, app):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=app.config.get('UPLOAD_MAX_CONCORRENCIA', 2),
+                    thread_name_prefix='upload'
+                )
+                self._vagas = threading.BoundedSemaphore(app.config.get('UPLOAD_MAX_PENDENTES', 20))
+                self._uploader = criar_uploader(app.config)
+
+    def enviar(self, app, dados, extensao):
+        """
+        Cria a tarefa e agenda o envio; retorna a TarefaUpload criada
+        ou None se a fila deste worker estiver cheia
+        """
+        return self.agendar(app, self._enviar_imagem, dados, extensao)
+
+    def agendar(self, app, funcao, *args):
+        """
+        Cria a tarefa e roda funcao(*args) em segundo plano, com contexto da
+        aplicação; o dicionário devolvido é gravado na TarefaUpload concluída.
+        Retorna a tarefa ou None se a fila deste worker estiver cheia.
+        """
+        self._iniciar(app)
+        if not self._vagas.acquire(blocking=False):
+            return None
+
+        try:
+            # Tarefas antigas só servem para consulta logo após o envio
+            TarefaUpload.query.filter(
+                TarefaUpload.data_criacao < datetime.utcnow() - RETENCAO_TAREFAS
+            ).delete(synchronize_session=False)
+
+            tarefa = TarefaUpload(id=uuid.uuid4().hex, status='pendente')
+            db.session.add(tarefa)
+            db.session.commit()
+            self._executor.submit(self._processar, app, tarefa.id, funcao, args)
+        except Exception:
+            self._vagas.release()
+            raise
+        return tarefa
+
+    def consultar(self, tarefa_id, tempo_maximo):
+        """
+        TarefaUpload pelo id (None se não existe). Tarefas pendentes ou em
+        processamento há mais de tempo_maximo segundos pertenciam a um worker
+        reiniciado (o executor fica em memória) e passam a erro.
+        """
+        tarefa = TarefaUpload.query.get(tarefa_id)
+        if (tarefa is not None and tarefa.status in ('pendente', 'processando')
+                and tarefa.data_criacao < datetime.utcnow() - timedelta(seconds=tempo_maximo)):
+            TarefaUpload.query.filter(
+                TarefaUpload.id == tarefa_id,
+                TarefaUpload.status.in_(('pendente', 'processando'))
+            ).update({
+                'status': 'erro',
+                'erro': 'Tarefa interrompida (servidor reiniciado); envie novamente',
+                'data_conclusao': datetime.utcnow()
+            }, synchronize_session=False)
+            db.session.commit()
+            db.session.refresh(tarefa)
+        return tarefa
+
+    def _enviar_imagem(self, dados, extensao):
+        url = self._uploader.enviar(dados, extensao)
+        return {'url': url, 'miniatura_url': url_miniatura(url)}
+
+    def _processar(self, app, tarefa_id, funcao, args):
+        with app.app_context():
+            try:
+                try:
+                    TarefaUpload.query.filter_by(id=tarefa_id).update({'status': 'processando'})
+                    db.session.commit()
+
+                    valores = dict(funcao(*args), status='concluido', data_conclusao=datetime.utcnow())
+                except Exception as e:
+                    db.session.rollback()
+                    valores = {
+                        'status': 'erro',
+                        'erro': str(e),
+                        'data_conclusao': datetime.utcnow()
+                    }
+
+                TarefaUpload.query.filter_by(id=tarefa_id).update(valores)
+                db.session.commit()
+            finally:
+                self._vagas.release()
+
+
+fila_uploads = FilaUploads()
@@ -0,0 +1,59 @@
+"""
+arquivar_historico.py
+Compacta as seleções de sessões antigas (retenção do histórico)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+Uso:
+    python arquivar_historico.py --simular           # quantas sessões seriam arquivadas
+    python arquivar_historico.py                     # usa RETENCAO_HISTORICO_DIAS (padrão 365)
+    python arquivar_historico.py --dias 180 --limite 50000
+
+As seleções saem de historico_selecao e vão, compactadas, para arquivo_sessao.
+O histórico da sessão continua disponível em /api/sessoes/<id>/historico,
+listagens e estatísticas usam as tabelas de resumo, e os percentis de tempo
+de resposta e a exportação CSV/NDJSON leem também arquivo_sessao. Só a
+predição do próximo pictograma considera apenas as seleções não arquivadas.
+"""
+
+import argparse
+import time
+from app import create_app, db
+from app.retencao import sessoes_para_arquivar, arquivar_sessoes
+
+
+def mostrar_progresso(totais):
+    print(f"  {totais['sessoes']} sessões, {totais['selecoes']} seleções, "
+          f"{totais['bytes'] / 1024:.0f} KB arquivados", flush=True)
+
+
+def arquivar(dias=None, limite=None, simular=False):
+    app = create_app()
+
+    with app.app_context():
+        dias = dias or app.config['RETENCAO_HISTORICO_DIAS']
+        print(f"Banco: {db.engine.dialect.name} | retenção: {dias} dias")
+
+        sessao_ids = sessoes_para_arquivar(dias, limite)
+        if simular:
+            print(f"[simulação] {len(sessao_ids)} sessões seriam arquivadas.")
+            return
+        if not sessao_ids:
+            print("Nada para arquivar.")
+            return
+
+        inicio = time.perf_counter()
+        totais = arquivar_sessoes(sessao_ids, mostrar_progresso)
+
+    media = totais['bytes'] / totais['selecoes'] if totais['selecoes'] else 0
+    print(f"\nConcluído em {time.perf_counter() - inicio:.1f}s: {totais['selecoes']} seleções "
+          f"de {totais['sessoes']} sessões ({media:.1f} bytes por seleção).")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Arquiva seleções de sessões antigas')
+    parser.add_argument('--dias', type=int, help='arquiva sessões iniciadas há mais de N dias')
+    parser.add_argument('--limite', type=int, help='máximo de sessões nesta execução')
+    parser.add_argument('--simular', action='store_true', help='apenas conta as sessões')
+    args = parser.parse_args()
+
+    arquivar(args.dias, args.limite, args.simular)
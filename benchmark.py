@@ -0,0 +1,249 @@
+"""
+benchmark.py
+Mede latência (p50/p95/p99) e vazão dos endpoints principais
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+Uso:
+    # Em processo, com o test client do Flask (banco de DATABASE_URL)
+    python benchmark.py --requisicoes 300
+
+    # Contra um servidor local (ex.: gunicorn -w 4 -b 127.0.0.1:8000 run:app)
+    python benchmark.py --url http://127.0.0.1:8000 --concorrencia 8
+
+    # Mesma base em PostgreSQL
+    DATABASE_URL=postgresql://localhost/caa_bench python gerar_dados.py --sessoes 200000
+    DATABASE_URL=postgresql://localhost/caa_bench python benchmark.py --json resultado_pg.json
+
+Os cenários de escrita gravam seleções em sessões abertas: rode sobre uma
+base gerada por gerar_dados.py, nunca sobre a de produção.
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+PERCENTIS = (50, 95, 99)
+SELECOES_POR_LOTE = 20
+
+
+class ClienteLocal:
+    """Test client do Flask: mede o app sem rede nem servidor"""
+
+    _app = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        with ClienteLocal._lock:
+            if ClienteLocal._app is None:
+                from app import create_app
+                ClienteLocal._app = create_app()
+        self._cliente = ClienteLocal._app.test_client()
+
+    def requisitar(self, metodo, caminho, corpo=None):
+        resposta = self._cliente.open(caminho, method=metodo, json=corpo)
+        return resposta.status_code, resposta.data
+
+
+class ClienteHTTP:
+    """Cliente urllib com cookies, para um servidor já em execução"""
+
+    def __init__(self, url_base):
+        self._url_base = url_base.rstrip('/')
+        self._abridor = build_opener(HTTPCookieProcessor(CookieJar()))
+
+    def requisitar(self, metodo, caminho, corpo=None):
+        dados = json.dumps(corpo).encode() if corpo is not None else None
+        pedido = Request(self._url_base + caminho, data=dados, method=metodo)
+        if dados is not None:
+            pedido.add_header('Content-Type', 'application/json')
+        try:
+            with self._abridor.open(pedido, timeout=60) as resposta:
+                return resposta.status, resposta.read()
+        except HTTPError as e:
+            return e.code, e.read()
+
+
+def criar_cliente(args):
+    cliente = ClienteHTTP(args.url) if args.url else ClienteLocal()
+    status, _ = cliente.requisitar('POST', '/api/login', {'login': args.login, 'senha': args.senha})
+    if status != 200:
+        raise SystemExit(f"Falha no login ({status}): confira --login e --senha")
+    return cliente
+
+
+def preparar_amostras(cliente):
+    """Coleta pela própria API os ids usados nos cenários"""
+    _, corpo = cliente.requisitar('GET', '/api/sessoes?limite=200&finalizada=true')
+    pagina = json.loads(corpo)
+    finalizadas = pagina['sessoes']
+    if not finalizadas:
+        raise SystemExit("Base sem sessões finalizadas: gere dados com gerar_dados.py")
+
+    cursores = [pagina['proximo_cursor']] if pagina['proximo_cursor'] else []
+    for _ in range(4):
+        if not cursores:
+            break
+        _, corpo = cliente.requisitar('GET', f'/api/sessoes?limite=200&cursor={cursores[-1]}')
+        proximo = json.loads(corpo)['proximo_cursor']
+        if not proximo:
+            break
+        cursores.append(proximo)
+
+    _, corpo = cliente.requisitar('GET', '/api/pictogramas')
+    pictogramas = [p['id'] for p in json.loads(corpo)['pictogramas']]
+
+    # Uma sessão aberta por paciente: reaproveita a existente ou abre uma nova
+    pacientes = sorted({s['paciente_id'] for s in finalizadas})[:10]
+    abertas = []
+    for paciente_id in pacientes:
+        _, corpo = cliente.requisitar('POST', '/api/sessoes', {'paciente_id': paciente_id})
+        abertas.append(json.loads(corpo)['sessao_id'])
+
+    return {
+        'sessoes': [s['id'] for s in finalizadas],
+        'pacientes': pacientes,
+        'cursores': cursores,
+        'pictogramas': pictogramas,
+        'abertas': abertas
+    }
+
+
+def _lote_selecoes(amostras, i):
+    return {'selecoes': [{
+        'evento_id': uuid.uuid4().hex,
+        'pictograma_id': amostras['pictogramas'][(i + j) % len(amostras['pictogramas'])],
+        'atraso_ms': 0
+    } for j in range(SELECOES_POR_LOTE)]}
+
+
+# Cada cenário recebe (amostras, i) e devolve (método, caminho, corpo)
+CENARIOS = {
+    'sessoes_lista': lambda a, i: ('GET', '/api/sessoes?limite=50', None),
+    'sessoes_pagina': lambda a, i: ('GET', f"/api/sessoes?limite=50&cursor={a['cursores'][i % len(a['cursores'])]}", None)
+    if a['cursores'] else ('GET', '/api/sessoes?limite=50', None),
+    'sessoes_paciente': lambda a, i: ('GET', f"/api/sessoes?paciente_id={a['pacientes'][i % len(a['pacientes'])]}", None),
+    'pictogramas': lambda a, i: ('GET', '/api/pictogramas', None),
+    'quadro': lambda a, i: ('GET', '/api/quadro', None),
+    'historico_sessao': lambda a, i: ('GET', f"/api/sessoes/{a['sessoes'][i % len(a['sessoes'])]}/historico", None),
+    'estatisticas_paciente': lambda a, i: ('GET', f"/api/pacientes/{a['pacientes'][i % len(a['pacientes'])]}/estatisticas", None),
+    'selecao_post': lambda a, i: ('POST', f"/api/sessoes/{a['abertas'][i % len(a['abertas'])]}/selecao", {
+        'pictograma_id': a['pictogramas'][i % len(a['pictogramas'])],
+        'tempo_resposta_segundos': 2.5
+    }),
+    'selecoes_lote_post': lambda a, i: ('POST', f"/api/sessoes/{a['abertas'][i % len(a['abertas'])]}/selecoes",
+                                        _lote_selecoes(a, i)),
+}
+
+
+def percentil(valores_ordenados, p):
+    """Percentil com interpolação linear (mesmo método do percentile_cont)"""
+    if not valores_ordenados:
+        return None
+    posicao = (len(valores_ordenados) - 1) * p / 100
+    base = int(posicao)
+    proximo = min(base + 1, len(valores_ordenados) - 1)
+    return valores_ordenados[base] + (valores_ordenados[proximo] - valores_ordenados[base]) * (posicao - base)
+
+
+def executar_cenario(nome, clientes, amostras, requisicoes, aquecimento):
+    gerar = CENARIOS[nome]
+
+    for i in range(aquecimento):
+        clientes[0].requisitar(*gerar(amostras, i))
+
+    latencias = [[] for _ in clientes]
+    erros = [0] * len(clientes)
+
+    def trabalhar(indice):
+        cliente = clientes[indice]
+        for i in range(indice, requisicoes, len(clientes)):
+            metodo, caminho, corpo = gerar(amostras, i)
+            inicio = time.perf_counter()
+            status, _ = cliente.requisitar(metodo, caminho, corpo)
+            latencias[indice].append(time.perf_counter() - inicio)
+            if status >= 400:
+                erros[indice] += 1
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(clientes)) as executor:
+        list(executor.map(trabalhar, range(len(clientes))))
+    duracao = time.perf_counter() - inicio
+
+    todas = sorted(l for lista in latencias for l in lista)
+    resultado = {
+        'cenario': nome,
+        'requisicoes': len(todas),
+        'erros': sum(erros),
+        'req_por_segundo': round(len(todas) / duracao, 1)
+    }
+    for p in PERCENTIS:
+        resultado[f'p{p}_ms'] = round(percentil(todas, p) * 1000, 2)
+    return resultado
+
+
+def imprimir_tabela(resultados):
+    print(f"\n{'cenário':<24}{'n':>7}{'erros':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    print('-' * 78)
+    for r in resultados:
+        print(f"{r['cenario']:<24}{r['requisicoes']:>7}{r['erros']:>7}"
+              f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['req_por_segundo']:>10.1f}")
+
+
+def descrever_alvo(args):
+    if args.url:
+        return args.url
+    from app import db
+    with ClienteLocal._app.app_context():
+        return f'test client ({db.engine.dialect.name})'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos endpoints principais')
+    parser.add_argument('--url', help='servidor em execução; sem isso usa o test client em processo')
+    parser.add_argument('--login', default='admin')
+    parser.add_argument('--senha', default='1234')
+    parser.add_argument('--requisicoes', type=int, default=200, help='requisições por cenário')
+    parser.add_argument('--concorrencia', type=int, default=1, help='clientes simultâneos')
+    parser.add_argument('--aquecimento', type=int, default=10, help='requisições descartadas por cenário')
+    parser.add_argument('--cenarios', default=','.join(CENARIOS), help='lista separada por vírgula')
+    parser.add_argument('--json', help='grava os resultados neste arquivo (para comparar execuções)')
+    args = parser.parse_args()
+
+    nomes = [n.strip() for n in args.cenarios.split(',') if n.strip()]
+    desconhecidos = [n for n in nomes if n not in CENARIOS]
+    if desconhecidos:
+        raise SystemExit(f"Cenários desconhecidos: {', '.join(desconhecidos)}")
+
+    clientes = [criar_cliente(args) for _ in range(args.concorrencia)]
+    amostras = preparar_amostras(clientes[0])
+    alvo = descrever_alvo(args)
+    print(f"Alvo: {alvo} | {args.requisicoes} requisições por cenário | concorrência {args.concorrencia}")
+
+    resultados = []
+    for nome in nomes:
+        resultados.append(executar_cenario(nome, clientes, amostras, args.requisicoes, args.aquecimento))
+        print(f"  {nome}: ok", flush=True)
+
+    imprimir_tabela(resultados)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'alvo': alvo,
+                'data': datetime.now().isoformat(timespec='seconds'),
+                'requisicoes': args.requisicoes,
+                'concorrencia': args.concorrencia,
+                'resultados': resultados
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados gravados em {args.json}")
+
+
+if __name__ == '__main__':
+    main()
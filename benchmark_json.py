@@ -0,0 +1,107 @@
+"""
+benchmark_json.py
+Compara tamanho e tempo de serialização das respostas JSON
+(antes: json indentado com escape ASCII; depois: compacto, orjson, gzip/brotli)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+Uso:
+    # Sobre uma base gerada por gerar_dados.py (banco de DATABASE_URL)
+    python benchmark_json.py
+    python benchmark_json.py --repeticoes 200 --json resultado_json.json
+"""
+
+import argparse
+import gzip
+import json
+import time
+from flask.json.provider import DefaultJSONProvider
+from app import create_app
+from app.compressao import brotli
+from app.serializacao import ProvedorJSONPadrao, ProvedorORJSON, orjson
+
+
+def coletar_payloads(cliente):
+    """Objetos das respostas de alguns endpoints, obtidos pela própria API"""
+    sessoes = cliente.get('/api/sessoes?limite=200').get_json()
+    if not sessoes['sessoes']:
+        raise SystemExit("Base sem sessões: gere dados com gerar_dados.py")
+    maior = max(sessoes['sessoes'], key=lambda s: s['total_interacoes'] or 0)
+
+    caminhos = {
+        'sessoes (200)': '/api/sessoes?limite=200',
+        'historico_sessao': f"/api/sessoes/{maior['id']}/historico",
+        'estatisticas_paciente': f"/api/pacientes/{maior['paciente_id']}/estatisticas",
+        'pictogramas': '/api/pictogramas',
+        'quadro': '/api/quadro'
+    }
+    return {nome: cliente.get(caminho).get_json() for nome, caminho in caminhos.items()}
+
+
+def criar_variantes(app):
+    """(nome, provedor); 'antes' reproduz a saída indentada com \\uXXXX"""
+    antes = DefaultJSONProvider(app)
+    antes.compact = False
+
+    padrao = ProvedorJSONPadrao(app)
+    padrao.compact = True
+
+    variantes = [('antes: indentado ascii', antes), ('padrao compacto', padrao)]
+    if orjson is not None:
+        rapido = ProvedorORJSON(app)
+        rapido.compact = True
+        variantes.append(('orjson compacto', rapido))
+    return variantes
+
+
+def medir(provedor, obj, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        corpo = provedor.response(obj).get_data()
+    return (time.perf_counter() - inicio) / repeticoes, corpo
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tamanho e tempo de serialização das respostas JSON')
+    parser.add_argument('--login', default='admin')
+    parser.add_argument('--senha', default='1234')
+    parser.add_argument('--repeticoes', type=int, default=50, help='serializações por payload e variante')
+    parser.add_argument('--json', help='grava os resultados neste arquivo')
+    args = parser.parse_args()
+
+    app = create_app()
+    cliente = app.test_client()
+    if cliente.post('/api/login', json={'login': args.login, 'senha': args.senha}).status_code != 200:
+        raise SystemExit("Falha no login: confira --login e --senha")
+
+    payloads = coletar_payloads(cliente)
+    resultados = []
+
+    with app.app_context():
+        variantes = criar_variantes(app)
+        for nome_payload, obj in payloads.items():
+            for nome_variante, provedor in variantes:
+                segundos, corpo = medir(provedor, obj, args.repeticoes)
+                resultados.append({
+                    'payload': nome_payload,
+                    'variante': nome_variante,
+                    'serializacao_ms': round(segundos * 1000, 3),
+                    'bytes': len(corpo),
+                    'gzip_bytes': len(gzip.compress(corpo, compresslevel=app.config['COMPRESSAO_NIVEL_GZIP'])),
+                    'br_bytes': len(brotli.compress(corpo, quality=app.config['COMPRESSAO_QUALIDADE_BROTLI']))
+                    if brotli is not None else None
+                })
+
+    print(f"\n{'payload':<24}{'variante':<26}{'ms':>9}{'bytes':>11}{'gzip':>10}{'br':>10}")
+    print('-' * 90)
+    for r in resultados:
+        br = f"{r['br_bytes']:>10}" if r['br_bytes'] is not None else f"{'-':>10}"
+        print(f"{r['payload']:<24}{r['variante']:<26}{r['serializacao_ms']:>9.3f}{r['bytes']:>11}{r['gzip_bytes']:>10}{br}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'repeticoes': args.repeticoes, 'resultados': resultados}, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados gravados em {args.json}")
+
+
+if __name__ == '__main__':
+    main()
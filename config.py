@@ -19,27 +19,95 @@ class Config:
         database_url = database_url.replace('postgres://', 'postgresql://', 1)
     SQLALCHEMY_DATABASE_URI = database_url
 
+    # Réplica de leitura opcional (ver app/replica.py): listagens, histórico e estatísticas
+    replica_url = os.environ.get('REPLICA_DATABASE_URL')
+    if replica_url and replica_url.startswith('postgres://'):
+        replica_url = replica_url.replace('postgres://', 'postgresql://', 1)
+    REPLICA_DATABASE_URL = replica_url
+    # Segundos após uma escrita em que o mesmo cliente continua lendo do primário
+    REPLICA_JANELA_ESCRITA = float(os.environ.get('REPLICA_JANELA_ESCRITA', 5))
+
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Perfil do engine (ver app/banco.py). SQLite: WAL e pragmas em cada conexão
+    SQLITE_BUSY_TIMEOUT_MS = 15000  # Espera pelo lock de escrita antes de "database is locked"
+    SQLITE_SYNCHRONOUS = 'NORMAL'
+    SQLITE_CACHE_KB = 20000  # Por conexão
+    # PostgreSQL: pool por worker (workers x (tamanho + excedente) <= limite de conexões do plano)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_POOL_MAX_OVERFLOW = int(os.environ.get('DB_POOL_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = 10  # Segundos esperando conexão livre no pool
+    DB_POOL_RECYCLE = 1800  # Renova conexões com mais de 30 min
+    # Limite por comando SQL (0 = sem limite). Só o app web (ProductionConfig) limita:
+    # os scripts de manutenção usam a configuração padrão e podem rodar consultas longas
+    DB_STATEMENT_TIMEOUT_MS = 0
     PERMANENT_SESSION_LIFETIME = timedelta(hours=2)
-    SESSION_TYPE = 'filesystem'
+    # Sessão de login (ver sessoes_login.py): 'filesystem' guarda os dados em SESSION_FILE_DIR,
+    # compartilhados pelos workers da máquina; 'cookie' usa o cookie assinado do Flask
+    SESSION_TYPE = os.environ.get('SESSION_TYPE', 'filesystem')
+    SESSION_FILE_DIR = os.environ.get('SESSION_FILE_DIR') or os.path.join(basedir, 'database', 'sessoes')
+    SESSAO_PERFIL_VALIDADE = 300  # Segundos até o perfil do usuário em cache ser relido do banco
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024
     UPLOAD_FOLDER = os.path.join(basedir, 'app', 'static', 'uploads')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-    JSON_AS_ASCII = False
-    JSONIFY_PRETTYPRINT_REGULAR = True
+
+    # JSON das respostas (ver serializacao.py): auto = orjson se instalado, orjson ou padrao
+    # JSON_COMPACTO None = indentado só em modo debug
+    JSON_PROVEDOR = os.environ.get('JSON_PROVEDOR', 'auto')
+    JSON_COMPACTO = None
+
+    # Compressão gzip/brotli negociada pelo Accept-Encoding (ver compressao.py)
+    COMPRESSAO_ATIVA = os.environ.get('COMPRESSAO_ATIVA', '1') == '1'
+    COMPRESSAO_MINIMO_BYTES = 1024  # Respostas menores vão sem compressão
+    COMPRESSAO_NIVEL_GZIP = 6
+    COMPRESSAO_QUALIDADE_BROTLI = 4  # Respostas dinâmicas; estáticos usam o nível máximo (em cache)
+
+    # CSS/JS de static/dist/ gerados por construir_assets.py na etapa de build (nome com hash, cache immutable).
+    # Desligado em desenvolvimento: os templates usam direto css/ e js/, sem precisar reconstruir
+    ASSETS_MINIFICADOS = True
 
     # Cloudinary Configuration
     CLOUDINARY_CLOUD_NAME = os.environ.get('CLOUDINARY_CLOUD_NAME')
     CLOUDINARY_API_KEY = os.environ.get('CLOUDINARY_API_KEY')
     CLOUDINARY_API_SECRET = os.environ.get('CLOUDINARY_API_SECRET')
 
+    # Uploads em segundo plano: auto (Cloudinary se configurado), cloudinary, local ou simulado
+    UPLOADER = os.environ.get('UPLOADER', 'auto')
+    UPLOAD_MAX_CONCORRENCIA = 2  # Envios simultâneos por worker
+    UPLOAD_MAX_PENDENTES = 20  # Acima disso o upload responde 503
+    UPLOAD_SIMULADO_ATRASO = 0.5  # Segundos de espera do uploader simulado
+    UPLOAD_TEMPO_MAXIMO = 600  # Segundos até uma tarefa não concluída (worker reiniciado) virar erro
+
+    # Predição do próximo pictograma: carrega todos os pacientes ao iniciar
+    # (senão cada paciente é carregado do banco no primeiro pedido)
+    PREDICAO_CARREGAR_NA_INICIALIZACAO = os.environ.get('PREDICAO_CARREGAR_NA_INICIALIZACAO') == '1'
+
+    # Sessões finalizadas há mais dias que isso são compactadas por arquivar_historico.py
+    RETENCAO_HISTORICO_DIAS = int(os.environ.get('RETENCAO_HISTORICO_DIAS', 365))
+
+    # Acompanhamento ao vivo (/api/sessoes/<id>/ao-vivo, ver ao_vivo.py)
+    AO_VIVO_HEARTBEAT = 10  # Segundos sem eventos até enviar um comentário de keep-alive
+    AO_VIVO_INTERVALO_BANCO = 2  # Segundos entre consultas por seleções gravadas em outros workers
+    # Cada stream ocupa uma thread do worker (Procfile: gunicorn -k gthread --threads 8) e
+    # não segura conexão do banco enquanto espera. Em worker sync o stream é recusado (503):
+    # ocuparia o único atendimento do processo e travaria o registro das seleções
+    AO_VIVO_DURACAO_MAXIMA = int(os.environ.get('AO_VIVO_DURACAO_MAXIMA', 300))
+    AO_VIVO_RECONEXAO_MS = 1000
+    AO_VIVO_MAX_PENDENTES = 100  # Eventos na fila de cada ouvinte antes de reler do banco
+    # Streams por worker; acima disso responde 503. Fica abaixo de --threads para
+    # sobrar threads para os tablets registrarem as seleções
+    AO_VIVO_MAX_OUVINTES = int(os.environ.get('AO_VIVO_MAX_OUVINTES', 4))
+
 class DevelopmentConfig(Config):
     DEBUG = True
     TESTING = False
+    ASSETS_MINIFICADOS = False
 
 class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
+    JSON_COMPACTO = True
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
 
 config = {
     'development': DevelopmentConfig,
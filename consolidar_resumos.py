@@ -0,0 +1,36 @@
+"""
+consolidar_resumos.py
+Reconstrói as tabelas de resumo (resumo_sessao e uso_diario) a partir do histórico
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+Uso:
+    python migrar_db.py            # cria as tabelas, se ainda não existirem
+    python consolidar_resumos.py   # preenche com as sessões já finalizadas
+
+Depois disso as tabelas são mantidas ao finalizar cada sessão.
+"""
+
+import time
+from app import create_app, db
+from app.resumos import reconstruir_resumos
+
+
+def mostrar_progresso(tabela, gravadas):
+    print(f"  {tabela}: {gravadas} linhas", flush=True)
+
+
+def consolidar():
+    app = create_app()
+
+    with app.app_context():
+        print(f"Banco: {db.engine.dialect.name}")
+        print("Reconstruindo resumos das sessões finalizadas...")
+        inicio = time.perf_counter()
+        totais = reconstruir_resumos(mostrar_progresso)
+
+    print(f"\nConcluído em {time.perf_counter() - inicio:.1f}s: "
+          f"{totais['resumo_sessao']} sessões, {totais['uso_diario']} linhas de uso diário.")
+
+
+if __name__ == '__main__':
+    consolidar()
@@ -0,0 +1,40 @@
+"""
+construir_assets.py
+Gera os CSS e JavaScript minificados com hash no nome em app/static/dist/
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+Uso:
+    # Após editar css/ ou js/ (static/dist/ não vai para o git)
+    python construir_assets.py
+
+    # No deploy, na etapa de build e não na de start (Render: Build Command)
+    pip install -r requirements.txt && python construir_assets.py
+
+Os templates referenciam os arquivos por asset('js/gerenciar.js'); o
+manifesto app/static/dist/manifesto.json diz qual arquivo gerado servir.
+Sem o manifesto, a aplicação avisa no log e serve os arquivos originais.
+"""
+
+import argparse
+import os
+from app.assets import construir
+
+PASTA_STATIC = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Minifica e versiona os assets estáticos')
+    parser.add_argument('--static', default=PASTA_STATIC, help='pasta static da aplicação')
+    args = parser.parse_args()
+
+    resultados = construir(args.static)
+    total_origem = total_gerado = 0
+    for origem, gerado, bytes_origem, bytes_gerado in resultados:
+        total_origem += bytes_origem
+        total_gerado += bytes_gerado
+        print(f"{origem:<28} -> {gerado:<40} {bytes_origem:>8} -> {bytes_gerado:>8} bytes")
+    print(f"{len(resultados)} arquivos: {total_origem} -> {total_gerado} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""
+estresse_banco.py
+Teste de concorrência: vários processos (como workers do gunicorn) gravando
+seleções ao mesmo tempo, contando erros de contenção ("database is locked")
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+Uso:
+    # SQLite temporário, criado e populado pelo próprio script
+    python estresse_banco.py --workers 8 --requisicoes 300
+
+    # Banco de DATABASE_URL (use uma base de teste, o script grava seleções)
+    DATABASE_URL=postgresql://localhost/caa_bench python estresse_banco.py --usar-banco-atual
+
+    # Abertura simultânea de sessão para o mesmo paciente (POST /api/sessoes)
+    python estresse_banco.py --cenario abrir_sessao --workers 16 --pacientes 50
+
+Cada worker alterna seleção avulsa, lote com evento_id (lê e depois grava)
+e listagem de sessões. Com --exportando, outros processos ficam baixando a
+exportação em streaming devagar (como um cliente em rede móvel), o que mantém
+uma leitura aberta por vários segundos: sem WAL, isso bloqueia os commits.
+No fim, confere se o número de linhas gravadas bate com o que a API confirmou.
+
+No cenário abrir_sessao, todos os workers pedem a sessão do mesmo paciente
+ao mesmo tempo (barreira a cada rodada), como um tablet que dispara duas
+vezes ou dois aparelhos abrindo o mesmo paciente. Todos devem receber o
+mesmo sessao_id e o banco deve ter uma única sessão aberta por paciente.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import uuid
+from collections import Counter
+
+
+def _criar_cliente():
+    from app import create_app
+    app = create_app()
+    cliente = app.test_client()
+    cliente.post('/api/login', json={'login': 'admin', 'senha': '1234'})
+    return app, cliente
+
+
+def criar_pacientes(cliente, quantidade):
+    return [cliente.post('/api/pacientes', json={
+        'nome': f'Estresse {uuid.uuid4().hex[:6]}'
+    }).get_json()['paciente']['id'] for _ in range(quantidade)]
+
+
+def preparar(qtd_sessoes):
+    """Abre uma sessão em cada um de `qtd_sessoes` pacientes novos"""
+    _, cliente = _criar_cliente()
+    sessoes = [
+        cliente.post('/api/sessoes', json={'paciente_id': paciente_id}).get_json()['sessao_id']
+        for paciente_id in criar_pacientes(cliente, qtd_sessoes)
+    ]
+
+    pictogramas = [p['id'] for p in cliente.get('/api/pictogramas').get_json()['pictogramas']]
+    return sessoes, pictogramas
+
+
+def trabalhar(indice, requisicoes, sessoes, pictogramas, fila):
+    from sqlalchemy.exc import OperationalError
+
+    _, cliente = _criar_cliente()
+    erros = Counter()
+    inseridas = 0
+    latencias = []
+    aleatorio = random.Random(indice)
+
+    for i in range(requisicoes):
+        sessao_id = aleatorio.choice(sessoes)
+        tipo = i % 3
+        inicio = time.perf_counter()
+        try:
+            # Em modo debug o test client repassa a exceção em vez do 500
+            if tipo == 0:
+                resposta = cliente.post(f'/api/sessoes/{sessao_id}/selecao', json={
+                    'pictograma_id': aleatorio.choice(pictogramas), 'tempo_resposta_segundos': 1.5
+                })
+            elif tipo == 1:
+                resposta = cliente.post(f'/api/sessoes/{sessao_id}/selecoes', json={'selecoes': [{
+                    'evento_id': uuid.uuid4().hex, 'pictograma_id': aleatorio.choice(pictogramas)
+                } for _ in range(5)]})
+            else:
+                resposta = cliente.get('/api/sessoes?limite=20')
+        except OperationalError as e:
+            erros[str(e.orig)] += 1
+            continue
+        finally:
+            latencias.append(time.perf_counter() - inicio)
+
+        if resposta.status_code >= 500:
+            erros[f'HTTP {resposta.status_code}'] += 1
+        elif tipo == 0 and resposta.status_code == 201:
+            inseridas += 1
+        elif tipo == 1 and resposta.status_code == 201:
+            inseridas += resposta.get_json()['inseridas']
+
+    fila.put((dict(erros), inseridas, latencias))
+
+
+def exportar(parar):
+    """Baixa a exportação em streaming, lendo devagar, até os workers terminarem"""
+    _, cliente = _criar_cliente()
+    while not parar.is_set():
+        resposta = cliente.get('/api/exportar/selecoes?formato=ndjson', buffered=False)
+        for i, _ in enumerate(resposta.response):
+            if i % 200 == 0:
+                time.sleep(0.01)
+            if parar.is_set():
+                break
+        resposta.close()
+
+
+def abrir_sessoes(pacientes, barreira, fila):
+    """Uma rodada por paciente: todos os workers pedem a sessão dele juntos"""
+    from sqlalchemy.exc import SQLAlchemyError
+
+    _, cliente = _criar_cliente()
+    recebidas, erros = {}, Counter()
+    for paciente_id in pacientes:
+        barreira.wait()
+        try:
+            resposta = cliente.post('/api/sessoes', json={'paciente_id': paciente_id})
+        except SQLAlchemyError as e:
+            erros[type(e).__name__ + ': ' + str(e.orig).splitlines()[0]] += 1
+            continue
+        if resposta.status_code in (200, 201):
+            recebidas[paciente_id] = resposta.get_json()['sessao_id']
+        else:
+            erros[f'HTTP {resposta.status_code}'] += 1
+    fila.put((recebidas, dict(erros)))
+
+
+def estressar_abertura(args):
+    """Retorna erros, pacientes com sessões abertas duplicadas e com sessao_id divergente"""
+    _, cliente = _criar_cliente()
+    pacientes = criar_pacientes(cliente, args.pacientes)
+
+    fila = multiprocessing.Queue()
+    barreira = multiprocessing.Barrier(args.workers)
+    processos = [multiprocessing.Process(target=abrir_sessoes, args=(pacientes, barreira, fila))
+                 for _ in range(args.workers)]
+
+    inicio = time.perf_counter()
+    for p in processos:
+        p.start()
+    resultados = [fila.get() for _ in processos]
+    for p in processos:
+        p.join()
+    duracao = time.perf_counter() - inicio
+
+    from app import create_app, db
+    from app.models import Sessao
+    app = create_app()
+    with app.app_context():
+        abertas = Counter(paciente_id for (paciente_id,) in db.session.query(Sessao.paciente_id).filter(
+            Sessao.paciente_id.in_(pacientes), Sessao.finalizada == False
+        ))
+
+    erros = Counter()
+    for _, parcial in resultados:
+        erros.update(parcial)
+    divergentes = sum(1 for paciente_id in pacientes
+                      if len({r[paciente_id] for r, _ in resultados if paciente_id in r}) > 1)
+    duplicados = sum(1 for qtd in abertas.values() if qtd > 1)
+
+    print(f"{args.workers} workers x {args.pacientes} pacientes em {duracao:.1f} s")
+    print(f"Pacientes com mais de uma sessão aberta: {duplicados} | "
+          f"com sessao_id diferente entre workers: {divergentes}")
+    for tipo, qtd in erros.most_common():
+        print(f"  ERRO {tipo}: {qtd}")
+    if not (erros or duplicados or divergentes):
+        print("Uma sessão aberta por paciente")
+
+    return {'erros': dict(erros), 'duplicados': duplicados, 'divergentes': divergentes}
+
+
+def estressar_selecoes(args):
+    """Retorna erros e seleções confirmadas pela API e gravadas no banco"""
+    sessoes, pictogramas = preparar(args.sessoes)
+
+    from app import create_app, db
+    from app.models import HistoricoSelecao
+    app = create_app()
+    with app.app_context():
+        antes = HistoricoSelecao.query.filter(HistoricoSelecao.sessao_id.in_(sessoes)).count()
+        print(f"Banco: {db.engine.url.render_as_string(hide_password=True)}")
+
+    fila = multiprocessing.Queue()
+    processos = [multiprocessing.Process(target=trabalhar, args=(
+        i, args.requisicoes, sessoes, pictogramas, fila
+    )) for i in range(args.workers)]
+
+    parar = multiprocessing.Event()
+    leitores = [multiprocessing.Process(target=exportar, args=(parar,)) for _ in range(args.exportando)]
+    for p in leitores:
+        p.start()
+
+    inicio = time.perf_counter()
+    for p in processos:
+        p.start()
+    resultados = [fila.get() for _ in processos]
+    for p in processos:
+        p.join()
+    duracao = time.perf_counter() - inicio
+
+    parar.set()
+    for p in leitores:
+        p.join()
+
+    erros = Counter()
+    for parcial, _, _ in resultados:
+        erros.update(parcial)
+    confirmadas = sum(r[1] for r in resultados)
+    latencias = sorted(l for r in resultados for l in r[2])
+
+    with app.app_context():
+        gravadas = HistoricoSelecao.query.filter(HistoricoSelecao.sessao_id.in_(sessoes)).count() - antes
+
+    total = len(latencias)
+    print(f"{args.workers} workers x {args.requisicoes} requisições em {duracao:.1f} s "
+          f"({total / duracao:.0f} req/s, p95 {latencias[int(total * 0.95)] * 1000:.0f} ms)")
+    print(f"Seleções confirmadas pela API: {confirmadas} | gravadas no banco: {gravadas}")
+    if erros:
+        for tipo, qtd in erros.most_common():
+            print(f"  ERRO {tipo}: {qtd}")
+    else:
+        print("Nenhum erro de contenção")
+
+    return {'erros': dict(erros), 'confirmadas': confirmadas, 'gravadas': gravadas}
+
+
+def falhou(resultado):
+    return bool(resultado['erros'] or resultado.get('duplicados') or resultado.get('divergentes')
+                or resultado.get('confirmadas') != resultado.get('gravadas'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Estresse de escrita concorrente no banco')
+    parser.add_argument('--workers', type=int, default=8, help='processos simultâneos')
+    parser.add_argument('--requisicoes', type=int, default=300, help='requisições por worker')
+    parser.add_argument('--cenario', choices=('selecoes', 'abrir_sessao'), default='selecoes')
+    parser.add_argument('--sessoes', type=int, default=4, help='sessões abertas disputadas')
+    parser.add_argument('--pacientes', type=int, default=50, help='rodadas do cenário abrir_sessao')
+    parser.add_argument('--exportando', type=int, default=0,
+                        help='processos baixando a exportação durante o teste (leituras longas)')
+    parser.add_argument('--usar-banco-atual', action='store_true',
+                        help='usa DATABASE_URL em vez de um SQLite temporário')
+    args = parser.parse_args()
+
+    if not args.usar_banco_atual:
+        pasta = tempfile.mkdtemp(prefix='estresse_')
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'estresse.db')
+        from init_db import inicializar_banco
+        inicializar_banco()
+
+    if args.cenario == 'abrir_sessao':
+        resultado = estressar_abertura(args)
+    else:
+        resultado = estressar_selecoes(args)
+    if falhou(resultado):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
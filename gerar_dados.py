@@ -0,0 +1,229 @@
+"""
+gerar_dados.py
+Gera uma base sintética grande para testes de carga (profissionais, pacientes, sessões e seleções)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+Uso:
+    python gerar_dados.py --profissionais 50 --pacientes 2000 --sessoes 200000
+    DATABASE_URL=postgresql://localhost/caa_bench python gerar_dados.py --sessoes 1000000
+
+Parte do banco criado por init_db.inicializar_banco() (admin, categorias e pictogramas)
+e insere tudo em lote, com ids atribuídos aqui para não precisar reler o banco.
+
+Distribuições usadas:
+    - sessões por paciente: Pareto (poucos pacientes concentram muito uso)
+    - horário: dias úteis (fins de semana raros), das 8h às 18h
+    - seleções por sessão: log-normal em torno de --selecoes-por-sessao
+    - pictograma escolhido: Zipf, com um ranking diferente para cada paciente
+    - tempo de resposta: log-normal com mediana de 3 segundos
+"""
+
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, text
+from app import create_app, db
+from app.models import Usuario, Paciente, Pictograma, Sessao, HistoricoSelecao
+from app.resumos import reconstruir_resumos
+from init_db import inicializar_banco
+
+TAMANHO_LOTE = 10000
+CARGOS = ['Terapeuta Ocupacional', 'Fonoaudiólogo', 'Psicólogo', 'Pedagogo']
+NIVEIS_SUPORTE = ['Nível 1', 'Nível 2', 'Nível 3']
+EXPOENTE_ZIPF = 1.1
+
+
+def proximo_id(modelo):
+    return (db.session.query(func.max(modelo.id)).scalar() or 0) + 1
+
+
+def inserir_em_lotes(modelo, linhas):
+    """INSERT com executemany em blocos de TAMANHO_LOTE"""
+    for i in range(0, len(linhas), TAMANHO_LOTE):
+        db.session.execute(modelo.__table__.insert(), linhas[i:i + TAMANHO_LOTE])
+    db.session.commit()
+
+
+def ajustar_sequencias():
+    """No PostgreSQL, ids inseridos explicitamente não avançam a sequência do SERIAL"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for modelo in (Usuario, Paciente, Sessao):
+        tabela = modelo.__tablename__
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), (SELECT MAX(id) FROM {tabela}))"
+        ))
+    db.session.commit()
+
+
+def horario_sessao(rng, dias):
+    """Início de sessão em dia útil (90%), em horário de atendimento"""
+    agora = datetime.now()
+    while True:
+        dia = agora - timedelta(days=rng.randrange(dias))
+        if dia.weekday() < 5 or rng.random() < 0.1:
+            break
+    return dia.replace(hour=rng.randrange(8, 18), minute=rng.randrange(60), second=rng.randrange(60), microsecond=0)
+
+
+def gerar_profissionais(rng, quantidade):
+    inicio = proximo_id(Usuario)
+    linhas = [{
+        'id': inicio + i,
+        'nome': f'Profissional {inicio + i}',
+        'login': f'prof{inicio + i:05d}',
+        'senha': '1234',
+        'cargo': rng.choice(CARGOS),
+        'ativo': True,
+        'data_criacao': datetime.utcnow()
+    } for i in range(quantidade)]
+    inserir_em_lotes(Usuario, linhas)
+    return [linha['id'] for linha in linhas]
+
+
+def gerar_pacientes(rng, quantidade, profissionais):
+    inicio = proximo_id(Paciente)
+    linhas = [{
+        'id': inicio + i,
+        'nome': f'Paciente {inicio + i}',
+        'data_nascimento': (datetime.now() - timedelta(days=rng.randrange(3 * 365, 14 * 365))).date(),
+        'nivel_suporte': rng.choices(NIVEIS_SUPORTE, weights=[3, 5, 2])[0],
+        'usuario_id': rng.choice(profissionais),
+        'ativo': True,
+        'data_cadastro': datetime.utcnow(),
+        'ordem_personalizada': False
+    } for i in range(quantidade)]
+    inserir_em_lotes(Paciente, linhas)
+    return [(linha['id'], linha['usuario_id']) for linha in linhas]
+
+
+def gerar_sessoes(rng, total, pacientes, profissionais, pictogramas, media_selecoes, dias, fracao_abertas):
+    """Gera sessões e seleções em blocos, mostrando o progresso"""
+    indices_pacientes = range(len(pacientes))
+    acumulado_pacientes = list(_acumular(rng.paretovariate(1.5) for _ in pacientes))
+    # Zipf: a posição r no ranking do paciente tem peso 1 / (r + 1) ^ s
+    acumulado = list(_acumular(1 / (r + 1) ** EXPOENTE_ZIPF for r in range(len(pictogramas))))
+    posicoes = range(len(pictogramas))
+    sigma = 0.6
+    mu = math.log(media_selecoes) - sigma ** 2 / 2
+
+    proxima_sessao = proximo_id(Sessao)
+    criadas = selecoes = 0
+    inicio = time.perf_counter()
+
+    abertas = rng.sample(range(len(pacientes)), int(len(pacientes) * fracao_abertas))
+    total_geral = total + len(abertas)
+
+    while criadas < total_geral:
+        sessoes, historico = [], []
+        for _ in range(min(TAMANHO_LOTE, total_geral - criadas)):
+            if criadas >= total:
+                indice = abertas.pop()  # Uma sessão aberta (recente) por paciente sorteado
+                data_inicio = datetime.now().replace(microsecond=0) - timedelta(minutes=rng.randrange(5, 30))
+            else:
+                indice = rng.choices(indices_pacientes, cum_weights=acumulado_pacientes)[0]
+                data_inicio = horario_sessao(rng, dias)
+            paciente_id, responsavel = pacientes[indice]
+            profissional_id = responsavel if rng.random() < 0.85 else rng.choice(profissionais)
+            finalizada = criadas < total
+
+            # Cada paciente tem o seu ranking: o pictograma mais usado muda de paciente para paciente
+            deslocamento = paciente_id * 7919 % len(pictogramas)
+            quantidade = max(1, int(rng.lognormvariate(mu, sigma)))
+            momento = data_inicio
+            for posicao in rng.choices(posicoes, cum_weights=acumulado, k=quantidade):
+                tempo_resposta = round(min(rng.lognormvariate(math.log(3), 0.7), 120), 2)
+                momento += timedelta(seconds=tempo_resposta)
+                historico.append({
+                    'sessao_id': proxima_sessao,
+                    'pictograma_id': pictogramas[(posicao + deslocamento) % len(pictogramas)],
+                    'timestamp': momento,
+                    'tempo_resposta_segundos': tempo_resposta
+                })
+
+            duracao = max(5, min(60, int(rng.lognormvariate(math.log(20), 0.4))))
+            sessoes.append({
+                'id': proxima_sessao,
+                'paciente_id': paciente_id,
+                'profissional_id': profissional_id,
+                'data_inicio': data_inicio,
+                'data_fim': data_inicio + timedelta(minutes=duracao) if finalizada else None,
+                'duracao_minutos': duracao if finalizada else None,
+                'avaliacao': 'Sessão sintética' if finalizada else None,
+                'finalizada': finalizada
+            })
+            proxima_sessao += 1
+            criadas += 1
+
+        inserir_em_lotes(Sessao, sessoes)
+        inserir_em_lotes(HistoricoSelecao, historico)
+        selecoes += len(historico)
+
+        segundos = time.perf_counter() - inicio
+        print(f"  {criadas} sessões, {selecoes} seleções ({(criadas + selecoes) / segundos:,.0f} linhas/s)", flush=True)
+
+    return criadas, selecoes
+
+
+def _acumular(valores):
+    """Pesos acumulados: com cum_weights o random.choices sorteia em O(log n)"""
+    total = 0.0
+    for valor in valores:
+        total += valor
+        yield total
+
+
+def gerar(profissionais, pacientes, sessoes, media_selecoes, dias, fracao_abertas, semente):
+    inicializar_banco()
+
+    app = create_app()
+    rng = random.Random(semente)
+
+    with app.app_context():
+        pictogramas = [pid for (pid,) in db.session.query(Pictograma.id).filter_by(ativo=True).order_by(Pictograma.id)]
+        if not pictogramas:
+            print("Nenhum pictograma ativo: rode init_db.py ou importe uma biblioteca antes.")
+            return
+
+        inicio = time.perf_counter()
+        print(f"Banco: {db.engine.dialect.name} | {len(pictogramas)} pictogramas ativos")
+
+        print(f"Criando {profissionais} profissionais...")
+        ids_profissionais = gerar_profissionais(rng, profissionais)
+
+        print(f"Criando {pacientes} pacientes...")
+        lista_pacientes = gerar_pacientes(rng, pacientes, ids_profissionais)
+
+        print(f"Criando {sessoes} sessões finalizadas (+{int(pacientes * fracao_abertas)} abertas)...")
+        total_sessoes, total_selecoes = gerar_sessoes(
+            rng, sessoes, lista_pacientes, ids_profissionais, pictogramas,
+            media_selecoes, dias, fracao_abertas
+        )
+
+        ajustar_sequencias()
+
+        # Sessões finalizadas direto no banco não passaram por consolidar_sessao
+        print("Consolidando resumos das sessões finalizadas...")
+        reconstruir_resumos()
+
+        print(f"\nConcluído em {time.perf_counter() - inicio:.1f}s: "
+              f"{total_sessoes} sessões e {total_selecoes} seleções.")
+        print(f"Login dos profissionais gerados: prof{ids_profissionais[0]:05d} ... "
+              f"prof{ids_profissionais[-1]:05d}, senha 1234.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera dados sintéticos para testes de carga')
+    parser.add_argument('--profissionais', type=int, default=20)
+    parser.add_argument('--pacientes', type=int, default=500)
+    parser.add_argument('--sessoes', type=int, default=50000, help='sessões finalizadas')
+    parser.add_argument('--selecoes-por-sessao', type=float, default=25, help='média de seleções por sessão')
+    parser.add_argument('--dias', type=int, default=365, help='período coberto pelas sessões')
+    parser.add_argument('--abertas', type=float, default=0.05, help='fração de pacientes com sessão aberta')
+    parser.add_argument('--semente', type=int, default=42, help='semente do gerador (resultados reproduzíveis)')
+    args = parser.parse_args()
+
+    gerar(args.profissionais, args.pacientes, args.sessoes, args.selecoes_por_sessao,
+          args.dias, args.abertas, args.semente)
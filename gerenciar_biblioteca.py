@@ -0,0 +1,67 @@
+"""
+gerenciar_biblioteca.py
+Importa ou exporta a biblioteca de pictogramas (categorias, pictogramas e imagens)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+Uso:
+    python gerenciar_biblioteca.py exportar biblioteca.zip                   # imagens locais no zip
+    python gerenciar_biblioteca.py exportar biblioteca.zip --baixar-remotas  # inclui imagens do Cloudinary
+    python gerenciar_biblioteca.py importar biblioteca.zip [--lote 500]
+
+O formato do arquivo está descrito em app/biblioteca.py.
+"""
+
+import argparse
+from app import create_app
+from app.biblioteca import TAMANHO_LOTE, importar_biblioteca, exportar_biblioteca
+
+
+def mostrar_progresso(etapa, feitos, total):
+    print(f"  {etapa}: {feitos}/{total}", flush=True)
+
+
+def importar(caminho, tamanho_lote):
+    app = create_app()
+
+    with app.app_context():
+        print(f"Importando {caminho}...")
+        relatorio = importar_biblioteca(caminho, app.config, tamanho_lote, mostrar_progresso)
+
+    print("\nImportação concluída!")
+    for chave, valor in relatorio.items():
+        print(f"  {chave}: {valor}")
+
+
+def exportar(caminho, baixar_remotas, incluir_inativos):
+    app = create_app()
+
+    with app.app_context():
+        print(f"Exportando para {caminho}...")
+        # Fora do servidor não há timeout de worker: baixa todas as imagens remotas
+        relatorio = exportar_biblioteca(caminho, baixar_remotas, incluir_inativos,
+                                        tempo_max_downloads=None)
+
+    print("\nExportação concluída!")
+    for chave, valor in relatorio.items():
+        print(f"  {chave}: {valor}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Importa ou exporta a biblioteca de pictogramas')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    p_importar = comandos.add_parser('importar', help='carrega um .zip de biblioteca')
+    p_importar.add_argument('arquivo')
+    p_importar.add_argument('--lote', type=int, default=TAMANHO_LOTE, help='pictogramas por lote de envio e de gravação (uma transação ao final)')
+
+    p_exportar = comandos.add_parser('exportar', help='gera um .zip com a biblioteca atual')
+    p_exportar.add_argument('arquivo')
+    p_exportar.add_argument('--baixar-remotas', action='store_true', help='baixa as imagens remotas para o zip')
+    p_exportar.add_argument('--inativos', action='store_true', help='inclui pictogramas desativados')
+
+    args = parser.parse_args()
+
+    if args.comando == 'importar':
+        importar(args.arquivo, args.lote)
+    else:
+        exportar(args.arquivo, args.baixar_remotas, args.inativos)
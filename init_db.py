@@ -1,4 +1,5 @@
 from app import create_app, db
+from app.cache import cache_quadro
 from app.models import Usuario, Categoria, Pictograma
 
 def inicializar_banco():
@@ -23,6 +24,10 @@ def inicializar_banco():
             db.session.commit()
             print("Usuário admin criado! Login: admin | Senha: 1234")
         
+        # Contador de versão do cache (ver app/cache.py)
+        cache_quadro.criar_versao()
+        db.session.commit()
+        
         print("Populando banco...")
         
         # Verifica se já existem categorias
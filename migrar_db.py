@@ -0,0 +1,204 @@
+"""
+migrar_db.py
+Atualiza bancos existentes (SQLite ou PostgreSQL) para o esquema atual dos modelos
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+Uso:
+    python migrar_db.py              # aplica tabelas, colunas e índices que faltam
+    python migrar_db.py --explicar   # mostra o plano das consultas antes e depois
+    python migrar_db.py --simular    # apenas lista o que seria feito
+"""
+
+import argparse
+from itertools import groupby
+from sqlalchemy import inspect, select, text
+from app import create_app, db
+from app import models  # noqa: F401 - registra os modelos no metadata
+from app.cache import cache_quadro
+
+# Consultas mais frequentes da aplicação, usadas para comparar os planos
+CONSULTAS_QUENTES = {
+    'historico da sessão': (
+        'SELECT * FROM historico_selecao WHERE sessao_id = :id ORDER BY timestamp',
+        {'id': 1}
+    ),
+    'sessão aberta do paciente': (
+        'SELECT * FROM sessao WHERE paciente_id = :id AND finalizada = :finalizada',
+        {'id': 1, 'finalizada': False}
+    ),
+    'listagem de sessões': (
+        'SELECT * FROM sessao ORDER BY data_inicio DESC, id DESC LIMIT 50',
+        {}
+    ),
+    'pacientes do profissional': (
+        'SELECT * FROM paciente WHERE usuario_id = :id AND ativo = :ativo ORDER BY nome',
+        {'id': 1, 'ativo': True}
+    ),
+    'pictogramas da categoria': (
+        'SELECT * FROM pictograma WHERE categoria_id = :id AND ativo = :ativo ORDER BY ordem',
+        {'id': 1, 'ativo': True}
+    ),
+}
+
+
+def unificar_sessoes_abertas(conexao):
+    """
+    Prepara ix_sessao_paciente_aberta (única): pacientes com mais de uma sessão
+    aberta ficam só com a mais antiga, que recebe as seleções das demais
+    """
+    sessao = db.metadata.tables['sessao']
+    historico = db.metadata.tables['historico_selecao']
+
+    abertas = conexao.execute(
+        select(sessao.c.paciente_id, sessao.c.id).where(sessao.c.finalizada == False).order_by(
+            sessao.c.paciente_id, sessao.c.data_inicio, sessao.c.id
+        )
+    ).all()
+
+    unificadas = 0
+    for _, grupo in groupby(abertas, key=lambda linha: linha[0]):
+        ids = [sessao_id for _, sessao_id in grupo]
+        if len(ids) < 2:
+            continue
+        manter, duplicadas = ids[0], ids[1:]
+        conexao.execute(historico.update().where(historico.c.sessao_id.in_(duplicadas)).values(sessao_id=manter))
+        conexao.execute(sessao.delete().where(sessao.c.id.in_(duplicadas)))
+        unificadas += len(duplicadas)
+    print(f"  {unificadas} sessões abertas duplicadas unificadas")
+
+
+# Ajustes de dados que precisam rodar antes de criar certos índices
+PREPARAR_INDICE = {
+    'ix_sessao_paciente_aberta': unificar_sessoes_abertas,
+}
+
+
+def planejar_migracao(conexao):
+    """Compara o banco com os modelos e retorna a lista de (descrição, ação)"""
+    inspetor = inspect(conexao)
+    tabelas_existentes = set(inspetor.get_table_names())
+    passos = []
+
+    for tabela in db.metadata.sorted_tables:
+        if tabela.name not in tabelas_existentes:
+            passos.append((
+                f'criar tabela {tabela.name}',
+                lambda c, t=tabela: t.create(c)
+            ))
+            continue
+
+        colunas_existentes = {col['name'] for col in inspetor.get_columns(tabela.name)}
+        for coluna in tabela.columns:
+            if coluna.name in colunas_existentes:
+                continue
+            tipo = coluna.type.compile(dialect=conexao.dialect)
+            # Colunas novas entram como anuláveis: linhas antigas não têm valor
+            sql = f'ALTER TABLE {tabela.name} ADD COLUMN {coluna.name} {tipo}'
+            passos.append((
+                f'adicionar coluna {tabela.name}.{coluna.name}',
+                lambda c, s=sql: c.execute(text(s))
+            ))
+
+        indices_existentes = {ix['name'] for ix in inspetor.get_indexes(tabela.name)}
+        for indice in tabela.indexes:
+            if indice.name not in indices_existentes:
+                if indice.name in PREPARAR_INDICE:
+                    passos.append((
+                        f'preparar dados para o índice {indice.name}',
+                        PREPARAR_INDICE[indice.name]
+                    ))
+                passos.append((
+                    f'criar índice {indice.name}',
+                    lambda c, i=indice: i.create(c)
+                ))
+
+    # Contador do cache já criado: a primeira invalidação é só um UPDATE
+    configuracao = models.Configuracao.__table__
+    if 'configuracao' not in tabelas_existentes or conexao.execute(
+        select(configuracao.c.id).where(configuracao.c.chave == cache_quadro.chave_versao)
+    ).first() is None:
+        passos.append((
+            f'criar contador {cache_quadro.chave_versao}',
+            cache_quadro.criar_versao
+        ))
+
+    return passos
+
+
+def obter_plano(conexao, sql, parametros):
+    """Retorna o plano de execução da consulta como lista de linhas"""
+    if conexao.dialect.name == 'sqlite':
+        linhas = conexao.execute(text('EXPLAIN QUERY PLAN ' + sql), parametros)
+        return [linha[-1] for linha in linhas]
+    linhas = conexao.execute(text('EXPLAIN ' + sql), parametros)
+    return [linha[0] for linha in linhas]
+
+
+def usa_indice(plano):
+    """Indica se o plano usa algum índice (SQLite: USING INDEX; PostgreSQL: Index Scan)"""
+    return 'INDEX' in ' '.join(plano).upper()
+
+
+def coletar_planos(conexao):
+    planos = {}
+    for nome, (sql, parametros) in CONSULTAS_QUENTES.items():
+        # Savepoint por consulta: no PostgreSQL um EXPLAIN com erro abortaria a migração inteira
+        savepoint = conexao.begin_nested()
+        try:
+            planos[nome] = obter_plano(conexao, sql, parametros)
+            savepoint.commit()
+        except Exception as e:
+            savepoint.rollback()
+            planos[nome] = [f'erro: {e}']
+    return planos
+
+
+def migrar(simular=False, explicar=False):
+    app = create_app()
+
+    with app.app_context():
+        conexao = db.engine.connect()
+        transacao = conexao.begin()
+        try:
+            print(f"Banco: {conexao.dialect.name}")
+
+            planos_antes = coletar_planos(conexao) if explicar else None
+
+            passos = planejar_migracao(conexao)
+            if not passos:
+                print("Esquema já está atualizado.")
+            for descricao, acao in passos:
+                print(("[simulação] " if simular else "") + descricao)
+                if not simular:
+                    acao(conexao)
+
+            if explicar:
+                planos_depois = coletar_planos(conexao)
+                print("\nPlanos de execução (antes -> depois):")
+                for nome in CONSULTAS_QUENTES:
+                    antes, depois = planos_antes[nome], planos_depois[nome]
+                    status = 'usa índice' if usa_indice(depois) else 'SEM ÍNDICE'
+                    print(f"\n- {nome} [{status}]")
+                    print("    antes:  " + "\n            ".join(antes))
+                    print("    depois: " + "\n            ".join(depois))
+
+            if simular:
+                transacao.rollback()
+                print("\nSimulação concluída (nenhuma alteração gravada).")
+            else:
+                transacao.commit()
+                print("Migração concluída!")
+        except Exception:
+            transacao.rollback()
+            raise
+        finally:
+            conexao.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Migra o banco para o esquema atual')
+    parser.add_argument('--simular', action='store_true', help='não altera o banco')
+    parser.add_argument('--explicar', action='store_true', help='compara os planos das consultas')
+    args = parser.parse_args()
+
+    migrar(simular=args.simular, explicar=args.explicar)
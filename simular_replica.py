@@ -0,0 +1,51 @@
+"""
+simular_replica.py
+Simula uma réplica de leitura local copiando um banco SQLite para outro
+periodicamente (atraso de replicação = intervalo entre cópias)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+
+Uso:
+    # Terminal 1: mantém database/replica.db até --intervalo segundos atrás do primário
+    python simular_replica.py database/comunicacao.db database/replica.db --intervalo 2
+
+    # Terminal 2: app lendo listagens e histórico da réplica
+    REPLICA_DATABASE_URL=sqlite:///database/replica.db python run.py
+
+    # Com PostgreSQL, use duas instâncias locais com replicação por streaming
+    # (pg_basebackup -R) e aponte REPLICA_DATABASE_URL para a standby.
+"""
+
+import argparse
+import sqlite3
+import time
+
+
+def copiar(origem, destino):
+    """Cópia consistente com a API de backup do SQLite (não bloqueia o primário em WAL)"""
+    fonte, alvo = sqlite3.connect(origem), sqlite3.connect(destino)
+    try:
+        fonte.backup(alvo)
+    finally:
+        alvo.close()
+        fonte.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Réplica SQLite simulada por cópias periódicas')
+    parser.add_argument('primario', help='arquivo SQLite do primário')
+    parser.add_argument('replica', help='arquivo SQLite da réplica (sobrescrito)')
+    parser.add_argument('--intervalo', type=float, default=2, help='segundos entre cópias')
+    parser.add_argument('--uma-vez', action='store_true', help='copia uma vez e sai')
+    args = parser.parse_args()
+
+    while True:
+        inicio = time.perf_counter()
+        copiar(args.primario, args.replica)
+        print(f"Réplica atualizada em {(time.perf_counter() - inicio) * 1000:.0f} ms", flush=True)
+        if args.uma_vez:
+            break
+        time.sleep(args.intervalo)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+conftest.py
+Fixtures dos testes: banco SQLite temporário por teste e cliente logado
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Aplicação com banco novo (init_db.py) e sessões de login em tmp_path"""
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(tmp_path / 'teste.db'))
+    monkeypatch.setattr(Config, 'SESSION_FILE_DIR', str(tmp_path / 'sessoes'))
+
+    from init_db import inicializar_banco
+    inicializar_banco()
+
+    from app import create_app
+    from app.cache import cache_quadro
+    cache_quadro.limpar()
+    return create_app()
+
+
+@pytest.fixture
+def cliente(app):
+    cliente = app.test_client()
+    resposta = cliente.post('/api/login', json={'login': 'admin', 'senha': '1234'})
+    assert resposta.status_code == 200
+    return cliente
+
+
+@pytest.fixture
+def paciente_id(cliente):
+    resposta = cliente.post('/api/pacientes', json={'nome': 'Paciente Teste'})
+    assert resposta.status_code == 201
+    return resposta.get_json()['paciente']['id']
+
+
+@pytest.fixture
+def sessao_id(cliente, paciente_id):
+    resposta = cliente.post('/api/sessoes', json={'paciente_id': paciente_id})
+    assert resposta.status_code in (200, 201)
+    return resposta.get_json()['sessao_id']
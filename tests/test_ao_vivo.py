@@ -0,0 +1,71 @@
+"""
+test_ao_vivo.py
+Stream ao vivo (/api/sessoes/<id>/ao-vivo) conforme o tipo de worker
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+WORKER_SYNC = {'SERVER_SOFTWARE': 'gunicorn/21.2.0', 'wsgi.multithread': False}
+WORKER_GTHREAD = {'SERVER_SOFTWARE': 'gunicorn/21.2.0', 'wsgi.multithread': True}
+
+
+def test_recusa_stream_em_worker_sync(cliente, sessao_id):
+    resposta = cliente.get(f'/api/sessoes/{sessao_id}/ao-vivo', environ_overrides=WORKER_SYNC)
+    assert resposta.status_code == 503
+
+
+def test_stream_de_sessao_finalizada_em_worker_com_threads(cliente, sessao_id):
+    pictograma_id = cliente.get('/api/pictogramas').get_json()['pictogramas'][0]['id']
+    cliente.post(f'/api/sessoes/{sessao_id}/selecao', json={'pictograma_id': pictograma_id})
+    cliente.post(f'/api/sessoes/{sessao_id}/finalizar', json={'avaliacao': 'Boa'})
+
+    resposta = cliente.get(f'/api/sessoes/{sessao_id}/ao-vivo', environ_overrides=WORKER_GTHREAD)
+    assert resposta.status_code == 200
+    corpo = resposta.get_data(as_text=True)
+    assert 'event: selecao' in corpo
+    assert 'event: fim' in corpo
+
+
+def _gravar(sessao_id, historico_id):
+    from app import db
+    from app.models import HistoricoSelecao
+    db.session.add(HistoricoSelecao(id=historico_id, sessao_id=sessao_id, pictograma_id=1))
+    db.session.commit()
+
+
+def _proximos_ids(assinatura, quantidade):
+    return [assinatura.fila.get(timeout=5)['id'] for _ in range(quantidade)]
+
+
+def test_vigia_transmite_commit_fora_de_ordem(app, sessao_id):
+    from app.ao_vivo import canal_sessoes
+    app.config['AO_VIVO_INTERVALO_BANCO'] = 0.05
+
+    with app.app_context():
+        assinatura = canal_sessoes.assinar(app, sessao_id)
+        try:
+            # Gravadas por "outro worker": só a vigia as vê
+            _gravar(sessao_id, 10)
+            _gravar(sessao_id, 12)
+            assert sorted(_proximos_ids(assinatura, 2)) == [10, 12]
+
+            # Id 11 reservado antes do 12, mas com commit só depois
+            _gravar(sessao_id, 11)
+            assert _proximos_ids(assinatura, 1) == [11]
+            assert assinatura.fila.empty()
+        finally:
+            canal_sessoes.cancelar(assinatura)
+
+
+def test_stream_envia_id_menor_que_o_ultimo(app, sessao_id):
+    from app.ao_vivo import Assinatura, EVENTO_FIM, transmitir
+
+    assinatura = Assinatura(sessao_id, 10)
+    for evento in ({'tipo': 'selecao', 'id': 12}, {'tipo': 'selecao', 'id': 11},
+                   {'tipo': 'selecao', 'id': 12}, EVENTO_FIM):
+        assinatura.entregar(evento)
+
+    with app.app_context():
+        corpo = ''.join(transmitir(app, sessao_id, 0, assinatura))
+
+    assert [linha for linha in corpo.splitlines() if linha.startswith('id:')] == ['id: 12', 'id: 11']
+    assert 'event: fim' in corpo
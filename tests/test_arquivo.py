@@ -0,0 +1,62 @@
+"""
+test_arquivo.py
+Sessões arquivadas continuam na exportação e nos percentis de tempo de resposta
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+from datetime import date, timedelta
+import pytest
+from app import db
+from app.models import HistoricoSelecao
+from app.retencao import arquivar_sessoes
+
+
+@pytest.fixture
+def sessao_finalizada(cliente, sessao_id):
+    selecoes = [
+        {'evento_id': f'arq-{i}', 'pictograma_id': 1 + i % 3, 'tempo_resposta_segundos': 1.5 * (i + 1)}
+        for i in range(6)
+    ]
+    assert cliente.post(f'/api/sessoes/{sessao_id}/selecoes', json={'selecoes': selecoes}).status_code == 201
+    assert cliente.post(f'/api/sessoes/{sessao_id}/finalizar', json={'avaliacao': 'Boa'}).status_code == 200
+    return sessao_id
+
+
+def _exportacoes(cliente, paciente_id):
+    hoje = date.today()
+    periodo = f'data_inicio={hoje}&data_fim={hoje + timedelta(days=1)}'
+    return [
+        cliente.get(f'/api/exportar/selecoes?formato=csv&paciente_id={paciente_id}').get_data(as_text=True),
+        cliente.get(f'/api/exportar/selecoes?formato=ndjson&{periodo}').get_data(as_text=True),
+    ]
+
+
+def _percentis(cliente, paciente_id):
+    dados = cliente.get(f'/api/pacientes/{paciente_id}/estatisticas').get_json()
+    return dados['tempo_resposta'], [s['tempo_resposta'] for s in dados['sessoes']]
+
+
+def test_arquivar_nao_altera_exportacao_nem_percentis(app, cliente, paciente_id, sessao_finalizada):
+    exportacoes = _exportacoes(cliente, paciente_id)
+    percentis = _percentis(cliente, paciente_id)
+    assert [e.count('\n') for e in exportacoes] == [7, 6]
+
+    with app.app_context():
+        arquivar_sessoes([sessao_finalizada])
+        assert HistoricoSelecao.query.filter_by(sessao_id=sessao_finalizada).count() == 0
+
+    assert _exportacoes(cliente, paciente_id) == exportacoes
+    assert _percentis(cliente, paciente_id) == percentis
+
+
+def test_selecao_tardia_soma_ao_arquivo(app, cliente, paciente_id, sessao_finalizada):
+    with app.app_context():
+        arquivar_sessoes([sessao_finalizada])
+    cliente.post(f'/api/sessoes/{sessao_finalizada}/selecao', json={
+        'pictograma_id': 1, 'tempo_resposta_segundos': 100.0
+    })
+
+    csv = cliente.get(f'/api/exportar/selecoes?paciente_id={paciente_id}').get_data(as_text=True)
+    assert csv.count('\n') == 8
+    geral, _ = _percentis(cliente, paciente_id)
+    assert geral['p50'] == 6.0
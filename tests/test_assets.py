@@ -0,0 +1,68 @@
+"""
+test_assets.py
+Minificação de CSS/JS: os scripts entregues continuam válidos e strings,
+regex, template literals e url() passam intactos
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import os
+import shutil
+import subprocess
+import pytest
+from app.assets import minificar_css, minificar_js
+
+PASTA_JS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'static', 'js')
+NODE = shutil.which('node')
+precisa_node = pytest.mark.skipif(NODE is None, reason='node não instalado')
+
+
+def _node(tmp_path, codigo, *opcoes):
+    caminho = tmp_path / 'script.js'
+    caminho.write_text(codigo, encoding='utf-8')
+    return subprocess.run([NODE, *opcoes, str(caminho)], capture_output=True, text=True, timeout=30)
+
+
+@precisa_node
+@pytest.mark.parametrize('nome', sorted(n for n in os.listdir(PASTA_JS) if n.endswith('.js')))
+def test_scripts_entregues_continuam_validos(tmp_path, nome):
+    with open(os.path.join(PASTA_JS, nome), encoding='utf-8') as f:
+        minificado = minificar_js(f.read())
+
+    resultado = _node(tmp_path, minificado, '--check')
+    assert resultado.returncode == 0, resultado.stderr
+
+
+@precisa_node
+@pytest.mark.parametrize('codigo', [
+    'const url = "http://exemplo.com/a"; // comentário\nconsole.log(url)',
+    "console.log('a // b', \"c /* d */ e\", 'aspas \\' // escapadas')",
+    "const r = /\\/\\/+/g; // barra dupla\nconsole.log('a//b'.replace(r, '/'))",
+    "console.log(/[/]x/.test('/x'), /a\\/b/i.source)",
+    'function f(s) { return /^\\d+$/.test(s) }\nconsole.log(f("12"), f("x"))',
+    'const a = 10, b = 2, g = 1\nconsole.log(a / b / g, a/b/g)',
+    'const x = 3\nconsole.log(`${x} // ${ {a: 1}.a } /* não é comentário */ ${`${x + 1}`}`)',
+    'const b = 2\nconsole.log(1 - -b, 1 + +b, 1 - - b)',
+    'let a = 1\nlet b = a\n++a\nconsole.log(a, b)',
+    'const o = { "//": 1, url: "https://x/y" }\nconsole.log(o["//"], o.url) /* fim */',
+])
+def test_js_minificado_tem_o_mesmo_resultado(tmp_path, codigo):
+    esperado = _node(tmp_path, codigo)
+    assert esperado.returncode == 0, esperado.stderr
+
+    obtido = _node(tmp_path, minificar_js(codigo))
+    assert obtido.returncode == 0, obtido.stderr
+    assert obtido.stdout == esperado.stdout
+
+
+def test_css_preserva_url():
+    css = """
+    /* fundo */
+    .quadro {
+        background: url(https://cdn.exemplo.com/img/fundo.png) no-repeat;
+        mask-image: url(//cdn.exemplo.com/mascara.svg);
+    }
+    """
+    assert minificar_css(css) == (
+        '.quadro{background:url(https://cdn.exemplo.com/img/fundo.png) no-repeat;'
+        'mask-image:url(//cdn.exemplo.com/mascara.svg)}'
+    )
@@ -0,0 +1,143 @@
+"""
+test_biblioteca.py
+Importação da biblioteca em segundo plano, validação do manifesto e limites da exportação
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import io
+import json
+import time
+import zipfile
+import pytest
+from app import biblioteca
+from app.models import Categoria, Pictograma
+
+
+class UploaderFalso:
+    def __init__(self, falhar_em=None):
+        self.falhar_em = falhar_em
+        self.enviados = 0
+
+    def enviar(self, dados, extensao):
+        self.enviados += 1
+        if self.enviados == self.falhar_em:
+            raise OSError('serviço de imagens indisponível')
+        return f'/static/images/teste_{self.enviados}.{extensao}'
+
+
+def _zip(manifesto):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as pacote:
+        pacote.writestr('manifesto.json', json.dumps(manifesto))
+    buffer.seek(0)
+    return buffer
+
+
+def _pacote(quantidade=3):
+    manifesto = {
+        'versao': 1,
+        'categorias': [{'nome': 'Importada', 'cor': '#123456', 'icone': 'x', 'ordem': 99}],
+        'pictogramas': [
+            {'nome': f'Item {i}', 'categoria': 'Importada', 'imagem': f'imagens/{i}.png'}
+            for i in range(quantidade)
+        ]
+    }
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as pacote:
+        pacote.writestr('manifesto.json', json.dumps(manifesto))
+        for i in range(quantidade):
+            pacote.writestr(f'imagens/{i}.png', f'imagem {i}'.encode())
+    buffer.seek(0)
+    return buffer
+
+
+def _importar(cliente, pacote):
+    return cliente.post(
+        '/api/biblioteca/importar',
+        data={'arquivo': (pacote, 'biblioteca.zip')},
+        content_type='multipart/form-data'
+    )
+
+
+def _aguardar(cliente, tarefa_id):
+    for _ in range(100):
+        dados = cliente.get(f'/api/biblioteca/importar/{tarefa_id}').get_json()
+        if dados['status'] in ('concluido', 'erro'):
+            return dados
+        time.sleep(0.05)
+    pytest.fail('importação não terminou')
+
+
+def test_importacao_roda_em_tarefa(app, cliente, monkeypatch):
+    monkeypatch.setattr(biblioteca, 'criar_uploader', lambda config: UploaderFalso())
+
+    resposta = _importar(cliente, _pacote())
+    assert resposta.status_code == 202
+
+    dados = _aguardar(cliente, resposta.get_json()['tarefa_id'])
+    assert dados['status'] == 'concluido', dados['erro']
+    assert dados['relatorio']['pictogramas_criados'] == 3
+    assert dados['relatorio']['imagens_enviadas'] == 3
+
+    with app.app_context():
+        categoria = Categoria.query.filter_by(nome='Importada').one()
+        assert Pictograma.query.filter_by(categoria_id=categoria.id).count() == 3
+
+
+def test_falha_no_envio_nao_grava_nada(app, cliente, monkeypatch):
+    monkeypatch.setattr(biblioteca, 'criar_uploader', lambda config: UploaderFalso(falhar_em=2))
+
+    resposta = _importar(cliente, _pacote())
+    dados = _aguardar(cliente, resposta.get_json()['tarefa_id'])
+
+    assert dados['status'] == 'erro'
+    assert 'nenhuma alteração foi gravada' in dados['erro']
+    with app.app_context():
+        assert Categoria.query.filter_by(nome='Importada').count() == 0
+        assert Pictograma.query.filter(Pictograma.nome.like('Item %')).count() == 0
+
+
+def test_arquivo_invalido_responde_400(cliente):
+    resposta = _importar(cliente, io.BytesIO(b'isto nao e um zip'))
+    assert resposta.status_code == 400
+    assert 'Arquivo inválido' in resposta.get_json()['erro']
+
+
+@pytest.mark.parametrize('manifesto', [
+    [],
+    'biblioteca',
+    {'versao': 1, 'categorias': {'nome': 'X'}},
+    {'versao': 1, 'categorias': ['X']},
+    {'versao': 1, 'pictogramas': [None]},
+    {'versao': 1, 'categorias': [{'nome': 'X'}], 'pictogramas': [{'nome': 'a', 'categoria': ['X']}]},
+])
+def test_manifesto_com_tipos_errados_responde_400(cliente, manifesto):
+    resposta = _importar(cliente, _zip(manifesto))
+    assert resposta.status_code == 400
+    assert 'Arquivo inválido' in resposta.get_json()['erro']
+
+
+def test_exportacao_limita_downloads_remotos(app, monkeypatch):
+    baixadas = []
+
+    def baixar(url, timeout):
+        baixadas.append(url)
+        time.sleep(0.2)
+        return None if url.endswith('grande.png') else b'imagem'
+
+    monkeypatch.setattr(biblioteca, '_baixar', baixar)
+    with app.app_context():
+        categoria_id = Categoria.query.first().id
+        for nome in ('grande', 'a', 'b', 'c'):
+            biblioteca.db.session.add(Pictograma(
+                nome=nome, categoria_id=categoria_id, imagem_url=f'https://exemplo.com/{nome}.png'
+            ))
+        biblioteca.db.session.commit()
+
+        relatorio = biblioteca.exportar_biblioteca(io.BytesIO(), baixar_remotas=True,
+                                                   tempo_max_downloads=0.3)
+
+    # Após o prazo as demais ficam como imagem_url; a grande demais também
+    assert len(baixadas) == 2
+    assert relatorio['imagens_incluidas'] == 1
+    assert relatorio['imagens_remotas'] >= 3
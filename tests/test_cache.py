@@ -0,0 +1,51 @@
+"""
+test_cache.py
+Contador de versão do cache: criado pelo init_db/migrar_db e sem conflito na primeira invalidação
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+from app import db
+from app.cache import cache_quadro
+from app.models import Configuracao
+
+
+def _versao():
+    return db.session.query(Configuracao.valor).filter_by(chave='versao_quadro').scalar()
+
+
+def _apagar_versao():
+    Configuracao.query.filter_by(chave='versao_quadro').delete()
+    db.session.commit()
+
+
+def test_init_db_cria_contador(app):
+    with app.app_context():
+        assert _versao() == '0'
+
+
+def test_criar_versao_repetido_nao_conflita(app):
+    with app.app_context():
+        _apagar_versao()
+        cache_quadro.criar_versao()
+        cache_quadro.criar_versao()
+        db.session.commit()
+        assert Configuracao.query.filter_by(chave='versao_quadro').count() == 1
+
+
+def test_primeira_invalidacao_sem_linha(app):
+    with app.app_context():
+        _apagar_versao()
+        cache_quadro.invalidar()
+        db.session.commit()
+        assert _versao() == '1'
+
+
+def test_migrar_db_cria_contador(app):
+    import migrar_db
+    with app.app_context():
+        _apagar_versao()
+
+    migrar_db.migrar()
+
+    with app.app_context():
+        assert _versao() == '0'
@@ -0,0 +1,65 @@
+"""
+test_estatisticas.py
+Estatísticas do paciente com sessões com e sem resumo consolidado
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+from app import db
+from app.models import ResumoSessao, UsoDiario
+
+
+def _registrar_sessao(cliente, paciente_id, pictogramas, finalizar=True):
+    sessao_id = cliente.post('/api/sessoes', json={'paciente_id': paciente_id}).get_json()['sessao_id']
+    for pictograma_id in pictogramas:
+        resposta = cliente.post(f'/api/sessoes/{sessao_id}/selecao', json={'pictograma_id': pictograma_id})
+        assert resposta.status_code == 201
+    if finalizar:
+        resposta = cliente.post(f'/api/sessoes/{sessao_id}/finalizar', json={'avaliacao': 'Boa'})
+        assert resposta.status_code == 200
+    return sessao_id
+
+
+def _apagar_resumos(app):
+    """Simula sessões finalizadas antes das tabelas de resumo existirem"""
+    with app.app_context():
+        ResumoSessao.query.delete()
+        UsoDiario.query.delete()
+        db.session.commit()
+
+
+def test_sessao_finalizada_sem_resumo_entra_nos_totais(app, cliente, paciente_id):
+    _registrar_sessao(cliente, paciente_id, [1, 1, 2])
+    _apagar_resumos(app)
+
+    estatisticas = cliente.get(f'/api/pacientes/{paciente_id}/estatisticas').get_json()
+    assert estatisticas['total_selecoes'] == 3
+    assert estatisticas['sessoes'][0]['total_selecoes'] == 3
+    assert {p['pictograma_id']: p['total'] for p in estatisticas['pictogramas']} == {1: 2, 2: 1}
+    assert sum(c['total'] for c in estatisticas['categorias']) == 3
+
+
+def test_dia_com_sessoes_com_e_sem_resumo_nao_conta_duas_vezes(app, cliente, paciente_id):
+    _registrar_sessao(cliente, paciente_id, [1, 1, 2])
+    _apagar_resumos(app)
+    _registrar_sessao(cliente, paciente_id, [2, 3])
+    _registrar_sessao(cliente, paciente_id, [3], finalizar=False)
+
+    estatisticas = cliente.get(f'/api/pacientes/{paciente_id}/estatisticas').get_json()
+    assert estatisticas['total_selecoes'] == 6
+    assert sum(s['total_selecoes'] for s in estatisticas['sessoes']) == 6
+    assert {p['pictograma_id']: p['total'] for p in estatisticas['pictogramas']} == {1: 2, 2: 2, 3: 2}
+
+
+def test_selecao_depois_da_finalizacao_atualiza_resumo(app, cliente, paciente_id):
+    sessao_id = _registrar_sessao(cliente, paciente_id, [1, 2])
+
+    resposta = cliente.post(f'/api/sessoes/{sessao_id}/selecao', json={'pictograma_id': 3})
+    assert resposta.status_code == 201
+
+    with app.app_context():
+        assert ResumoSessao.query.get(sessao_id).total_selecoes == 3
+        assert sum(u.total for u in UsoDiario.query.filter_by(paciente_id=paciente_id)) == 3
+
+    estatisticas = cliente.get(f'/api/pacientes/{paciente_id}/estatisticas').get_json()
+    assert estatisticas['total_selecoes'] == 3
+    assert estatisticas['sessoes'][0]['total_selecoes'] == 3
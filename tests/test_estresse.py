@@ -0,0 +1,23 @@
+"""
+test_estresse.py
+Concorrência entre processos (como workers do gunicorn) sobre um SQLite temporário
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+from argparse import Namespace
+import estresse_banco
+
+
+def test_abertura_simultanea_uma_sessao_por_paciente(app):
+    resultado = estresse_banco.estressar_abertura(Namespace(workers=4, pacientes=5))
+
+    assert resultado == {'erros': {}, 'duplicados': 0, 'divergentes': 0}
+
+
+def test_selecoes_concorrentes_sem_database_is_locked(app):
+    resultado = estresse_banco.estressar_selecoes(
+        Namespace(workers=4, requisicoes=30, sessoes=2, exportando=1)
+    )
+
+    assert resultado['erros'] == {}
+    assert resultado['confirmadas'] == resultado['gravadas'] > 0
@@ -0,0 +1,30 @@
+"""
+test_imagens.py
+Processamento local de imagens: threads gerando o mesmo hash ao mesmo tempo
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import io
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from app.imagens import VARIANTES, processar_imagem_local
+
+
+def test_mesma_imagem_em_varias_threads(tmp_path):
+    buffer = io.BytesIO()
+    Image.new('RGB', (800, 600), 'red').save(buffer, 'PNG')
+    dados = buffer.getvalue()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        urls = list(executor.map(lambda _: processar_imagem_local(dados, 'png', str(tmp_path)), range(16)))
+
+    assert len(set(urls)) == 1
+    arquivos = sorted(os.listdir(tmp_path))
+    assert len(arquivos) == len(VARIANTES)
+    assert not any(nome.endswith('.tmp') for nome in arquivos)
+    for nome in arquivos:
+        assert stat.S_IMODE(os.stat(tmp_path / nome).st_mode) == 0o644
+        with Image.open(tmp_path / nome) as imagem:
+            assert imagem.format == 'WEBP'
@@ -0,0 +1,37 @@
+"""
+test_lote.py
+Edição em lote de categorias e pictogramas: tipos e campos obrigatórios validados antes do UPDATE
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import pytest
+
+
+def test_lote_valido(cliente):
+    resposta = cliente.patch('/api/pictogramas/lote', json={
+        'pictogramas': [{'id': 1, 'ordem': 3, 'ativo': False, 'audio_texto': None}]
+    })
+    assert resposta.status_code == 200
+    assert resposta.get_json()['atualizados'] == 1
+
+
+@pytest.mark.parametrize('campos, mensagem', [
+    ({'ordem': 'abc'}, 'ordem deve ser um número inteiro'),
+    ({'ativo': 'talvez'}, 'ativo deve ser true ou false'),
+    ({'ordem': True}, 'ordem deve ser um número inteiro'),
+    ({'nome': None}, 'nome é obrigatório'),
+    ({'nome': '  '}, 'nome é obrigatório'),
+    ({'nome': 'x' * 51}, 'nome deve ter no máximo 50 caracteres'),
+    ({'categoria_id': '2'}, 'categoria_id deve ser um número inteiro'),
+    ({'audio_texto': 5}, 'audio_texto deve ser texto'),
+])
+def test_lote_pictogramas_invalido_responde_400(cliente, campos, mensagem):
+    resposta = cliente.patch('/api/pictogramas/lote', json={'pictogramas': [dict(campos, id=1)]})
+    assert resposta.status_code == 400
+    assert resposta.get_json()['erro'] == f'Item 1: {mensagem}'
+
+
+def test_lote_categorias_invalido_responde_400(cliente):
+    resposta = cliente.patch('/api/categorias/lote', json={'categorias': [{'id': 1, 'cor': 123}]})
+    assert resposta.status_code == 400
+    assert resposta.get_json()['erro'] == 'Item 1: cor deve ser texto'
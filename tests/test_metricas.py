@@ -0,0 +1,23 @@
+"""
+test_metricas.py
+Instrumentação de SQL: consultas com erro não deixam início pendente na conexão
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app import db
+
+
+def test_consulta_com_erro_desempilha_inicio(app):
+    with app.test_request_context():
+        app.preprocess_request()
+        conexao = db.session.connection()
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conexao.execute(text('SELECT * FROM tabela_inexistente'))
+        conexao.execute(text('SELECT 1'))
+
+        assert conexao.connection.info.get('inicio_sql') == []
+        db.session.rollback()
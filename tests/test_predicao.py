@@ -0,0 +1,86 @@
+"""
+test_predicao.py
+Predição do próximo pictograma: releitura de commits fora de ordem, memória e pacientes inexistentes
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+from collections import OrderedDict
+import pytest
+from app import db, predicao
+from app.models import HistoricoSelecao
+from app.predicao import servico_predicao
+
+
+@pytest.fixture(autouse=True)
+def servico_vazio(monkeypatch):
+    """O serviço é global: cada teste começa sem modelos de bancos anteriores"""
+    monkeypatch.setattr(servico_predicao, '_modelos', OrderedDict())
+    monkeypatch.setattr(servico_predicao, '_paciente_da_sessao', {})
+
+
+def _gravar(sessao_id, *ids):
+    for historico_id in ids:
+        db.session.add(HistoricoSelecao(id=historico_id, sessao_id=sessao_id, pictograma_id=1))
+    db.session.commit()
+
+
+def test_paciente_inexistente_responde_404(cliente):
+    assert cliente.get('/api/pacientes/999999/predicao').status_code == 404
+    assert len(servico_predicao._modelos) == 0
+
+
+def test_commit_fora_de_ordem_nao_e_perdido(app, paciente_id, sessao_id):
+    with app.app_context():
+        _gravar(sessao_id, 10, 12)
+        servico_predicao.prever(paciente_id)
+
+        # Id 11 reservado antes do 12, mas com commit só depois da leitura
+        _gravar(sessao_id, 11)
+        servico_predicao.registrar(sessao_id)
+        servico_predicao.prever(paciente_id)
+
+        assert servico_predicao._modelos[paciente_id].unigramas[1] == 3
+
+
+def test_registrar_nao_le_o_banco(app, paciente_id, sessao_id, monkeypatch):
+    with app.app_context():
+        _gravar(sessao_id, 1)
+        servico_predicao.prever(paciente_id)
+
+        consultas = []
+        original = servico_predicao._novas_selecoes
+        monkeypatch.setattr(servico_predicao, '_novas_selecoes',
+                            lambda *args: consultas.append(args) or original(*args))
+        for historico_id in (2, 3, 4):
+            _gravar(sessao_id, historico_id)
+            servico_predicao.registrar(sessao_id)
+        assert consultas == []
+
+        # Uma releitura para os três lotes, feita pelo próximo prever()
+        servico_predicao.prever(paciente_id)
+        servico_predicao.prever(paciente_id)
+        assert len(consultas) == 1
+        assert servico_predicao._modelos[paciente_id].unigramas[1] == 4
+
+
+def test_prever_responde_da_memoria(app, paciente_id, sessao_id, monkeypatch):
+    with app.app_context():
+        _gravar(sessao_id, 1)
+        servico_predicao.prever(paciente_id)
+
+        consultas = []
+        original = servico_predicao._novas_selecoes
+        monkeypatch.setattr(servico_predicao, '_novas_selecoes',
+                            lambda *args: consultas.append(args) or original(*args))
+        for _ in range(5):
+            assert servico_predicao.prever(paciente_id)[0][0] == 1
+        assert consultas == []
+
+
+def test_quantidade_de_modelos_limitada(app, cliente, monkeypatch):
+    monkeypatch.setattr(predicao, 'MAX_MODELOS', 2)
+    ids = [cliente.post('/api/pacientes', json={'nome': f'P{i}'}).get_json()['paciente']['id'] for i in range(3)]
+
+    for paciente_id in ids:
+        assert cliente.get(f'/api/pacientes/{paciente_id}/predicao').status_code == 200
+    assert list(servico_predicao._modelos) == ids[1:]
@@ -0,0 +1,27 @@
+"""
+test_quadro.py
+Revalidação do /api/quadro por ETag, com e sem compressão
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+
+def test_revalidacao_sem_compressao(cliente):
+    resposta = cliente.get('/api/quadro', headers={'Accept-Encoding': 'identity'})
+    assert resposta.status_code == 200
+    etag = resposta.headers['ETag']
+
+    resposta = cliente.get('/api/quadro', headers={'Accept-Encoding': 'identity', 'If-None-Match': etag})
+    assert resposta.status_code == 304
+    assert resposta.data == b''
+
+
+def test_revalidacao_com_gzip(cliente):
+    resposta = cliente.get('/api/quadro', headers={'Accept-Encoding': 'gzip'})
+    assert resposta.status_code == 200
+    assert resposta.headers['Content-Encoding'] == 'gzip'
+    etag = resposta.headers['ETag']
+    assert etag.startswith('W/')
+
+    resposta = cliente.get('/api/quadro', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert resposta.status_code == 304
+    assert resposta.data == b''
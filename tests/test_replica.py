@@ -0,0 +1,85 @@
+"""
+test_replica.py
+Roteamento da SessaoRoteada com dois bancos SQLite: réplica só para leituras
+marcadas, sem escrita na requisição e fora da janela de leitura das próprias escritas
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import sqlite3
+import pytest
+from flask import g
+from app import db
+from app.models import Paciente, Usuario
+from config import Config
+
+SO_NA_REPLICA = 'Paciente só na réplica'
+
+
+@pytest.fixture(autouse=True)
+def config_replica(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'REPLICA_DATABASE_URL', 'sqlite:///' + str(tmp_path / 'replica.db'))
+    # init_app registra o metadata do bind no db global: os próximos testes não têm réplica
+    monkeypatch.setattr(db, 'metadatas', dict(db.metadatas))
+
+
+@pytest.fixture
+def replica(app, tmp_path):
+    """Cópia do banco principal com um paciente que o primário não tem"""
+    with sqlite3.connect(tmp_path / 'teste.db') as origem, sqlite3.connect(tmp_path / 'replica.db') as destino:
+        origem.backup(destino)
+        usuario_id = destino.execute("SELECT id FROM usuario WHERE login = 'admin'").fetchone()[0]
+        destino.execute('INSERT INTO paciente (nome, usuario_id, ativo) VALUES (?, ?, 1)',
+                        (SO_NA_REPLICA, usuario_id))
+    return tmp_path / 'replica.db'
+
+
+def _contar_na_replica():
+    return db.session.query(Paciente).filter_by(nome=SO_NA_REPLICA).count()
+
+
+def test_leitura_marcada_vai_para_a_replica(app, replica):
+    with app.test_request_context():
+        g.ler_da_replica = True
+        assert _contar_na_replica() == 1
+
+
+def test_leitura_sem_marca_fica_no_primario(app, replica):
+    with app.test_request_context():
+        assert _contar_na_replica() == 0
+    with app.app_context():
+        # Fora de requisição (tarefas, scripts): sempre o primário
+        assert _contar_na_replica() == 0
+
+
+def test_depois_de_gravar_a_requisicao_le_do_primario(app, replica):
+    with app.test_request_context():
+        g.ler_da_replica = True
+        assert _contar_na_replica() == 1
+
+        usuario = Usuario.query.filter_by(login='admin').one()
+        db.session.add(Paciente(nome='Novo', usuario_id=usuario.id))
+        db.session.flush()
+        assert g.escreveu_no_primario
+        assert _contar_na_replica() == 0
+        assert db.session.query(Paciente).filter_by(nome='Novo').count() == 1
+        db.session.rollback()
+
+
+def _nomes(cliente):
+    return {p['nome'] for p in cliente.get('/api/pacientes').get_json()['pacientes']}
+
+
+def test_cliente_le_as_proprias_escritas(app, cliente, replica):
+    app.config['REPLICA_JANELA_ESCRITA'] = 60
+    assert cliente.post('/api/pacientes', json={'nome': 'Recém-criado'}).status_code == 201
+
+    # Dentro da janela: primário, que já tem o paciente novo
+    nomes = _nomes(cliente)
+    assert 'Recém-criado' in nomes
+    assert SO_NA_REPLICA not in nomes
+
+    # Janela passada: a listagem volta para a réplica
+    app.config['REPLICA_JANELA_ESCRITA'] = 0
+    nomes = _nomes(cliente)
+    assert SO_NA_REPLICA in nomes
+    assert 'Recém-criado' not in nomes
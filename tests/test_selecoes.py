@@ -0,0 +1,85 @@
+"""
+test_selecoes.py
+Registro de seleções avulsas e em lote (fila offline do tablet)
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import pytest
+
+
+def _lote(cliente, sessao_id, **campos):
+    item = dict({'evento_id': 'evento-1', 'pictograma_id': 1}, **campos)
+    return cliente.post(f'/api/sessoes/{sessao_id}/selecoes', json={'selecoes': [item]})
+
+
+def test_lote_valido_e_reenvio_idempotente(cliente, sessao_id):
+    resposta = _lote(cliente, sessao_id, tempo_resposta_segundos=1.5, atraso_ms=2000)
+    assert resposta.status_code == 201
+    assert resposta.get_json()['inseridas'] == 1
+
+    resposta = _lote(cliente, sessao_id, tempo_resposta_segundos=1.5, atraso_ms=2000)
+    assert resposta.get_json()['duplicadas'] == 1
+
+    assert cliente.get(f'/api/sessoes/{sessao_id}/historico').status_code == 200
+
+
+@pytest.mark.parametrize('campos', [
+    {'pictograma_id': 'abc'},
+    {'pictograma_id': 99999},
+    {'pictograma_id': True},
+    {'evento_id': 'x' * 65},
+    {'tempo_resposta_segundos': 'rápido'},
+    {'atraso_ms': 'ontem'},
+])
+def test_item_invalido_e_rejeitado_sem_gravar(cliente, sessao_id, campos):
+    resposta = _lote(cliente, sessao_id, **campos)
+    assert resposta.status_code == 201
+    dados = resposta.get_json()
+    assert dados['inseridas'] == 0
+    assert [r['indice'] for r in dados['rejeitadas']] == [0]
+
+    historico = cliente.get(f'/api/sessoes/{sessao_id}/historico')
+    assert historico.status_code == 200
+    assert historico.get_json()['historico'] == []
+
+
+def test_item_invalido_nao_derruba_o_lote(cliente, sessao_id):
+    selecoes = [{'evento_id': f'evento-{i}', 'pictograma_id': 1} for i in range(20)]
+    selecoes[7]['pictograma_id'] = 99999
+    resposta = cliente.post(f'/api/sessoes/{sessao_id}/selecoes', json={'selecoes': selecoes})
+
+    dados = resposta.get_json()
+    assert resposta.status_code == 201
+    assert dados['inseridas'] == 19
+    assert dados['rejeitadas'] == [{'indice': 7, 'evento_id': 'evento-7', 'erro': 'Pictograma não encontrado'}]
+
+
+@pytest.mark.parametrize('tempo', [3700.2, -1])
+def test_tempo_fora_do_limite_vira_nulo(cliente, sessao_id, tempo):
+    resposta = _lote(cliente, sessao_id, tempo_resposta_segundos=tempo)
+    assert resposta.get_json()['inseridas'] == 1
+
+    resposta = cliente.post(f'/api/sessoes/{sessao_id}/selecao', json={
+        'pictograma_id': 1, 'tempo_resposta_segundos': tempo
+    })
+    assert resposta.status_code == 201
+
+    historico = cliente.get(f'/api/sessoes/{sessao_id}/historico').get_json()['historico']
+    assert [h['tempo_resposta_segundos'] for h in historico] == [None, None]
+
+
+@pytest.mark.parametrize('atraso', [-5, 10 ** 15])
+def test_atraso_fora_do_limite_e_ajustado(cliente, sessao_id, atraso):
+    resposta = _lote(cliente, sessao_id, atraso_ms=atraso)
+    assert resposta.get_json()['inseridas'] == 1
+
+
+def test_lote_sem_lista_responde_400(cliente, sessao_id):
+    resposta = cliente.post(f'/api/sessoes/{sessao_id}/selecoes', json={'selecoes': 'nada'})
+    assert resposta.status_code == 400
+
+
+@pytest.mark.parametrize('pictograma_id', ['abc', 99999])
+def test_selecao_avulsa_com_pictograma_invalido(cliente, sessao_id, pictograma_id):
+    resposta = cliente.post(f'/api/sessoes/{sessao_id}/selecao', json={'pictograma_id': pictograma_id})
+    assert resposta.status_code == 400
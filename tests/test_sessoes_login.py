@@ -0,0 +1,99 @@
+"""
+test_sessoes_login.py
+Sessão de login em arquivos: gravação em SESSION_FILE_DIR, novo identificador
+no login e perfil em cache descartado após o commit do usuário
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import json
+import os
+from app import db
+from app.models import Usuario
+
+
+def _sid(app, cliente):
+    cookie = cliente.get_cookie(app.config['SESSION_COOKIE_NAME'])
+    return cookie.value if cookie else None
+
+
+def _arquivo_sessao(app, sid):
+    return os.path.join(app.config['SESSION_FILE_DIR'], f'{sid}.json')
+
+
+def _perfil_em_cache(app, usuario_id):
+    return os.path.join(app.config['SESSION_FILE_DIR'], 'perfis', f'{usuario_id}.json')
+
+
+def _login(cliente):
+    resposta = cliente.post('/api/login', json={'login': 'admin', 'senha': '1234'})
+    assert resposta.status_code == 200
+    return resposta.get_json()['usuario']['id']
+
+
+def test_sessao_fica_em_arquivo(app, cliente):
+    sid = _sid(app, cliente)
+    with open(_arquivo_sessao(app, sid), encoding='utf-8') as f:
+        assert json.load(f)['usuario_login'] == 'admin'
+
+    cliente.post('/api/logout')
+    assert _sid(app, cliente) is None
+    assert not os.path.exists(_arquivo_sessao(app, sid))
+
+
+def test_login_troca_o_identificador(app):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['preferencia'] = 'anonima'
+    sid_anterior = _sid(app, cliente)
+    assert os.path.exists(_arquivo_sessao(app, sid_anterior))
+
+    _login(cliente)
+
+    sid = _sid(app, cliente)
+    assert sid != sid_anterior
+    assert not os.path.exists(_arquivo_sessao(app, sid_anterior))
+
+    # O identificador antigo não dá acesso à sessão logada
+    atacante = app.test_client()
+    atacante.set_cookie(app.config['SESSION_COOKIE_NAME'], sid_anterior)
+    assert atacante.get('/api/usuario/atual').get_json() == {'logado': False}
+
+
+def test_perfil_descartado_apos_commit(app, cliente):
+    usuario_id = _login(cliente)
+    assert cliente.get('/api/usuario/atual').get_json()['usuario']['nome'] != 'Nome Novo'
+    assert os.path.exists(_perfil_em_cache(app, usuario_id))
+
+    with app.app_context():
+        usuario = Usuario.query.get(usuario_id)
+        usuario.nome = 'Nome Novo'
+        db.session.flush()
+        # Antes do commit o perfil continua valendo
+        assert os.path.exists(_perfil_em_cache(app, usuario_id))
+        db.session.commit()
+
+    assert not os.path.exists(_perfil_em_cache(app, usuario_id))
+    assert cliente.get('/api/usuario/atual').get_json()['usuario']['nome'] == 'Nome Novo'
+
+
+def test_rollback_mantem_o_perfil(app, cliente):
+    usuario_id = _login(cliente)
+    with app.app_context():
+        Usuario.query.get(usuario_id).nome = 'Descartado'
+        db.session.flush()
+        db.session.rollback()
+
+    assert os.path.exists(_perfil_em_cache(app, usuario_id))
+
+
+def test_usuario_desativado_volta_ao_login(app, cliente):
+    assert cliente.get('/').status_code == 302
+
+    with app.app_context():
+        Usuario.query.filter_by(login='admin').one().ativo = False
+        db.session.commit()
+
+    # index() usa a mesma verificação das rotas protegidas: sem redirecionamento em laço
+    resposta = cliente.get('/')
+    assert resposta.status_code == 200
+    assert cliente.get('/api/pacientes').status_code in (302, 401)
@@ -0,0 +1,81 @@
+"""
+test_uploads.py
+Fila de uploads: envio -> consulta até concluido/erro e tarefas abandonadas por reinício
+Sistema de Comunicação Alternativa com Pictogramas para TEA
+"""
+
+import io
+import time
+from datetime import datetime, timedelta
+import pytest
+from PIL import Image
+from app import db, uploads
+from app.models import TarefaUpload
+from app.uploads import UploaderSimulado, fila_uploads
+
+
+@pytest.fixture(autouse=True)
+def uploader_simulado(app, tmp_path, monkeypatch):
+    """A fila é global e escolhe o uploader uma vez por processo: troca pelo simulado"""
+    monkeypatch.setattr(uploads, 'PASTA_IMAGENS', str(tmp_path / 'images'))
+    fila_uploads._iniciar(app)
+    monkeypatch.setattr(fila_uploads, '_uploader', UploaderSimulado(atraso=0.05))
+
+
+def _png():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), 'blue').save(buffer, 'PNG')
+    buffer.seek(0)
+    return buffer
+
+
+def _enviar(cliente, arquivo):
+    resposta = cliente.post(
+        '/api/upload',
+        data={'imagem': (arquivo, 'figura.png')},
+        content_type='multipart/form-data'
+    )
+    assert resposta.status_code == 202
+    return resposta.get_json()['tarefa_id']
+
+
+def _aguardar(cliente, tarefa_id):
+    for _ in range(100):
+        dados = cliente.get(f'/api/upload/{tarefa_id}').get_json()
+        if dados['status'] in ('concluido', 'erro'):
+            return dados
+        time.sleep(0.05)
+    pytest.fail('upload não terminou')
+
+
+def test_upload_conclui(cliente, tmp_path):
+    dados = _aguardar(cliente, _enviar(cliente, _png()))
+
+    assert dados['status'] == 'concluido', dados['erro']
+    assert dados['url'].startswith('/static/images/')
+    assert dados['miniatura_url']
+    assert (tmp_path / 'images' / dados['url'].rsplit('/', 1)[1]).exists()
+
+
+def test_upload_invalido_termina_em_erro(cliente):
+    dados = _aguardar(cliente, _enviar(cliente, io.BytesIO(b'isto nao e uma imagem')))
+
+    assert dados['status'] == 'erro'
+    assert 'imagem válida' in dados['erro']
+
+
+def test_tarefa_abandonada_vira_erro(app, cliente):
+    # Tarefa de um worker que reiniciou antes de processá-la
+    with app.app_context():
+        db.session.add(TarefaUpload(
+            id='abandonada', status='processando',
+            data_criacao=datetime.utcnow() - timedelta(seconds=app.config['UPLOAD_TEMPO_MAXIMO'] + 1)
+        ))
+        db.session.add(TarefaUpload(id='recente', status='pendente'))
+        db.session.commit()
+
+    dados = cliente.get('/api/upload/abandonada').get_json()
+    assert dados['status'] == 'erro'
+    assert 'reiniciado' in dados['erro']
+    assert cliente.get('/api/upload/recente').get_json()['status'] == 'pendente'
+    assert cliente.get('/api/upload/inexistente').status_code == 404